@@ -0,0 +1,120 @@
+"""
+Benchmark do reconhecimento de intenções do bot do chat.
+
+Mede mensagens classificadas por segundo com o autômato compilado de
+services/chat_bot.py (intenções + nomes de serviços) e com a cadeia de
+buscas por substring usada antes (`any(palavra in mensagem ...)`). Não usa
+o banco: o catálogo de serviços é sintético, no tamanho informado.
+
+Uso (a partir de backend/):
+
+    python benchmarks/benchmark_chat_bot.py
+    python benchmarks/benchmark_chat_bot.py --servicos 500 --segundos 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from services.chat_bot import AutomatoTokens, compilar_intencoes, normalizar  # noqa: E402
+
+MENSAGENS = (
+    'Olá, bom dia!',
+    'Quantas propostas pendentes eu tenho?',
+    'Quanto custa a Contabilidade Mensal?',
+    'Como cadastro um novo cliente no sistema?',
+    'Preciso de ajuda para configurar os serviços do regime Simples Nacional',
+    'Qual o valor da abertura de empresa para uma prestadora de serviços?',
+    'Obrigado, até logo',
+    'Gostaria de entender como o desconto é calculado quando a proposta passa de 20% '
+    'e precisa de aprovação do gerente responsável pela equipe',
+)
+
+# Cadeia anterior de palavras-chave, na mesma ordem
+_CADEIA_ANTERIOR = (
+    ['olá', 'oi', 'hello', 'hi'],
+    ['proposta', 'propostas'],
+    ['cliente', 'clientes'],
+    ['serviço', 'serviços'],
+    ['ajuda', 'help', 'suporte'],
+    ['obrigado', 'valeu', 'thanks'],
+    ['tchau', 'bye', 'até'],
+)
+
+_PALAVRAS_SERVICO = ('Contabilidade', 'Folha', 'Abertura', 'Consultoria', 'Declaração',
+                     'Escrituração', 'Fiscal', 'Pagamento', 'Tributária', 'Societária')
+
+
+def _classificar_anterior(mensagem: str, nomes_servicos) -> int:
+    texto = mensagem.lower()
+    for posicao, palavras in enumerate(_CADEIA_ANTERIOR):
+        if any(palavra in texto for palavra in palavras):
+            return posicao
+    # Sem autômato, achar um serviço pelo nome exige varrer o catálogo
+    for posicao, nome in enumerate(nomes_servicos):
+        if nome in texto:
+            return len(_CADEIA_ANTERIOR) + posicao
+    return -1
+
+
+def _catalogo_sintetico(quantidade: int):
+    nomes = ['contabilidade mensal', 'abertura de empresa']
+    indice = 0
+    while len(nomes) < quantidade:
+        a = _PALAVRAS_SERVICO[indice % len(_PALAVRAS_SERVICO)]
+        b = _PALAVRAS_SERVICO[(indice // len(_PALAVRAS_SERVICO)) % len(_PALAVRAS_SERVICO)]
+        nomes.append(f'{a} {b} {indice}'.lower())
+        indice += 1
+    return nomes[:quantidade]
+
+
+def medir(funcao, segundos: float) -> float:
+    """Mensagens por segundo executando `funcao(mensagem)` em laço"""
+    total, inicio = 0, time.perf_counter()
+    limite = inicio + segundos
+    while True:
+        for mensagem in MENSAGENS:
+            funcao(mensagem)
+        total += len(MENSAGENS)
+        agora = time.perf_counter()
+        if agora >= limite:
+            return total / (agora - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das intenções do bot do chat')
+    parser.add_argument('--servicos', type=int, default=50, help='tamanho do catálogo sintético')
+    parser.add_argument('--segundos', type=float, default=2.0, help='duração de cada medição')
+    args = parser.parse_args()
+
+    nomes = _catalogo_sintetico(args.servicos)
+
+    inicio = time.perf_counter()
+    intencoes = compilar_intencoes()
+    servicos = AutomatoTokens()
+    for posicao, nome in enumerate(nomes):
+        servicos.adicionar(nome, posicao)
+    servicos.compilar()
+    compilacao_ms = (time.perf_counter() - inicio) * 1000
+
+    def compilado(mensagem):
+        tokens = normalizar(mensagem)
+        return set(intencoes.buscar(tokens)), list(servicos.buscar(tokens))
+
+    anterior = medir(lambda m: _classificar_anterior(m, nomes), args.segundos)
+    atual = medir(compilado, args.segundos)
+
+    print(f'Catálogo: {args.servicos} serviços | compilação dos autômatos: {compilacao_ms:.2f} ms')
+    print(f'{"Método":<28} {"mensagens/s":>14}')
+    print(f'{"substring (anterior)":<28} {anterior:>14,.0f}')
+    print(f'{"autômato compilado":<28} {atual:>14,.0f}')
+    print(f'Razão: {atual / anterior:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
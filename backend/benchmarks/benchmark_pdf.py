@@ -0,0 +1,214 @@
+"""
+Benchmark da renderização de PDFs (modelo_pdf.html + weasyprint).
+
+Renderiza propostas sintéticas com 1, 10, 50 e 200 itens (descrições longas,
+como as reais) e mede tempo de parede, pico de memória (RSS) e tamanho do
+arquivo. Cada cenário roda em um processo próprio, para que o pico de RSS
+de um não contamine o outro.
+
+Uso (a partir de backend/):
+
+    python benchmarks/benchmark_pdf.py                     # compara com a baseline
+    python benchmarks/benchmark_pdf.py --salvar-baseline   # grava a baseline atual
+    python benchmarks/benchmark_pdf.py --tolerancia 0.3 --repeticoes 5
+    python benchmarks/benchmark_pdf.py --antes-depois      # sem x com otimização de saída
+
+Com `--antes-depois` cada cenário também é renderizado sem as opções de
+otimização (padrões do weasyprint) e a tabela mostra o ganho de tamanho e a
+diferença de tempo. A baseline sempre usa a configuração atual (PDF_OTIMIZAR).
+
+Sai com código 1 se algum cenário ficar acima da baseline além da tolerância
+e com código 2 se a baseline não existir (a baseline depende da máquina e não
+é versionada: grave-a com `--salvar-baseline` antes da primeira comparação).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_pdf.json')
+CENARIOS = (1, 10, 50, 200)
+METRICAS = ('tempo_s', 'rss_pico_kb', 'tamanho_bytes')
+
+# Descrições no tamanho das usadas em gerar_pdf_proposta_temp
+DESCRICOES = (
+    'Emissão do certificado digital (e-CNPJ A1 da empresa): conferência de documentos, '
+    'agendamento/validação e emissão.\nUtilização do certificado para assinar e transmitir DCTF '
+    'e EFD-Contribuições e para outorgar procuração eletrônica no e-CAC.',
+    'Elaboração e transmissão da DCTF (Declaração de Débitos e Créditos Tributários Federais) '
+    'dos exercícios de 2020 a 2024.\nElaboração e transmissão da EFD-Contribuições (PIS/COFINS e '
+    'CPRB) dos exercícios de 2020 a 2025.\nAtendimento às exigências da Receita Federal.\nAdoção '
+    'das medidas necessárias para voltar o CNPJ à condição de ativo, permitindo o pleno '
+    'funcionamento da empresa.\nGarantia de que a empresa esteja em situação regular, sem '
+    'pendências impeditivas.\nPrevenção de multas e restrições futuras.',
+)
+
+
+def dados_sinteticos(quantidade_itens: int) -> dict:
+    """Dados de template equivalentes a uma proposta com N itens"""
+    itens = []
+    for i in range(quantidade_itens):
+        valor = 150.0 + (i % 7) * 35.5
+        itens.append({
+            'servico': {'nome': f'Serviço de exemplo {i + 1}', 'descricao': DESCRICOES[i % len(DESCRICOES)]},
+            'quantidade': 1 + i % 3,
+            'valor_unitario': valor,
+            'valor_total': valor * (1 + i % 3),
+        })
+    subtotal = sum(item['valor_total'] for item in itens)
+    return {
+        # Data fixa: o HTML (e o PDF) do cenário não muda de um dia para o outro
+        'data_atual': '01/01/2025',
+        'cliente': {'nome': 'Cliente Benchmark LTDA'},
+        'proposta': {'valor_total': subtotal},
+        'itens': itens,
+        'subtotal': subtotal,
+        'valor_vista': subtotal * 0.9,
+    }
+
+
+def _rss_pico_kb():
+    """Pico de RSS do processo atual em KB (None onde `resource` não existe)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS informa em bytes, Linux em KB
+    return pico // 1024 if sys.platform == 'darwin' else pico
+
+
+def _executar_cenario(quantidade_itens: int, repeticoes: int, fila, otimizar=None):
+    """Roda em processo separado: renderiza o cenário e devolve as métricas"""
+    try:
+        from services.pdf_generator import pdf_generator, renderizar_pdf, relatorio_tamanho
+
+        html_content = pdf_generator.renderizar_html(dados_sinteticos(quantidade_itens))
+        base_url = os.path.abspath(pdf_generator.upload_dir)
+        tempos = []
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = os.path.join(diretorio, 'benchmark.pdf')
+            # Primeira renderização aquece o contexto (CSS, fontes) e não entra na medição
+            renderizar_pdf(html_content, caminho, base_url, otimizar)
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                renderizar_pdf(html_content, caminho, base_url, otimizar)
+                tempos.append(time.perf_counter() - inicio)
+            tamanho = relatorio_tamanho(caminho)
+
+        fila.put({
+            'tempo_s': round(statistics.median(tempos), 4),
+            'rss_pico_kb': _rss_pico_kb(),
+            'tamanho_bytes': tamanho['tamanho_bytes'],
+            'dentro_orcamento': tamanho['dentro_orcamento'],
+        })
+    except Exception as e:
+        fila.put({'erro': f'{type(e).__name__}: {e}'})
+
+
+def medir(quantidade_itens: int, repeticoes: int, otimizar=None) -> dict:
+    fila = multiprocessing.Queue()
+    processo = multiprocessing.Process(
+        target=_executar_cenario, args=(quantidade_itens, repeticoes, fila, otimizar)
+    )
+    processo.start()
+    resultado = fila.get()
+    processo.join()
+    return resultado
+
+
+def comparar(resultados: dict, baseline: dict, tolerancia: float) -> list:
+    """Lista as regressões (métrica acima de baseline * (1 + tolerância))"""
+    regressoes = []
+    for cenario, metricas in resultados.items():
+        referencia = baseline.get(cenario)
+        if not referencia or 'erro' in metricas:
+            continue
+        for metrica in METRICAS:
+            atual, anterior = metricas.get(metrica), referencia.get(metrica)
+            if atual is None or not anterior:
+                continue
+            if atual > anterior * (1 + tolerancia):
+                regressoes.append(
+                    f'{cenario} itens: {metrica} {atual} > {anterior} (+{(atual / anterior - 1) * 100:.0f}%)'
+                )
+    return regressoes
+
+
+def imprimir_antes_depois(antes: dict, depois: dict):
+    """Tabela de tamanho e tempo sem x com a otimização de saída"""
+    print(f"\n{'itens':>6} {'antes (B)':>11} {'depois (B)':>11} {'redução':>8} "
+          f"{'antes (s)':>10} {'depois (s)':>10}")
+    for cenario, sem in antes.items():
+        com = depois.get(cenario, {})
+        if 'erro' in sem or 'erro' in com:
+            continue
+        reducao = 1 - com['tamanho_bytes'] / sem['tamanho_bytes']
+        print(f"{cenario:>6} {sem['tamanho_bytes']:>11} {com['tamanho_bytes']:>11} {reducao:>8.1%} "
+              f"{sem['tempo_s']:>10.3f} {com['tempo_s']:>10.3f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark da renderização de PDFs de propostas')
+    parser.add_argument('--baseline', default=BASELINE_PADRAO, help='arquivo JSON da baseline')
+    parser.add_argument('--salvar-baseline', action='store_true', help='grava os resultados como nova baseline')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='regressão aceita (0.25 = 25%%)')
+    parser.add_argument('--repeticoes', type=int, default=3, help='renderizações medidas por cenário')
+    parser.add_argument('--cenarios', type=int, nargs='+', default=list(CENARIOS), help='quantidades de itens')
+    parser.add_argument('--antes-depois', action='store_true',
+                        help='compara com a renderização sem otimização de saída')
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    print(f"{'itens':>6} {'tempo (s)':>10} {'RSS pico (KB)':>14} {'tamanho (B)':>12} {'orçamento':>10}")
+    for quantidade in args.cenarios:
+        metricas = medir(quantidade, args.repeticoes)
+        resultados[str(quantidade)] = metricas
+        if 'erro' in metricas:
+            print(f"{quantidade:>6} erro: {metricas['erro']}")
+        else:
+            print(f"{quantidade:>6} {metricas['tempo_s']:>10.3f} {str(metricas['rss_pico_kb']):>14} "
+                  f"{metricas['tamanho_bytes']:>12} {'ok' if metricas['dentro_orcamento'] else 'ACIMA':>10}")
+
+    if any('erro' in metricas for metricas in resultados.values()):
+        return 1
+
+    if args.antes_depois:
+        sem_otimizacao = {str(q): medir(q, args.repeticoes, otimizar=False) for q in args.cenarios}
+        imprimir_antes_depois(sem_otimizacao, resultados)
+
+    if args.salvar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"Baseline gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ Sem baseline em {args.baseline}: nada foi comparado. "
+              f"Rode com --salvar-baseline nesta máquina para criar uma.", file=sys.stderr)
+        return 2
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    sem_referencia = [cenario for cenario in resultados if cenario not in baseline]
+    if sem_referencia:
+        print(f"⚠️ Cenários sem baseline (não comparados): {', '.join(sem_referencia)}", file=sys.stderr)
+    regressoes = comparar(resultados, baseline, args.tolerancia)
+    for regressao in regressoes:
+        print(f"❌ Regressão: {regressao}")
+    if not regressoes:
+        print(f"✅ Dentro da baseline (tolerância {args.tolerancia:.0%})")
+    return 1 if regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
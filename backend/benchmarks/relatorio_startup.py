@@ -0,0 +1,105 @@
+"""
+Relatório de tempo de inicialização da API.
+
+Executa `create_app()` em um processo novo com `python -X importtime` e
+mostra o tempo total, os módulos de topo mais caros (tempo acumulado) e se
+o motor de PDF (weasyprint) foi importado durante a inicialização, o que não
+deve acontecer desde que ele passou a ser carregado sob demanda.
+
+Uso (a partir de backend/):
+
+    python benchmarks/relatorio_startup.py
+    python benchmarks/relatorio_startup.py --top 30 --json relatorio.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executado no processo filho: mede create_app() e informa o que ficou carregado
+_SCRIPT_FILHO = """
+import json, sys, time
+inicio = time.perf_counter()
+from config import create_app
+app = create_app()
+fim = time.perf_counter()
+print(json.dumps({
+    'create_app_s': round(fim - inicio, 4),
+    'weasyprint_carregado': 'weasyprint' in sys.modules,
+    'modulos_carregados': len(sys.modules),
+}))
+"""
+
+MOTOR_PDF = ('weasyprint', 'fontTools', 'PIL', 'pydyf', 'reportlab', 'services.pdf_generator')
+
+
+def _parse_importtime(stderr: str) -> list:
+    """Converte as linhas de `-X importtime` em (modulo, self_us, acumulado_us, profundidade)"""
+    linhas = []
+    for linha in stderr.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        try:
+            _, valores = linha.split(':', 1)
+            proprio, acumulado, nome = valores.split('|')
+        except ValueError:
+            continue
+        profundidade = (len(nome) - len(nome.lstrip(' '))) // 2
+        linhas.append((nome.strip(), int(proprio), int(acumulado), profundidade))
+    return linhas
+
+
+def gerar_relatorio() -> dict:
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _SCRIPT_FILHO],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(f'create_app() falhou:\n{processo.stderr[-2000:]}')
+
+    resumo = json.loads(processo.stdout.strip().splitlines()[-1])
+    imports = _parse_importtime(processo.stderr)
+    # Profundidade 0 = imports de topo; o acumulado deles soma o custo de cada árvore
+    topo = sorted((i for i in imports if i[3] == 0), key=lambda i: i[2], reverse=True)
+    motor_pdf = [i for i in imports if i[0].split('.')[0] in MOTOR_PDF or i[0] in MOTOR_PDF]
+
+    return {
+        **resumo,
+        'imports_total_s': round(sum(i[2] for i in topo) / 1e6, 4),
+        'mais_caros': [{'modulo': nome, 'acumulado_ms': round(acumulado / 1000, 1)}
+                       for nome, _, acumulado, _ in topo],
+        'motor_pdf_ms': round(sum(i[1] for i in motor_pdf) / 1000, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Tempo de inicialização da API (create_app)')
+    parser.add_argument('--top', type=int, default=20, help='quantidade de módulos listados')
+    parser.add_argument('--json', help='grava o relatório completo neste arquivo')
+    args = parser.parse_args(argv)
+
+    relatorio = gerar_relatorio()
+
+    print(f"create_app():            {relatorio['create_app_s']:.3f} s")
+    print(f"imports (acumulado):     {relatorio['imports_total_s']:.3f} s")
+    print(f"módulos carregados:      {relatorio['modulos_carregados']}")
+    print(f"motor de PDF carregado:  {'sim' if relatorio['weasyprint_carregado'] else 'não'} "
+          f"({relatorio['motor_pdf_ms']} ms em imports do motor)")
+    print("\nMódulos de topo mais caros:")
+    for item in relatorio['mais_caros'][:args.top]:
+        print(f"  {item['acumulado_ms']:>9.1f} ms  {item['modulo']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+    # Falha se o motor de PDF voltar a ser importado na inicialização
+    return 1 if relatorio['weasyprint_carregado'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
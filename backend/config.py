@@ -23,11 +23,14 @@ def create_app():
     }
     app.config['JSON_SORT_KEYS'] = False
     app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
+    # Downloads de PDF via X-Sendfile quando há um servidor web na frente (Apache mod_xsendfile, lighttpd)
+    app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
     app.config["JWT_SECRET_KEY"] = "troque-por-uma-chave-muito-segura"
     
-    # Configurações JWT simplificadas
-    app.config["JWT_BLACKLIST_ENABLED"] = False
+    # Configurações JWT simplificadas (revogação: token_in_blocklist_loader abaixo)
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = False  # Tokens não expiram para desenvolvimento
+    # Nome do parâmetro aceito em ?token= pelas rotas que liberam a query string (SSE)
+    app.config["JWT_QUERY_STRING_NAME"] = "token"
 
     # Extensões
     db.init_app(app)
@@ -35,6 +38,12 @@ def create_app():
 
     jwt.init_app(app)
 
+    # Tokens revogados (logout, funcionário desativado): consulta ao estado em memória
+    @jwt.token_in_blocklist_loader
+    def token_revogado(jwt_header, jwt_payload):
+        from models.revogacoes import revogacoes
+        return revogacoes.token_revogado(jwt_payload)
+
     # 🌐 Configuração CORS para rede local
     CORS(
         app,
@@ -46,10 +55,12 @@ def create_app():
             "http://192.168.1.*:5173",  # Qualquer IP na rede 192.168.1.x
             "http://10.0.0.*:5173",     # Qualquer IP na rede 10.0.0.x
         ],
-        allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With"],
+        allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With", "If-None-Match",
+                       "If-Modified-Since", "If-Range", "Range"],
         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         supports_credentials=True,
-        expose_headers=["Content-Type", "Authorization"],
+        expose_headers=["Content-Type", "Authorization", "ETag", "Last-Modified", "Accept-Ranges",
+                        "Content-Range", "Content-Length", "Content-Disposition"],
         max_age=86400
     )
     
@@ -80,7 +91,7 @@ def create_app():
                 response.headers["Access-Control-Allow-Origin"] = "*"
                 
             response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
-            response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, Accept, Origin, X-Requested-With"
+            response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, Accept, Origin, X-Requested-With, If-None-Match, If-Modified-Since, If-Range, Range"
             response.headers["Access-Control-Allow-Credentials"] = "true"
             response.headers["Access-Control-Max-Age"] = "86400"
             
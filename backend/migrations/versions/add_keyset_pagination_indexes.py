@@ -0,0 +1,29 @@
+"""Add composite indexes for keyset (cursor) pagination
+
+Revision ID: add_keyset_pagination_indexes
+Revises: add_deleted_at_notificacao
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_keyset_pagination_indexes'
+down_revision = 'add_deleted_at_notificacao'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create indexes matching the cursor keys of each list endpoint"""
+    op.create_index('ix_proposta_ativo_created_at_id', 'proposta', ['ativo', 'created_at', 'id'], unique=False)
+    op.create_index('ix_cliente_nome_id', 'cliente', ['nome', 'id'], unique=False)
+    op.create_index('ix_notificacao_para_funcionario_created_at', 'notificacao', ['para_funcionario_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    """Drop cursor pagination indexes"""
+    op.drop_index('ix_notificacao_para_funcionario_created_at', table_name='notificacao')
+    op.drop_index('ix_cliente_nome_id', table_name='cliente')
+    op.drop_index('ix_proposta_ativo_created_at_id', table_name='proposta')
@@ -0,0 +1,28 @@
+"""Add covering index for the unread notification counters
+
+Revision ID: add_notificacao_contador_index
+Revises: create_sequencia_table
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_notificacao_contador_index'
+down_revision = 'create_sequencia_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create index covering the grouped unread count (filters + tipo)"""
+    op.create_index(
+        'ix_notificacao_contador', 'notificacao',
+        ['para_funcionario_id', 'lida', 'ativo', 'deleted_at', 'tipo'], unique=False
+    )
+
+
+def downgrade():
+    """Drop unread counter index"""
+    op.drop_index('ix_notificacao_contador', table_name='notificacao')
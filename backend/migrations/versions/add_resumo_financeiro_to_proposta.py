@@ -0,0 +1,40 @@
+"""add resumo financeiro columns to proposta
+
+Revision ID: add_resumo_financeiro_proposta
+Revises: add_keyset_pagination_indexes
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_resumo_financeiro_proposta'
+down_revision = 'add_keyset_pagination_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Resumo financeiro persistido (preenchido no flush; propostas antigas: backfill_resumo_financeiro_proposta)
+    with op.batch_alter_table('proposta', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('valor_servicos', sa.Numeric(precision=15, scale=2), nullable=True))
+        batch_op.add_column(sa.Column('taxa_abertura', sa.Numeric(precision=15, scale=2), nullable=True))
+        batch_op.add_column(sa.Column('valor_base', sa.Numeric(precision=15, scale=2), nullable=True))
+        batch_op.add_column(sa.Column('desconto_valor', sa.Numeric(precision=15, scale=2), nullable=True))
+        batch_op.add_column(sa.Column('desconto_percentual', sa.Numeric(precision=7, scale=2), nullable=True))
+        batch_op.create_index('ix_proposta_valor_base', ['valor_base'], unique=False)
+        batch_op.create_index('ix_proposta_desconto_percentual', ['desconto_percentual'], unique=False)
+
+
+def downgrade():
+    # Remover colunas do resumo financeiro
+    with op.batch_alter_table('proposta', schema=None) as batch_op:
+        batch_op.drop_index('ix_proposta_desconto_percentual')
+        batch_op.drop_index('ix_proposta_valor_base')
+        batch_op.drop_column('desconto_percentual')
+        batch_op.drop_column('desconto_valor')
+        batch_op.drop_column('valor_base')
+        batch_op.drop_column('taxa_abertura')
+        batch_op.drop_column('valor_servicos')
@@ -0,0 +1,72 @@
+"""backfill resumo financeiro of existing propostas
+
+Revision ID: backfill_resumo_financeiro_proposta
+Revises: create_busca_fts_tables
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from decimal import Decimal
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'backfill_resumo_financeiro_proposta'
+down_revision = 'create_busca_fts_tables'
+branch_labels = None
+depends_on = None
+
+
+def _decimal(valor):
+    return Decimal(str(valor or 0)).quantize(Decimal('0.01'))
+
+
+def _taxa_abertura(cliente_abertura, regime_codigo):
+    # Regra de PropostaService.calcular_taxa_abertura_empresa na data desta migração
+    if not cliente_abertura:
+        return Decimal('0.00')
+    return Decimal('300.00') if (regime_codigo or '').upper() == 'MEI' else Decimal('1000.00')
+
+
+def upgrade():
+    # Propostas criadas antes do resumo persistido: calcula e grava uma vez, aqui (as leituras não gravam)
+    conn = op.get_bind()
+    propostas = conn.execute(sa.text(
+        "SELECT p.id, p.valor_total, c.abertura_empresa, r.codigo, "
+        "(SELECT COALESCE(SUM(i.valor_total), 0) FROM item_proposta i "
+        " WHERE i.proposta_id = p.id AND i.ativo = :ativo) AS valor_servicos "
+        "FROM proposta p "
+        "LEFT JOIN cliente c ON c.id = p.cliente_id "
+        "LEFT JOIN regime_tributario r ON r.id = p.regime_tributario_id "
+        "WHERE p.valor_base IS NULL"
+    ), {'ativo': True}).fetchall()
+
+    for proposta_id, valor_total, abertura, codigo, valor_servicos in propostas:
+        valor_servicos = _decimal(valor_servicos)
+        taxa_abertura = _taxa_abertura(abertura, codigo)
+        valor_base = valor_servicos + taxa_abertura
+        desconto_valor = valor_base - _decimal(valor_total)
+        desconto_percentual = (
+            (desconto_valor / valor_base * 100).quantize(Decimal('0.01')) if valor_base > 0 else Decimal('0.00')
+        )
+        conn.execute(
+            sa.text(
+                "UPDATE proposta SET valor_servicos = :valor_servicos, taxa_abertura = :taxa_abertura, "
+                "valor_base = :valor_base, desconto_valor = :desconto_valor, "
+                "desconto_percentual = :desconto_percentual WHERE id = :id"
+            ),
+            {
+                'id': proposta_id,
+                'valor_servicos': str(valor_servicos),
+                'taxa_abertura': str(taxa_abertura),
+                'valor_base': str(valor_base),
+                'desconto_valor': str(desconto_valor),
+                'desconto_percentual': str(desconto_percentual),
+            }
+        )
+
+
+def downgrade():
+    # Os valores calculados são dados válidos; nada a desfazer
+    pass
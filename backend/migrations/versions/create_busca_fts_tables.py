@@ -0,0 +1,91 @@
+"""create FTS5 search tables for proposta and cliente
+
+Revision ID: create_busca_fts_tables
+Revises: create_referencia_versao_table
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy.exc import OperationalError
+
+
+# revision identifiers, used by Alembic.
+revision = 'create_busca_fts_tables'
+down_revision = 'create_referencia_versao_table'
+branch_labels = None
+depends_on = None
+
+TOKENIZADOR = "unicode61 remove_diacritics 2"
+
+# Tabela de origem -> colunas do índice (nome no índice -> expressão SQL)
+INDICES = {
+    'proposta': {
+        'numero': 'numero',
+        'observacoes': 'observacoes',
+    },
+    'cliente': {
+        'nome': 'nome',
+        'cpf': 'cpf',
+        'email': 'email',
+        'cpf_digitos': "replace(replace(replace({alias}.cpf, '.', ''), '-', ''), '/', '')",
+    },
+}
+
+
+def _expressoes(tabela, alias):
+    colunas = INDICES[tabela]
+    nomes = ', '.join(colunas.keys())
+    valores = ', '.join(
+        expr.format(alias=alias) if '{alias}' in expr else f'{alias}.{expr}'
+        for expr in colunas.values()
+    )
+    return nomes, valores
+
+
+def upgrade():
+    # Só SQLite tem FTS5; nos demais bancos a busca continua com ilike
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for tabela in INDICES:
+        fts = f'{tabela}_fts'
+        nomes, valores_new = _expressoes(tabela, 'new')
+        _, valores_origem = _expressoes(tabela, tabela)
+        try:
+            op.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({nomes}, tokenize = '{TOKENIZADOR}')")
+        except OperationalError as e:
+            if 'no such module: fts5' not in str(e):
+                raise
+            # SQLite compilado sem FTS5: a aplicação detecta a ausência e usa ilike
+            return
+
+        # Triggers mantêm o índice em sincronia com a tabela de origem
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabela} BEGIN "
+            f"INSERT INTO {fts}(rowid, {nomes}) VALUES (new.id, {valores_new}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabela} BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = old.id; END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {tabela} BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = old.id; "
+            f"INSERT INTO {fts}(rowid, {nomes}) VALUES (new.id, {valores_new}); END"
+        )
+
+        # Popular com as linhas existentes
+        op.execute(f"DELETE FROM {fts}")
+        op.execute(f"INSERT INTO {fts}(rowid, {nomes}) SELECT {tabela}.id, {valores_origem} FROM {tabela}")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    # Remover triggers e índices
+    for tabela in INDICES:
+        fts = f'{tabela}_fts'
+        for sufixo in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {fts}_{sufixo}")
+        op.execute(f"DROP TABLE IF EXISTS {fts}")
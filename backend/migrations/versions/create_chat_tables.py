@@ -0,0 +1,56 @@
+"""create chat tables
+
+Revision ID: create_chat_tables
+Revises: add_notificacao_contador_index
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'create_chat_tables'
+down_revision = 'add_notificacao_contador_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sessões de chat: uma linha por (funcionário, sessão), com o resumo da listagem
+    op.create_table('chat_sessao',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('funcionario_id', sa.Integer(), nullable=False),
+        sa.Column('sessao_id', sa.String(length=100), nullable=False),
+        sa.Column('ultima_mensagem', sa.Text(), nullable=True),
+        sa.Column('ultima_mensagem_em', sa.DateTime(), nullable=False),
+        sa.Column('ultima_mensagem_id', sa.Integer(), nullable=True),
+        sa.Column('total_mensagens', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['funcionario_id'], ['funcionario.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('funcionario_id', 'sessao_id', name='uq_chat_sessao_funcionario_sessao')
+    )
+    op.create_index('ix_chat_sessao_funcionario_ultima', 'chat_sessao',
+                    ['funcionario_id', 'ultima_mensagem_em'], unique=False)
+
+    # Mensagens: lidas sempre pelo fim do índice (sessão, id)
+    op.create_table('chat_mensagem',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sessao_pk', sa.Integer(), nullable=False),
+        sa.Column('uuid', sa.String(length=36), nullable=False),
+        sa.Column('remetente', sa.String(length=10), nullable=False),
+        sa.Column('mensagem', sa.Text(), nullable=False),
+        sa.Column('criado_em', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['sessao_pk'], ['chat_sessao.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('uuid')
+    )
+    op.create_index('ix_chat_mensagem_sessao_id', 'chat_mensagem', ['sessao_pk', 'id'], unique=False)
+
+
+def downgrade():
+    # Remover tabelas do chat
+    op.drop_index('ix_chat_mensagem_sessao_id', table_name='chat_mensagem')
+    op.drop_table('chat_mensagem')
+    op.drop_index('ix_chat_sessao_funcionario_ultima', table_name='chat_sessao')
+    op.drop_table('chat_sessao')
@@ -0,0 +1,37 @@
+"""create referencia_versao table
+
+Revision ID: create_referencia_versao_table
+Revises: create_token_revogacao_table
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'create_referencia_versao_table'
+down_revision = 'create_token_revogacao_table'
+branch_labels = None
+depends_on = None
+
+TABELAS_REFERENCIA = (
+    'atividade_regime', 'faixa_faturamento', 'mensalidade_automatica', 'regime_tributario',
+    'servico', 'servico_regime', 'tipo_atividade'
+)
+
+
+def upgrade():
+    # Uma linha por tabela de referência; a versão sobe a cada gravação nela
+    # e os workers comparam as versões para saber se o cache em memória vale
+    tabela = op.create_table('referencia_versao',
+        sa.Column('tabela', sa.String(length=50), nullable=False),
+        sa.Column('versao', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('tabela')
+    )
+    op.bulk_insert(tabela, [{'tabela': nome, 'versao': 1} for nome in TABELAS_REFERENCIA])
+
+
+def downgrade():
+    # Remover tabela de versões
+    op.drop_table('referencia_versao')
@@ -0,0 +1,31 @@
+"""create sequencia table
+
+Revision ID: create_sequencia_table
+Revises: add_resumo_financeiro_proposta
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'create_sequencia_table'
+down_revision = 'add_resumo_financeiro_proposta'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sequências nomeadas usadas pelo alocador de números (propostas, cargos, serviços).
+    # As linhas são criadas sob demanda, semeadas com o maior número já existente.
+    op.create_table('sequencia',
+        sa.Column('nome', sa.String(length=50), nullable=False),
+        sa.Column('proximo_valor', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('nome')
+    )
+
+
+def downgrade():
+    # Remover tabela de sequências
+    op.drop_table('sequencia')
@@ -0,0 +1,38 @@
+"""create token_revogacao table
+
+Revision ID: create_token_revogacao_table
+Revises: create_chat_tables
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'create_token_revogacao_table'
+down_revision = 'create_chat_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Registro só de inserção: jti revogado (logout) ou corte por funcionário.
+    # Os workers leem as linhas novas pelo id (WHERE id > último lido).
+    op.create_table('token_revogacao',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('jti', sa.String(length=36), nullable=True),
+        sa.Column('funcionario_id', sa.Integer(), nullable=True),
+        sa.Column('revogar_antes_de', sa.Integer(), nullable=True),
+        sa.Column('expira_em', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('jti')
+    )
+    op.create_index(op.f('ix_token_revogacao_funcionario_id'), 'token_revogacao', ['funcionario_id'], unique=False)
+
+
+def downgrade():
+    # Remover tabela de revogações
+    op.drop_index(op.f('ix_token_revogacao_funcionario_id'), table_name='token_revogacao')
+    op.drop_table('token_revogacao')
@@ -34,6 +34,31 @@ from .servicos import Servico
 from .propostas import Proposta, ItemProposta, PropostaLog
 from .notificacoes import Notificacao
 
+# =====================================================
+# IMPORTS DOS MODELOS DO CHAT
+# =====================================================
+from .chat import ChatSessao, ChatMensagem
+
+# =====================================================
+# IMPORTS DA REVOGAÇÃO DE TOKENS
+# =====================================================
+from .revogacoes import TokenRevogacao, revogacoes, revogar_token, revogar_tokens_funcionario
+
+# =====================================================
+# IMPORTS DO CACHE DE DADOS DE REFERÊNCIA
+# =====================================================
+from .referencias import ReferenciaVersao, referencias
+
+# =====================================================
+# IMPORTS DA BUSCA TEXTUAL (índices FTS5 criados com as tabelas)
+# =====================================================
+from .busca import filtrar_busca_textual
+
+# =====================================================
+# IMPORTS DO ALOCADOR DE SEQUÊNCIAS
+# =====================================================
+from .sequencias import Sequencia, proximo_valor, maior_sufixo_numerico
+
 # =====================================================
 # IMPORTS DOS SERVIÇOS
 # =====================================================
@@ -86,6 +111,25 @@ __all__ = [
     'ItemProposta',
     'PropostaLog',
     
+    # Chat
+    'ChatSessao',
+    'ChatMensagem',
+    
+    # Revogação de tokens
+    'TokenRevogacao',
+    'revogacoes',
+    'revogar_token',
+    'revogar_tokens_funcionario',
+    
+    # Dados de referência
+    'ReferenciaVersao',
+    'referencias',
+    
+    # Sequências
+    'Sequencia',
+    'proximo_valor',
+    'maior_sufixo_numerico',
+    
     # Serviços
     'PropostaService',
     
@@ -0,0 +1,265 @@
+"""
+Índice de busca textual (SQLite FTS5) para propostas e clientes.
+
+As tabelas virtuais e os triggers que as mantêm em sincronia são criados pela
+migração `create_busca_fts_tables` ou, em bancos criados com `db.create_all()`,
+junto com as demais tabelas (evento `after_create` do metadata). A busca nunca
+cria nada: se os índices não existem ou o SQLite não tem FTS5, as views usam
+`ilike`.
+
+O índice de palavras (`<tabela>_fts`) usa o tokenizador `unicode61` com
+`remove_diacritics 2`: a busca é insensível a acentos ("joao" encontra
+"João") e casa do início de cada palavra. Os campos em que se digita um trecho
+do meio (número da proposta, CPF) têm um segundo índice (`<tabela>_trecho`)
+com o tokenizador `trigram`, que casa qualquer trecho de 3 ou mais
+caracteres. As duas buscas são resolvidas pelos índices, sem varrer a tabela.
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import event, text, Integer, Float
+from sqlalchemy.exc import OperationalError
+
+from config import db
+
+
+# CPF só com dígitos, para buscas digitadas sem pontuação
+_CPF_DIGITOS = "replace(replace(replace({alias}.cpf, '.', ''), '-', ''), '/', '')"
+
+# Definição dos índices: tabela de origem -> colunas indexadas (nome no índice -> expressão SQL)
+INDICES_BUSCA = {
+    'proposta': {
+        'numero': 'numero',
+        'observacoes': 'observacoes',
+    },
+    'cliente': {
+        'nome': 'nome',
+        'cpf': 'cpf',
+        'email': 'email',
+        'cpf_digitos': _CPF_DIGITOS,
+    },
+}
+
+# Campos buscados por trecho (índice trigram)
+INDICES_TRECHO = {
+    'proposta': {
+        'numero': 'numero',
+    },
+    'cliente': {
+        'cpf': 'cpf',
+        'cpf_digitos': _CPF_DIGITOS,
+    },
+}
+
+# Sufixo da tabela virtual -> (colunas por tabela de origem, tokenizador)
+INDICES = {
+    'fts': (INDICES_BUSCA, "unicode61 remove_diacritics 2"),
+    'trecho': (INDICES_TRECHO, "trigram"),
+}
+
+# O tokenizador trigram não casa trechos menores que isso
+_TAMANHO_MINIMO_TRECHO = 3
+
+# Mensagem do SQLite compilado sem FTS5: único erro que desliga a busca de vez
+_SEM_FTS5 = 'no such module: fts5'
+
+# Índices ausentes (migrações ainda não aplicadas): intervalo até verificar de novo
+BUSCA_VERIFICACAO_SEGUNDOS = float(os.getenv('BUSCA_VERIFICACAO_SEGUNDOS', '60'))
+
+# `expira_em` None: resultado definitivo para o processo
+_estado = {'disponivel': None, 'expira_em': None}
+_lock = threading.Lock()
+
+
+def _expressoes(colunas: dict, alias: str):
+    nomes = ', '.join(colunas.keys())
+    valores = ', '.join(
+        expr.format(alias=alias) if '{alias}' in expr else f'{alias}.{expr}'
+        for expr in colunas.values()
+    )
+    return nomes, valores
+
+
+def _criar_indice(conn, tabela: str, sufixo: str):
+    """Cria a tabela FTS5 e os triggers de sincronia; popula na primeira criação"""
+    colunas, tokenizador = INDICES[sufixo]
+    fts = f'{tabela}_{sufixo}'
+    existe = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nome"),
+        {'nome': fts}
+    ).first()
+    nomes, valores_new = _expressoes(colunas[tabela], 'new')
+    _, valores_origem = _expressoes(colunas[tabela], tabela)
+
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({nomes}, tokenize = '{tokenizador}')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabela} BEGIN "
+        f"INSERT INTO {fts}(rowid, {nomes}) VALUES (new.id, {valores_new}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabela} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = old.id; END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {tabela} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = old.id; "
+        f"INSERT INTO {fts}(rowid, {nomes}) VALUES (new.id, {valores_new}); END"
+    ))
+    if not existe:
+        conn.execute(text(
+            f"INSERT INTO {fts}(rowid, {nomes}) SELECT {tabela}.id, {valores_origem} FROM {tabela}"
+        ))
+
+
+@event.listens_for(db.metadata, 'after_create')
+def criar_indices_busca(target, connection, **kw):
+    """`db.create_all()` em SQLite: cria também os índices FTS5"""
+    if connection.dialect.name != 'sqlite':
+        return
+    try:
+        with connection.begin_nested():
+            for sufixo, (colunas, _) in INDICES.items():
+                for tabela in colunas:
+                    _criar_indice(connection, tabela, sufixo)
+    except OperationalError as e:
+        if _SEM_FTS5 not in str(e) and 'no such tokenizer' not in str(e):
+            raise
+        current_app.logger.warning(f"SQLite sem suporte aos índices de busca ({e.orig}): a busca textual usará ilike")
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def remover_indices_busca(target, connection, **kw):
+    """`db.drop_all()`: remove os índices junto com as tabelas de origem"""
+    if connection.dialect.name != 'sqlite':
+        return
+    for sufixo, (colunas, _) in INDICES.items():
+        for tabela in colunas:
+            connection.execute(text(f"DROP TABLE IF EXISTS {tabela}_{sufixo}"))
+
+
+def busca_textual_disponivel() -> bool:
+    """
+    Verifica se os índices FTS5 existem e podem ser consultados.
+
+    Índices presentes e SQLite sem FTS5 são resultados definitivos, guardados
+    para o processo. Índices ausentes são verificados de novo a cada
+    BUSCA_VERIFICACAO_SEGUNDOS (as migrações podem rodar com a API no ar).
+    Outros erros (ex.: "database is locked") valem só para a requisição atual,
+    que usa `ilike`.
+    """
+    if _resultado_vigente():
+        return _estado['disponivel']
+
+    with _lock:
+        if _resultado_vigente():
+            return _estado['disponivel']
+
+        if db.engine.dialect.name != 'sqlite':
+            _guardar(False)
+            return False
+
+        try:
+            with db.engine.connect() as conn:
+                for sufixo, (colunas, _) in INDICES.items():
+                    for tabela in colunas:
+                        conn.execute(text(f"SELECT rowid FROM {tabela}_{sufixo} LIMIT 0"))
+            _guardar(True)
+        except OperationalError as e:
+            mensagem = str(e)
+            if _SEM_FTS5 in mensagem:
+                current_app.logger.warning("SQLite sem FTS5: a busca textual usará ilike")
+                _guardar(False)
+            elif 'no such table' in mensagem:
+                current_app.logger.warning(
+                    "Índices de busca FTS5 ausentes (rode as migrações): a busca textual usará ilike"
+                )
+                _guardar(False, BUSCA_VERIFICACAO_SEGUNDOS)
+            else:
+                current_app.logger.error(f"Falha ao verificar os índices de busca, usando ilike: {e}")
+                return False
+
+    return _estado['disponivel']
+
+
+def _resultado_vigente() -> bool:
+    return _estado['disponivel'] is not None and (
+        _estado['expira_em'] is None or time.monotonic() < _estado['expira_em']
+    )
+
+
+def _guardar(disponivel: bool, validade: Optional[float] = None):
+    _estado['disponivel'] = disponivel
+    _estado['expira_em'] = time.monotonic() + validade if validade is not None else None
+
+
+def montar_expressao_busca(termo: str) -> str:
+    """
+    Converte o texto digitado em uma expressão MATCH segura.
+
+    Cada palavra vira um prefixo entre aspas (`"joa"*`), combinadas com AND,
+    para que a busca funcione enquanto o usuário ainda está digitando.
+    """
+    tokens = re.findall(r'\w+', termo or '', re.UNICODE)
+    return ' '.join('"' + token.replace('"', '""') + '"*' for token in tokens)
+
+
+def montar_expressao_trecho(tabela: str, termo: str) -> str:
+    """
+    Expressão MATCH do índice trigram: o termo inteiro como trecho e, no
+    cliente, também só os dígitos (CPF digitado sem pontuação).
+    """
+    termo = (termo or '').strip()
+    trechos = [termo]
+    if tabela == 'cliente':
+        trechos.append(re.sub(r'\D', '', termo))
+    trechos = [t for t in dict.fromkeys(trechos) if len(t) >= _TAMANHO_MINIMO_TRECHO]
+    return ' OR '.join('"' + trecho.replace('"', '""') + '"' for trecho in trechos)
+
+
+def filtrar_busca_textual(query, model, termo: str):
+    """
+    Restringe `query` aos registros que casam com `termo` no índice de
+    palavras ou, por trecho, no índice trigram (número da proposta, CPF).
+
+    Retorna `(query, relevancia)`, onde `relevancia` é a coluna bm25 (menor é
+    melhor; casamentos só por trecho vêm depois) para ordenação, ou None
+    quando o índice não está disponível e a view deve usar o filtro `ilike`.
+    """
+    tabela = model.__tablename__
+    if tabela not in INDICES_BUSCA or not busca_textual_disponivel():
+        return None
+
+    consultas, parametros = [], {}
+    expressao = montar_expressao_busca(termo)
+    if expressao:
+        consultas.append(
+            f"SELECT rowid AS id, bm25({tabela}_fts) AS relevancia FROM {tabela}_fts "
+            f"WHERE {tabela}_fts MATCH :expressao"
+        )
+        parametros['expressao'] = expressao
+    trecho = montar_expressao_trecho(tabela, termo) if tabela in INDICES_TRECHO else ''
+    if trecho:
+        # bm25 é negativo: casamentos só por trecho (0) ficam depois dos de palavra
+        consultas.append(
+            f"SELECT rowid AS id, 0.0 AS relevancia FROM {tabela}_trecho "
+            f"WHERE {tabela}_trecho MATCH :trecho"
+        )
+        parametros['trecho'] = trecho
+    if not consultas:
+        return None
+
+    resultados = (
+        text(f"SELECT id, min(relevancia) AS relevancia FROM ({' UNION ALL '.join(consultas)}) GROUP BY id")
+        .bindparams(**parametros)
+        .columns(id=Integer, relevancia=Float)
+        .subquery(f'{tabela}_busca')
+    )
+    query = query.join(resultados, resultados.c.id == model.id)
+    return query, resultados.c.relevancia
@@ -0,0 +1,57 @@
+"""
+Modelos do histórico do chat (sessões e mensagens).
+"""
+
+from datetime import datetime
+from config import db
+
+
+class ChatSessao(db.Model):
+    """Sessão de chat de um funcionário, com o resumo usado na listagem de sessões"""
+    __tablename__ = "chat_sessao"
+
+    id = db.Column(db.Integer, primary_key=True)
+    funcionario_id = db.Column(db.Integer, db.ForeignKey('funcionario.id'), nullable=False)
+    sessao_id = db.Column(db.String(100), nullable=False)
+    ultima_mensagem = db.Column(db.Text, nullable=True)
+    ultima_mensagem_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Id da última mensagem gravada: versão da sessão, comparada pelo cache dos workers
+    ultima_mensagem_id = db.Column(db.Integer, nullable=True)
+    total_mensagens = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('funcionario_id', 'sessao_id', name='uq_chat_sessao_funcionario_sessao'),
+        # Listagem das sessões do funcionário, da mais recente para a mais antiga
+        db.Index('ix_chat_sessao_funcionario_ultima', 'funcionario_id', 'ultima_mensagem_em'),
+    )
+
+    def __repr__(self):
+        return f'<ChatSessao {self.funcionario_id}/{self.sessao_id}>'
+
+    def to_json(self):
+        return {
+            'session_id': self.sessao_id,
+            'last_message': self.ultima_mensagem,
+            'last_timestamp': self.ultima_mensagem_em.isoformat() if self.ultima_mensagem_em else None,
+            'message_count': self.total_mensagens
+        }
+
+
+class ChatMensagem(db.Model):
+    """Mensagem de uma sessão de chat (do usuário ou do bot)"""
+    __tablename__ = "chat_mensagem"
+
+    id = db.Column(db.Integer, primary_key=True)
+    sessao_pk = db.Column(db.Integer, db.ForeignKey('chat_sessao.id', ondelete='CASCADE'), nullable=False)
+    uuid = db.Column(db.String(36), nullable=False, unique=True)
+    remetente = db.Column(db.String(10), nullable=False)  # 'user' ou 'bot'
+    mensagem = db.Column(db.Text, nullable=False)
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Últimas N mensagens da sessão: busca pelo fim do índice
+        db.Index('ix_chat_mensagem_sessao_id', 'sessao_pk', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<ChatMensagem {self.uuid}>'
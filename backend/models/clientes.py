@@ -23,6 +23,14 @@ class Cliente(db.Model, TimestampMixin, ActiveMixin):
     entidades_juridicas = db.relationship('EntidadeJuridica', backref='cliente', lazy=True, cascade="all, delete-orphan")
     propostas = db.relationship('Proposta', lazy=True)
     
+    __table_args__ = (
+        # Chave da paginação por cursor (nome, id) na listagem de clientes
+        db.Index('ix_cliente_nome_id', 'nome', 'id'),
+    )
+    
+    # Colunas retornadas com `view=summary` nas listagens
+    CAMPOS_RESUMO = ('id', 'nome', 'cpf', 'email', 'abertura_empresa', 'ativo')
+    
     def __repr__(self):
         return f'<Cliente {self.nome}>'
     
@@ -2,9 +2,27 @@
 Event listeners do SQLAlchemy para automatizar cálculos e validações.
 """
 
-from sqlalchemy import event
+from itertools import chain
+from sqlalchemy import event, inspect, or_
+from sqlalchemy.orm import Session, selectinload
 from config import db
 from .propostas import Proposta, ItemProposta
+from .clientes import Cliente
+from .tributario import RegimeTributario
+from .notificacoes import Notificacao, invalidar_contadores, registrar_destinatarios, CHAVE_DESTINATARIOS
+from .organizacional import Funcionario, invalidar_gerentes, invalidar_funcionarios
+from .revogacoes import revogar_tokens_funcionario, aplicar_revogacoes_pendentes, descartar_revogacoes_pendentes
+from .referencias import (
+    MODELOS_REFERENCIA, TABELAS_REFERENCIA, incrementar_versoes,
+    aplicar_referencias_alteradas, descartar_referencias_alteradas
+)
+from .services import PropostaService
+from services.eventos import publicar_apos_commit, publicar_pendentes, descartar_pendentes
+from services.chat_bot import invalidar_pendentes
+
+
+# Campos da proposta que alteram o resumo financeiro persistido
+CAMPOS_RESUMO_FINANCEIRO = ('valor_total', 'cliente_id', 'regime_tributario_id')
 
 
 @event.listens_for(ItemProposta, 'before_insert')
@@ -22,3 +40,152 @@ def atualizar_valor_total_proposta(mapper, connection, target):
         target.valor_total = sum(item.valor_total for item in target.itens if item.ativo)
     else:
         target.valor_total = 0
+
+
+@event.listens_for(Session, 'before_flush')
+def atualizar_resumo_financeiro_propostas(session, flush_context, instances):
+    """
+    Mantém o resumo financeiro (serviços, taxa, base, desconto) gravado na
+    proposta sempre que ela ou seus itens mudam, dentro do mesmo flush.
+
+    A taxa de abertura também depende do cliente (`abertura_empresa`) e do
+    regime (`codigo`): alterá-los recalcula todas as propostas que os usam.
+    """
+    propostas = {}
+    itens_pendentes = {}
+    clientes_alterados = set()
+    regimes_alterados = set()
+
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, Cliente):
+                if obj in session.dirty and inspect(obj).attrs.abertura_empresa.history.has_changes():
+                    clientes_alterados.add(obj.id)
+            elif isinstance(obj, RegimeTributario):
+                if obj in session.dirty and inspect(obj).attrs.codigo.history.has_changes():
+                    regimes_alterados.add(obj.id)
+            elif isinstance(obj, Proposta):
+                if obj in session.deleted:
+                    continue
+                estado = inspect(obj)
+                if (
+                    estado.pending
+                    or obj.valor_base is None
+                    or any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_RESUMO_FINANCEIRO)
+                ):
+                    propostas[id(obj)] = obj
+            elif isinstance(obj, ItemProposta):
+                proposta = obj.proposta or (
+                    session.get(Proposta, obj.proposta_id) if obj.proposta_id else None
+                )
+                if proposta is None or proposta in session.deleted:
+                    continue
+                propostas[id(proposta)] = proposta
+                if obj in session.new:
+                    itens_pendentes.setdefault(id(proposta), []).append(obj)
+
+        if clientes_alterados or regimes_alterados:
+            # Uma consulta para todas as propostas afetadas, já com os itens
+            afetadas = session.query(Proposta).options(selectinload(Proposta.itens)).filter(or_(
+                Proposta.cliente_id.in_(clientes_alterados),
+                Proposta.regime_tributario_id.in_(regimes_alterados)
+            )).all()
+            for proposta in afetadas:
+                if proposta not in session.deleted:
+                    propostas.setdefault(id(proposta), proposta)
+
+        for chave, proposta in propostas.items():
+            itens = [item for item in proposta.itens if item not in session.deleted]
+            for item in itens_pendentes.get(chave, []):
+                if item not in itens:
+                    itens.append(item)
+            PropostaService.atualizar_resumo_financeiro(proposta, itens)
+
+
+@event.listens_for(Session, 'before_flush')
+def revogar_tokens_funcionarios_desativados(session, flush_context, instances):
+    """Desativar ou excluir um funcionário revoga todos os tokens já emitidos para ele"""
+    for obj in chain(session.dirty, session.deleted):
+        if not isinstance(obj, Funcionario) or obj.id is None:
+            continue
+        if obj in session.deleted:
+            revogar_tokens_funcionario(obj.id, session)
+            continue
+        historico = inspect(obj).attrs.ativo.history
+        if historico.has_changes() and True in historico.deleted and not obj.ativo:
+            revogar_tokens_funcionario(obj.id, session)
+
+
+@event.listens_for(Session, 'after_flush')
+def registrar_notificacoes_alteradas(session, flush_context):
+    """
+    Guarda os destinatários das notificações gravadas até o commit e agenda
+    o envio das novas pelo canal de eventos (serializadas aqui, pois após o
+    commit a sessão não consulta mais o banco). Alterações em funcionários
+    marcam o cache de gerentes ativos e o resumo do funcionário para invalidação;
+    alterações em propostas, a contagem de pendentes do chat.
+    """
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Proposta):
+            session.info['propostas_alteradas'] = True
+        elif isinstance(obj, Funcionario):
+            session.info['gerentes_alterados'] = True
+            if obj.id is not None:
+                session.info.setdefault('funcionarios_alterados', set()).add(obj.id)
+        elif isinstance(obj, Notificacao) and obj.para_funcionario_id:
+            registrar_destinatarios(session, obj.para_funcionario_id)
+            if obj in session.new:
+                publicar_apos_commit(session, obj.para_funcionario_id, 'notificacao', obj.to_json())
+
+
+@event.listens_for(Session, 'after_flush')
+def versionar_referencias_alteradas(session, flush_context):
+    """Gravações nas tabelas de referência incrementam a versão delas na mesma transação"""
+    tabelas = {
+        obj.__tablename__ for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, MODELOS_REFERENCIA)
+    }
+    if tabelas:
+        incrementar_versoes(session, tabelas)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def versionar_referencias_em_lote(orm_execute_state):
+    """UPDATE/DELETE em lote (ex.: `query.delete()`) não passam pelo flush"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.local_table.name in TABELAS_REFERENCIA:
+        incrementar_versoes(orm_execute_state.session, [mapper.local_table.name])
+    elif mapper is not None and mapper.class_ is Proposta:
+        orm_execute_state.session.info['propostas_alteradas'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidar_contadores_notificacoes(session):
+    """Após o commit, os contadores em cache (e os caches de funcionários e de referência) deixam de valer"""
+    destinatarios = session.info.pop(CHAVE_DESTINATARIOS, None)
+    if destinatarios:
+        invalidar_contadores(*destinatarios)
+    if session.info.pop('gerentes_alterados', False):
+        invalidar_gerentes()
+    funcionarios = session.info.pop('funcionarios_alterados', None)
+    if funcionarios:
+        invalidar_funcionarios(*funcionarios)
+    if session.info.pop('propostas_alteradas', False):
+        invalidar_pendentes()
+    aplicar_revogacoes_pendentes(session)
+    aplicar_referencias_alteradas(session)
+    publicar_pendentes(session)
+
+
+@event.listens_for(Session, 'after_rollback')
+def descartar_notificacoes_alteradas(session):
+    """Nada foi gravado: os contadores continuam válidos e nenhum evento é enviado"""
+    session.info.pop(CHAVE_DESTINATARIOS, None)
+    session.info.pop('gerentes_alterados', None)
+    session.info.pop('funcionarios_alterados', None)
+    session.info.pop('propostas_alteradas', None)
+    descartar_revogacoes_pendentes(session)
+    descartar_referencias_alteradas(session)
+    descartar_pendentes(session)
@@ -2,11 +2,41 @@
 Modelo de notificações para o sistema de aprovação gerencial.
 """
 
+import os
+import threading
+import time
 from datetime import datetime
+from sqlalchemy import func, insert
 from config import db
+from services.eventos import publicar_apos_commit
 from .base import TimestampMixin, ActiveMixin
 
 
+# Validade dos contadores em cache. Neste processo eles são invalidados pelos
+# eventos de commit; o TTL limita a defasagem vista por outros workers.
+CONTADOR_TTL_SEGUNDOS = int(os.getenv('NOTIFICACAO_CONTADOR_TTL', '30'))
+
+_contadores = {}  # funcionario_id -> (expira_em, {'total': n, 'por_tipo': {...}})
+_contadores_lock = threading.Lock()
+
+# Chave em session.info com os destinatários alterados na transação atual
+CHAVE_DESTINATARIOS = 'notificacoes_destinatarios'
+
+
+def registrar_destinatarios(session, *funcionario_ids):
+    """Marca os contadores desses funcionários para invalidação no próximo commit"""
+    session.info.setdefault(CHAVE_DESTINATARIOS, set()).update(funcionario_ids)
+
+
+def invalidar_contadores(*funcionario_ids):
+    """Descarta os contadores em cache dos funcionários (todos, se nenhum for informado)"""
+    with _contadores_lock:
+        if not funcionario_ids:
+            _contadores.clear()
+        for funcionario_id in funcionario_ids:
+            _contadores.pop(funcionario_id, None)
+
+
 class Notificacao(db.Model, TimestampMixin, ActiveMixin):
     """Modelo para notificações do sistema"""
     
@@ -28,6 +58,16 @@ class Notificacao(db.Model, TimestampMixin, ActiveMixin):
     para_funcionario = db.relationship('Funcionario', foreign_keys=[para_funcionario_id], backref='notificacoes_recebidas')
     de_funcionario = db.relationship('Funcionario', foreign_keys=[de_funcionario_id], backref='notificacoes_enviadas')
     
+    __table_args__ = (
+        # Chave da paginação por cursor (created_at, id) das notificações de cada funcionário
+        db.Index('ix_notificacao_para_funcionario_created_at', 'para_funcionario_id', 'created_at', 'id'),
+        # Cobre o contador de não lidas: filtro por igualdade + tipo para o GROUP BY
+        db.Index('ix_notificacao_contador', 'para_funcionario_id', 'lida', 'ativo', 'deleted_at', 'tipo'),
+    )
+    
+    # Colunas retornadas com `view=summary` nas listagens
+    CAMPOS_RESUMO = ('id', 'tipo', 'titulo', 'proposta_id', 'lida', 'created_at')
+    
     @property
     def is_deleted(self):
         """Verifica se a notificação foi deletada (soft delete)"""
@@ -51,6 +91,76 @@ class Notificacao(db.Model, TimestampMixin, ActiveMixin):
             'ativo': self.ativo
         }
     
+    @classmethod
+    def contar_nao_lidas(cls, funcionario_id):
+        """
+        Não lidas do funcionário, no total e por tipo.
+        
+        Uma única consulta agrupada, resolvida pelo índice ix_notificacao_contador,
+        e o resultado fica em cache até a próxima alteração nas notificações
+        do funcionário (ver models/events.py) ou até o TTL.
+        """
+        agora = time.monotonic()
+        with _contadores_lock:
+            entrada = _contadores.get(funcionario_id)
+            if entrada and entrada[0] > agora:
+                return entrada[1]
+        
+        linhas = db.session.query(cls.tipo, func.count()).filter(
+            cls.para_funcionario_id == funcionario_id,
+            cls.lida == False,
+            cls.ativo == True,
+            cls.deleted_at.is_(None)
+        ).group_by(cls.tipo).all()
+        
+        por_tipo = {tipo: quantidade for tipo, quantidade in linhas}
+        contadores = {'total': sum(por_tipo.values()), 'por_tipo': por_tipo}
+        with _contadores_lock:
+            _contadores[funcionario_id] = (agora + CONTADOR_TTL_SEGUNDOS, contadores)
+        return contadores
+    
+    @classmethod
+    def _filtro_lote(cls, funcionario_id, ids=None):
+        filtros = [cls.para_funcionario_id == funcionario_id, cls.ativo == True]
+        if ids is not None:
+            filtros.append(cls.id.in_(ids))
+        return filtros
+    
+    @classmethod
+    def marcar_lidas_em_lote(cls, funcionario_id, ids=None):
+        """
+        Marca como lidas (e aplica o soft delete, como `marcar_como_lida`)
+        todas as não lidas do funcionário, ou só as de `ids`, em um único UPDATE.
+        
+        Não faz commit; retorna a quantidade de notificações alteradas.
+        """
+        agora = datetime.utcnow()
+        alteradas = db.session.query(cls).filter(
+            *cls._filtro_lote(funcionario_id, ids),
+            cls.lida == False,
+            cls.deleted_at.is_(None)
+        ).update({'lida': True, 'data_leitura': agora, 'deleted_at': agora}, synchronize_session=False)
+        
+        if alteradas:
+            registrar_destinatarios(db.session, funcionario_id)
+        return alteradas
+    
+    @classmethod
+    def excluir_em_lote(cls, funcionario_id, ids=None):
+        """
+        Soft delete (ativo = False) de todas as notificações do funcionário,
+        ou só das de `ids`, em um único UPDATE.
+        
+        Não faz commit; retorna a quantidade de notificações excluídas.
+        """
+        excluidas = db.session.query(cls).filter(
+            *cls._filtro_lote(funcionario_id, ids)
+        ).update({'ativo': False}, synchronize_session=False)
+        
+        if excluidas:
+            registrar_destinatarios(db.session, funcionario_id)
+        return excluidas
+    
     def marcar_como_lida(self):
         """Marca a notificação como lida e aplica soft delete"""
         self.lida = True
@@ -60,35 +170,46 @@ class Notificacao(db.Model, TimestampMixin, ActiveMixin):
     
     @classmethod
     def criar_notificacao_aprovacao(cls, proposta, de_funcionario_id=None, is_update=False):
-        """Cria notificação de aprovação para gerentes"""
+        """
+        Cria notificação de aprovação para gerentes.
+        
+        Os gerentes vêm do cache `Funcionario.ids_gerentes_ativos()` e todas as
+        notificações são gravadas com um único INSERT de várias linhas dentro
+        da transação do chamador, que faz o commit. A proposta já precisa ter
+        id (chame após o flush).
+        """
         from models.organizacional import Funcionario
         
-        # Buscar gerentes ativos
-        gerentes = Funcionario.query.filter_by(gerente=True, ativo=True).all()
+        if proposta.id is None:
+            raise ValueError('A proposta precisa ser gravada (flush) antes de notificar os gerentes')
         
         # Mensagem diferente para criação vs atualização
         acao = "atualizada" if is_update else "criada"
+        titulo = f'Aprovação Necessária - Proposta {proposta.numero}'
+        mensagem = f'Proposta {acao} com desconto de {proposta.percentual_desconto:.1f}% requer sua aprovação. Cliente: {proposta.cliente.nome if proposta.cliente else "N/A"}'
         
-        notificacoes_criadas = []
-        for gerente in gerentes:
-            # Não criar notificação para o próprio funcionário que criou a proposta
-            if de_funcionario_id and gerente.id == de_funcionario_id:
-                continue
-                
-            notificacao = cls(
-                tipo='APROVACAO_DESCONTO',
-                titulo=f'Aprovação Necessária - Proposta {proposta.numero}',
-                mensagem=f'Proposta {acao} com desconto de {proposta.percentual_desconto:.1f}% requer sua aprovação. Cliente: {proposta.cliente.nome if proposta.cliente else "N/A"}',
-                proposta_id=proposta.id,
-                para_funcionario_id=gerente.id,
-                de_funcionario_id=de_funcionario_id,
-                lida=False
-            )
-            
-            db.session.add(notificacao)
-            notificacoes_criadas.append(notificacao)
+        # Não criar notificação para o próprio funcionário que criou a proposta
+        linhas = [
+            {
+                'tipo': 'APROVACAO_DESCONTO',
+                'titulo': titulo,
+                'mensagem': mensagem,
+                'proposta_id': proposta.id,
+                'para_funcionario_id': gerente_id,
+                'de_funcionario_id': de_funcionario_id,
+                'lida': False
+            }
+            for gerente_id in Funcionario.ids_gerentes_ativos()
+            if gerente_id != de_funcionario_id
+        ]
+        if not linhas:
+            return []
         
-        db.session.commit()
+        # INSERT em lote não passa pelo flush: contadores e eventos são agendados aqui
+        notificacoes_criadas = db.session.scalars(insert(cls).returning(cls), linhas).all()
+        registrar_destinatarios(db.session, *(linha['para_funcionario_id'] for linha in linhas))
+        for notificacao in notificacoes_criadas:
+            publicar_apos_commit(db.session, notificacao.para_funcionario_id, 'notificacao', notificacao.to_json())
         return notificacoes_criadas
     
     @classmethod
@@ -97,8 +218,10 @@ class Notificacao(db.Model, TimestampMixin, ActiveMixin):
         if not proposta.funcionario_responsavel_id:
             return None
             
+        from models.organizacional import Funcionario
+        
         status = "APROVADA" if aprovada else "REJEITADA"
-        gerente = Funcionario.query.get(aprovada_por_id)
+        gerente = Funcionario.resumo_em_cache(aprovada_por_id)  # já resolvido pela view
         nome_gerente = gerente.nome if gerente else "Gerente"
         
         notificacao = cls(
@@ -111,6 +234,6 @@ class Notificacao(db.Model, TimestampMixin, ActiveMixin):
             lida=False
         )
         
+        # Gravada no commit de aprovar/rejeitar
         db.session.add(notificacao)
-        db.session.commit()
         return notificacao
@@ -3,12 +3,66 @@ Modelos relacionados à estrutura organizacional da empresa.
 Inclui empresa, cargos e funcionários.
 """
 
+import os
+import threading
+import time
 from datetime import datetime
 from config import db
 from werkzeug.security import generate_password_hash, check_password_hash
 from .base import TimestampMixin, ActiveMixin
 
 
+# Validade do cache de gerentes ativos. Neste processo ele é descartado a cada
+# commit que altera funcionários; o TTL limita a defasagem entre workers.
+GERENTES_CACHE_TTL = int(os.getenv('GERENTES_CACHE_TTL', '300'))
+
+_gerentes = {'expira_em': 0.0, 'ids': ()}
+_gerentes_lock = threading.Lock()
+
+
+def invalidar_gerentes():
+    """Descarta o cache de gerentes ativos"""
+    with _gerentes_lock:
+        _gerentes['expira_em'] = 0.0
+
+
+# Validade do resumo do funcionário logado (ver Funcionario.resumo_em_cache).
+# Descartado no commit que altera o funcionário; o TTL limita a defasagem entre workers.
+FUNCIONARIO_CACHE_TTL = int(os.getenv('FUNCIONARIO_CACHE_TTL', '60'))
+
+_funcionarios = {}  # id -> (expira_em, FuncionarioResumo)
+_funcionarios_lock = threading.Lock()
+
+
+def invalidar_funcionarios(*funcionario_ids):
+    """Descarta o resumo em cache dos funcionários informados (ou de todos)"""
+    with _funcionarios_lock:
+        if not funcionario_ids:
+            _funcionarios.clear()
+        for funcionario_id in funcionario_ids:
+            _funcionarios.pop(funcionario_id, None)
+
+
+class FuncionarioResumo:
+    """
+    Cópia somente leitura dos dados de um funcionário usados em checagens de
+    acesso e logs. Não pertence a nenhuma sessão, então pode ser compartilhada
+    entre requisições.
+    """
+
+    __slots__ = ('id', 'nome', 'email', 'gerente', 'ativo', 'cargo_id', 'empresa_id')
+
+    def __init__(self, id, nome, email, gerente, ativo, cargo_id, empresa_id):
+        for campo, valor in zip(self.__slots__, (id, nome, email, gerente, ativo, cargo_id, empresa_id)):
+            object.__setattr__(self, campo, valor)
+
+    def __setattr__(self, campo, valor):
+        raise AttributeError('FuncionarioResumo é somente leitura')
+
+    def __repr__(self):
+        return f'<FuncionarioResumo {self.id} {self.nome}>'
+
+
 class Empresa(db.Model, TimestampMixin, ActiveMixin):
     """Modelo para empresa"""
     __tablename__ = "empresa"
@@ -23,6 +77,9 @@ class Empresa(db.Model, TimestampMixin, ActiveMixin):
     # Relacionamentos
     cargos = db.relationship('Cargo', backref='empresa', lazy=True, cascade="all, delete-orphan")
     
+    # Colunas retornadas com `view=summary` nas listagens
+    CAMPOS_RESUMO = ('id', 'nome', 'cnpj', 'ativo')
+    
     def __repr__(self):
         return f'<Empresa {self.nome}>'
     
@@ -54,6 +111,9 @@ class Cargo(db.Model, TimestampMixin, ActiveMixin):
     # Relacionamentos
     funcionarios = db.relationship('Funcionario', backref='cargo', lazy=True)
     
+    # Colunas retornadas com `view=summary` nas listagens
+    CAMPOS_RESUMO = ('id', 'codigo', 'nome', 'nivel', 'ativo')
+    
     def __repr__(self):
         return f'<Cargo {self.nome}>'
 
@@ -87,6 +147,11 @@ class Funcionario(db.Model, TimestampMixin, ActiveMixin):
     # Remover relacionamento ambíguo - será definido no modelo Proposta
     logs_proposta = db.relationship('PropostaLog', backref='funcionario', lazy=True)
     
+    # Colunas retornadas com `view=summary` nas listagens
+    CAMPOS_RESUMO = ('id', 'nome', 'email', 'gerente', 'cargo_id', 'empresa_id', 'ativo')
+    # Colunas que nunca podem ser pedidas via `fields=`
+    CAMPOS_OCULTOS = ('senha_hash',)
+    
     def __repr__(self):
         return f'<Funcionario {self.nome}>'
     
@@ -97,6 +162,46 @@ class Funcionario(db.Model, TimestampMixin, ActiveMixin):
     def check_senha(self, senha: str):
         """Verifica se a senha está correta"""
         return check_password_hash(self.senha_hash, senha)
+    
+    @classmethod
+    def ids_gerentes_ativos(cls):
+        """Ids dos gerentes ativos (em cache; invalidado por models/events.py)"""
+        agora = time.monotonic()
+        with _gerentes_lock:
+            if _gerentes['expira_em'] > agora:
+                return _gerentes['ids']
+        
+        ids = tuple(
+            gerente_id for (gerente_id,) in
+            db.session.query(cls.id).filter(cls.gerente == True, cls.ativo == True).order_by(cls.id)
+        )
+        with _gerentes_lock:
+            _gerentes.update(expira_em=agora + GERENTES_CACHE_TTL, ids=ids)
+        return ids
+    
+    @classmethod
+    def resumo_em_cache(cls, funcionario_id: int):
+        """
+        FuncionarioResumo do funcionário (ou None se não existe), em cache por
+        FUNCIONARIO_CACHE_TTL e invalidado por models/events.py.
+        """
+        agora = time.monotonic()
+        with _funcionarios_lock:
+            entrada = _funcionarios.get(funcionario_id)
+            if entrada and entrada[0] > agora:
+                return entrada[1]
+        
+        linha = (
+            db.session.query(*(getattr(cls, campo) for campo in FuncionarioResumo.__slots__))
+            .filter(cls.id == funcionario_id)
+            .first()
+        )
+        if linha is None:
+            return None
+        resumo = FuncionarioResumo(*linha)
+        with _funcionarios_lock:
+            _funcionarios[funcionario_id] = (agora + FUNCIONARIO_CACHE_TTL, resumo)
+        return resumo
         
     def to_json(self):
         return {
@@ -6,6 +6,7 @@ Inclui propostas, itens de proposta e logs de alterações.
 from datetime import datetime
 from config import db
 from sqlalchemy import CheckConstraint
+from sqlalchemy.orm import selectinload, noload
 from .base import TimestampMixin, ActiveMixin
 
 
@@ -30,6 +31,13 @@ class Proposta(db.Model, TimestampMixin, ActiveMixin):
     status = db.Column(db.String(20), nullable=False, default='RASCUNHO', index=True)
     observacoes = db.Column(db.Text, nullable=True)
     
+    # Resumo financeiro persistido (mantido por PropostaService.atualizar_resumo_financeiro)
+    valor_servicos = db.Column(db.Numeric(precision=15, scale=2), nullable=True)  # Soma dos itens ativos
+    taxa_abertura = db.Column(db.Numeric(precision=15, scale=2), nullable=True)  # Taxa de abertura de empresa
+    valor_base = db.Column(db.Numeric(precision=15, scale=2), nullable=True, index=True)  # Serviços + taxa
+    desconto_valor = db.Column(db.Numeric(precision=15, scale=2), nullable=True)  # Base - valor final
+    desconto_percentual = db.Column(db.Numeric(precision=7, scale=2), nullable=True, index=True)  # Desconto real sobre a base
+    
     # Campos para PDF
     pdf_gerado = db.Column(db.Boolean, default=False, index=True)
     pdf_caminho = db.Column(db.String(500), nullable=True)
@@ -42,9 +50,36 @@ class Proposta(db.Model, TimestampMixin, ActiveMixin):
     funcionario_responsavel = db.relationship('Funcionario', foreign_keys=[funcionario_responsavel_id], lazy='joined')
     aprovador = db.relationship('Funcionario', foreign_keys=[aprovada_por], lazy='joined')
     
+    __table_args__ = (
+        # Chave da paginação por cursor (created_at, id) nas listagens de propostas ativas
+        db.Index('ix_proposta_ativo_created_at_id', 'ativo', 'created_at', 'id'),
+    )
+    
+    # Colunas retornadas com `view=summary` nas listagens
+    CAMPOS_RESUMO = (
+        'id', 'numero', 'cliente_id', 'funcionario_responsavel_id', 'status',
+        'valor_total', 'percentual_desconto', 'requer_aprovacao', 'data_validade', 'created_at'
+    )
+    
     def __repr__(self):
         return f'<Proposta {self.numero}>'
     
+    @classmethod
+    def opcoes_listagem(cls):
+        """
+        Opções de carregamento para serializar uma página inteira de propostas.
+        
+        Os itens, clientes e responsáveis da página são buscados em uma única
+        consulta `IN (...)` cada, em vez de uma consulta lazy por proposta. O
+        aprovador não é usado em `to_json`, então não é carregado.
+        """
+        return (
+            selectinload(cls.itens),
+            selectinload(cls.cliente),
+            selectinload(cls.funcionario_responsavel),
+            noload(cls.aprovador),
+        )
+    
     def to_json(self):
         return {
             "id": self.id,
@@ -80,6 +115,15 @@ class Proposta(db.Model, TimestampMixin, ActiveMixin):
             } if hasattr(self, 'funcionario_responsavel') and self.funcionario_responsavel else None,
             # ⚠️ INCLUIR: Itens da proposta
             "itens": [item.to_json() for item in self.itens if item.ativo] if hasattr(self, 'itens') else [],
+            # Resumo financeiro persistido
+            "resumo_financeiro": {
+                "valor_servicos": float(self.valor_servicos) if self.valor_servicos is not None else None,
+                "taxa_abertura": float(self.taxa_abertura) if self.taxa_abertura is not None else None,
+                "valor_base": float(self.valor_base) if self.valor_base is not None else None,
+                "valor_final": float(self.valor_total),
+                "desconto_valor": float(self.desconto_valor) if self.desconto_valor is not None else None,
+                "desconto_percentual": float(self.desconto_percentual) if self.desconto_percentual is not None else None
+            },
             # Campos de PDF
             "pdf_gerado": self.pdf_gerado,
             "pdf_caminho": self.pdf_caminho,
@@ -103,6 +147,7 @@ class Proposta(db.Model, TimestampMixin, ActiveMixin):
         
         # Criar notificação para o funcionário responsável
         Notificacao.criar_notificacao_aprovacao_gerenciada(self, gerente_id, aprovada=True)
+        self._publicar_decisao()
         
         db.session.commit()
     
@@ -119,8 +164,26 @@ class Proposta(db.Model, TimestampMixin, ActiveMixin):
         
         # Criar notificação para o funcionário responsável
         Notificacao.criar_notificacao_aprovacao_gerenciada(self, gerente_id, aprovada=False)
+        self._publicar_decisao()
         
         db.session.commit()
+    
+    def _publicar_decisao(self):
+        """Agenda o evento da decisão para o responsável e os gerentes (enviado após o commit)"""
+        from services.eventos import publicar_apos_commit, GERENTES
+        
+        dados = {
+            'proposta_id': self.id,
+            'numero': self.numero,
+            'status': self.status,
+            'motivo_rejeicao': self.motivo_rejeicao,
+            'aprovada_por': self.aprovada_por,
+            'data_aprovacao': self.data_aprovacao.isoformat() if self.data_aprovacao else None
+        }
+        if self.funcionario_responsavel_id:
+            publicar_apos_commit(db.session, self.funcionario_responsavel_id, 'proposta_decisao', dados)
+        # Outros gerentes retiram a proposta da lista de pendentes
+        publicar_apos_commit(db.session, GERENTES, 'proposta_decisao', dados)
 
 
 class ItemProposta(db.Model, TimestampMixin, ActiveMixin):
@@ -0,0 +1,323 @@
+"""
+Cache em memória dos dados de referência tributários e do catálogo.
+
+Tipos de atividade, regimes, faixas de faturamento, mensalidades automáticas
+e serviços mudam raramente e são lidos em quase toda requisição de proposta.
+Cada processo carrega esses dados uma vez e os serve como snapshots
+imutáveis (dicionários no formato de `to_json`, copiados a cada entrega).
+
+A tabela `referencia_versao` guarda um número de versão por tabela de
+referência. Toda gravação nessas tabelas (flush ou UPDATE/DELETE em lote)
+incrementa a versão na mesma transação (ver models/events.py). Cada snapshot
+lembra as versões das tabelas de que depende e só é recarregado quando
+alguma delas muda; outros workers percebem a mudança com um único SELECT na
+tabela de versões, feito no máximo a cada REFERENCIAS_VERIFICACAO_SEGUNDOS.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import selectinload
+
+from config import db
+from .tributario import TipoAtividade, RegimeTributario, AtividadeRegime, FaixaFaturamento, MensalidadeAutomatica
+from .servicos import Servico, ServicoRegime
+
+
+# Intervalo máximo entre leituras da tabela de versões (gravações de outros workers)
+REFERENCIAS_VERIFICACAO_SEGUNDOS = float(os.getenv('REFERENCIAS_VERIFICACAO_SEGUNDOS', '2'))
+
+CHAVE_SESSAO = 'referencias_alteradas'
+
+# Modelos cujas gravações invalidam os snapshots
+MODELOS_REFERENCIA = (
+    TipoAtividade, RegimeTributario, AtividadeRegime, FaixaFaturamento,
+    MensalidadeAutomatica, Servico, ServicoRegime
+)
+TABELAS_REFERENCIA = frozenset(modelo.__tablename__ for modelo in MODELOS_REFERENCIA)
+
+
+class ReferenciaVersao(db.Model):
+    """Versão atual de cada tabela de referência"""
+    __tablename__ = "referencia_versao"
+
+    tabela = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ReferenciaVersao {self.tabela}={self.versao}>'
+
+
+def _copiar(valor):
+    """Cópia dos dicionários/listas do snapshot (quem recebe pode alterá-la)"""
+    if isinstance(valor, dict):
+        return {chave: _copiar(item) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_copiar(item) for item in valor]
+    return valor
+
+
+# -------------------------------------------------
+# Carga dos snapshots (uma consulta por tabela)
+# -------------------------------------------------
+
+def _carregar_tipos_atividade() -> Dict[int, dict]:
+    return {tipo.id: tipo.to_json() for tipo in TipoAtividade.query.order_by(TipoAtividade.nome)}
+
+
+def _carregar_faixas() -> Dict[int, dict]:
+    """Todas as faixas (inclusive inativas), por valor inicial"""
+    faixas = FaixaFaturamento.query\
+        .options(selectinload(FaixaFaturamento.regime_tributario))\
+        .order_by(FaixaFaturamento.valor_inicial, FaixaFaturamento.id)
+    return {faixa.id: faixa.to_json() for faixa in faixas}
+
+
+def _carregar_regimes() -> Dict[int, dict]:
+    return {regime.id: regime.to_json() for regime in RegimeTributario.query.order_by(RegimeTributario.nome)}
+
+
+def _carregar_atividades_regime() -> Dict[int, Tuple[int, ...]]:
+    """Regimes vinculados (vínculo ativo) a cada tipo de atividade"""
+    linhas = db.session.query(AtividadeRegime.tipo_atividade_id, AtividadeRegime.regime_tributario_id)\
+        .filter(AtividadeRegime.ativo == True)
+    vinculos: Dict[int, List[int]] = {}
+    for tipo_atividade_id, regime_id in linhas:
+        vinculos.setdefault(tipo_atividade_id, []).append(regime_id)
+    return {tipo_atividade_id: tuple(regimes) for tipo_atividade_id, regimes in vinculos.items()}
+
+
+def _carregar_mensalidades() -> Dict[Tuple[int, int, int], dict]:
+    """Mensalidades ativas por (tipo de atividade, regime, faixa)"""
+    mensalidades = MensalidadeAutomatica.query\
+        .filter(MensalidadeAutomatica.ativo == True)\
+        .options(
+            selectinload(MensalidadeAutomatica.tipo_atividade),
+            selectinload(MensalidadeAutomatica.regime_tributario),
+            selectinload(MensalidadeAutomatica.faixa_faturamento)
+        )\
+        .order_by(MensalidadeAutomatica.id)
+    return {
+        (m.tipo_atividade_id, m.regime_tributario_id, m.faixa_faturamento_id): m.to_json()
+        for m in mensalidades
+    }
+
+
+def _carregar_servicos() -> Tuple[Dict[int, dict], Dict[int, Tuple[int, ...]]]:
+    """Todos os serviços (inclusive versões desativadas) e os serviços ativos de cada regime"""
+    servicos = Servico.query\
+        .options(selectinload(Servico.servico_regime).selectinload(ServicoRegime.regime_tributario))\
+        .order_by(Servico.categoria, Servico.nome)\
+        .all()
+    por_id = {servico.id: servico.to_json() for servico in servicos}
+    por_regime: Dict[int, List[int]] = {}
+    for servico in servicos:
+        if not servico.ativo:
+            continue
+        for vinculo in servico.servico_regime:
+            if vinculo.ativo:
+                por_regime.setdefault(vinculo.regime_tributario_id, []).append(servico.id)
+    return por_id, {regime_id: tuple(ids) for regime_id, ids in por_regime.items()}
+
+
+# Snapshot -> (tabelas das quais depende, carga). As dependências incluem as
+# tabelas embutidas no `to_json` (ex.: a mensalidade traz o nome do regime).
+CONJUNTOS: Dict[str, Tuple[Tuple[str, ...], Callable]] = {
+    'tipos_atividade': (('tipo_atividade',), _carregar_tipos_atividade),
+    'regimes': (('regime_tributario',), _carregar_regimes),
+    'faixas': (('faixa_faturamento', 'regime_tributario'), _carregar_faixas),
+    'atividades_regime': (('atividade_regime',), _carregar_atividades_regime),
+    'mensalidades': (
+        ('mensalidade_automatica', 'tipo_atividade', 'regime_tributario', 'faixa_faturamento'),
+        _carregar_mensalidades
+    ),
+    'servicos': (('servico', 'servico_regime', 'regime_tributario'), _carregar_servicos),
+}
+
+
+class _Referencias:
+    """Snapshots por conjunto, validados pelas versões da tabela `referencia_versao`"""
+
+    def __init__(self, intervalo: float = REFERENCIAS_VERIFICACAO_SEGUNDOS):
+        self.intervalo = intervalo
+        self._versoes: Dict[str, int] = {}
+        self._proxima_verificacao = 0.0
+        self._snapshots: Dict[str, Tuple[tuple, object]] = {}  # conjunto -> (versões, valor)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ler_versoes() -> Dict[str, int]:
+        return dict(db.session.execute(select(ReferenciaVersao.tabela, ReferenciaVersao.versao)).all())
+
+    def _versoes_atuais(self) -> Tuple[Dict[str, int], bool]:
+        """Versões vigentes e se elas já estão confirmadas (podem ser compartilhadas)"""
+        if db.session.info.get(CHAVE_SESSAO):
+            # Transação que alterou referências: vê a própria gravação, que não é
+            # publicada para as outras threads antes do commit
+            return self._ler_versoes(), False
+        if time.monotonic() >= self._proxima_verificacao:
+            versoes = self._ler_versoes()
+            with self._lock:
+                self._versoes = versoes
+                self._proxima_verificacao = time.monotonic() + self.intervalo
+        return self._versoes, True
+
+    def _obter(self, conjunto: str):
+        versoes, confirmadas = self._versoes_atuais()
+        tabelas, carregar = CONJUNTOS[conjunto]
+        carimbo = tuple(versoes.get(tabela, 0) for tabela in tabelas)
+        atual = self._snapshots.get(conjunto)
+        if atual is not None and atual[0] == carimbo:
+            return atual[1]
+
+        # Versões lidas antes dos dados: gravação concorrente só causa outra recarga
+        with db.session.no_autoflush:
+            valor = carregar()
+        if not confirmadas:
+            # Dados ainda não confirmados: servem só a esta transação
+            return valor
+        with self._lock:
+            self._snapshots[conjunto] = (carimbo, valor)
+        return valor
+
+    def carimbo(self, *conjuntos: str) -> tuple:
+        """Versões das tabelas dos conjuntos (serve de ETag sem consultar as tabelas)"""
+        versoes, _ = self._versoes_atuais()
+        tabelas = sorted({tabela for conjunto in conjuntos for tabela in CONJUNTOS[conjunto][0]})
+        return tuple(f'{tabela}:{versoes.get(tabela, 0)}' for tabela in tabelas)
+
+    def invalidar(self):
+        """Após o commit: força a releitura das versões na próxima consulta"""
+        with self._lock:
+            self._proxima_verificacao = 0.0
+
+    def limpar(self):
+        with self._lock:
+            self._versoes = {}
+            self._snapshots.clear()
+            self._proxima_verificacao = 0.0
+
+    # -------------------------------------------------
+    # Consultas
+    # -------------------------------------------------
+
+    def tipo_atividade(self, tipo_atividade_id: int) -> Optional[dict]:
+        tipo = self._obter('tipos_atividade').get(tipo_atividade_id)
+        return _copiar(tipo) if tipo else None
+
+    def tipos_atividade(self) -> List[dict]:
+        """Todos os tipos de atividade, por nome"""
+        return [_copiar(tipo) for tipo in self._obter('tipos_atividade').values()]
+
+    def regime(self, regime_id: Optional[int]) -> Optional[dict]:
+        regime = self._obter('regimes').get(regime_id)
+        return _copiar(regime) if regime else None
+
+    def regime_codigo(self, regime_id: Optional[int]) -> str:
+        regime = self._obter('regimes').get(regime_id)
+        return regime['codigo'] if regime else ''
+
+    def combinacao_valida(self, tipo_atividade_id: int, regime_tributario_id: int) -> bool:
+        """Se o regime está vinculado (vínculo ativo) ao tipo de atividade"""
+        return regime_tributario_id in self._obter('atividades_regime').get(tipo_atividade_id, ())
+
+    def regimes_da_atividade(self, tipo_atividade_id: int, tipo_pessoa: Optional[str] = None) -> List[dict]:
+        """Regimes ativos vinculados ao tipo de atividade, por nome; `tipo_pessoa` 'F'/'J' filtra a aplicabilidade"""
+        vinculados = set(self._obter('atividades_regime').get(tipo_atividade_id, ()))
+        campo = {'F': 'aplicavel_pf', 'J': 'aplicavel_pj'}.get(tipo_pessoa)
+        return [
+            _copiar(regime) for regime_id, regime in self._obter('regimes').items()
+            if regime_id in vinculados and regime['ativo'] and (campo is None or regime[campo])
+        ]
+
+    def faixa(self, faixa_id: int) -> Optional[dict]:
+        faixa = self._obter('faixas').get(faixa_id)
+        return _copiar(faixa) if faixa else None
+
+    def faixas(self, regime_tributario_id: Optional[int] = None) -> List[dict]:
+        """Faixas ativas por valor inicial, opcionalmente só as do regime"""
+        return [
+            _copiar(faixa) for faixa in self._obter('faixas').values()
+            if faixa['ativo'] and (regime_tributario_id is None or faixa['regime_tributario_id'] == regime_tributario_id)
+        ]
+
+    def mensalidade(self, tipo_atividade_id: int, regime_tributario_id: int,
+                    faixa_faturamento_id: int) -> Optional[dict]:
+        """Mensalidade automática ativa da configuração tributária"""
+        try:
+            # Ids do corpo da requisição podem chegar como texto
+            chave = (int(tipo_atividade_id), int(regime_tributario_id), int(faixa_faturamento_id))
+        except (TypeError, ValueError):
+            return None
+        mensalidade = self._obter('mensalidades').get(chave)
+        return _copiar(mensalidade) if mensalidade else None
+
+    def mensalidades(self) -> List[dict]:
+        return [_copiar(mensalidade) for mensalidade in self._obter('mensalidades').values()]
+
+    def servico(self, servico_id: int) -> Optional[dict]:
+        servicos, _ = self._obter('servicos')
+        servico = servicos.get(servico_id)
+        return _copiar(servico) if servico else None
+
+    def servico_por_nome(self, nome: str) -> Optional[dict]:
+        """Serviço ativo com o nome exato"""
+        servicos, _ = self._obter('servicos')
+        for servico in servicos.values():
+            if servico['ativo'] and servico['nome'] == nome:
+                return _copiar(servico)
+        return None
+
+    def servicos_ativos(self) -> List[dict]:
+        servicos, _ = self._obter('servicos')
+        return [_copiar(servico) for servico in servicos.values() if servico['ativo']]
+
+    def servicos_do_regime(self, regime_id: int) -> List[dict]:
+        """Serviços ativos com vínculo ativo ao regime, por categoria e nome"""
+        servicos, por_regime = self._obter('servicos')
+        return [_copiar(servicos[servico_id]) for servico_id in por_regime.get(regime_id, ())]
+
+
+# Instância global dos dados de referência
+referencias = _Referencias()
+
+
+# -------------------------------------------------
+# Versionamento (chamado pelos event listeners)
+# -------------------------------------------------
+
+def incrementar_versoes(session, tabelas: Iterable[str]):
+    """
+    Incrementa, na transação da sessão, a versão das tabelas ainda não
+    incrementadas nesta transação.
+    """
+    alteradas = session.info.setdefault(CHAVE_SESSAO, set())
+    novas = set(tabelas) - alteradas
+    if not novas:
+        return
+    alteradas.update(novas)
+
+    tabela_versao = ReferenciaVersao.__table__
+    conexao = session.connection()
+    for tabela in sorted(novas):
+        resultado = conexao.execute(
+            update(tabela_versao)
+            .where(tabela_versao.c.tabela == tabela)
+            .values(versao=tabela_versao.c.versao + 1)
+        )
+        if not resultado.rowcount:
+            # Tabela ainda sem linha (banco criado por create_all)
+            conexao.execute(insert(tabela_versao).values(tabela=tabela, versao=1))
+
+
+def aplicar_referencias_alteradas(session):
+    """Após o commit, este processo relê as versões na próxima consulta"""
+    if session.info.pop(CHAVE_SESSAO, None):
+        referencias.invalidar()
+
+
+def descartar_referencias_alteradas(session):
+    session.info.pop(CHAVE_SESSAO, None)
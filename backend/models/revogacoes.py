@@ -0,0 +1,159 @@
+"""
+Revogação de tokens JWT.
+
+A tabela `token_revogacao` é um registro só de inserção com dois tipos de
+linha: um `jti` revogado (logout) ou um corte por funcionário (todos os
+tokens emitidos antes de `revogar_antes_de`, usado ao desativar o
+funcionário ou em "sair de todos os dispositivos").
+
+Cada processo mantém em memória o conjunto de jtis e o maior corte por
+funcionário, e a checagem de cada requisição é uma busca em set/dict. Linhas
+novas são lidas de forma incremental (`id > último id lido`), no máximo a
+cada REVOGACAO_ATUALIZACAO_SEGUNDOS; revogações feitas neste processo valem
+na hora, as de outros workers após esse intervalo.
+"""
+
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import db
+
+
+# Intervalo máximo entre leituras de revogações gravadas por outros workers
+REVOGACAO_ATUALIZACAO_SEGUNDOS = float(os.getenv('REVOGACAO_ATUALIZACAO_SEGUNDOS', '5'))
+
+CHAVE_SESSAO = 'revogacoes_pendentes'
+
+
+class TokenRevogacao(db.Model):
+    """Revogação de um token (jti) ou de todos os tokens de um funcionário até um instante"""
+    __tablename__ = "token_revogacao"
+
+    id = db.Column(db.Integer, primary_key=True)  # cursor da leitura incremental
+    jti = db.Column(db.String(36), nullable=True, unique=True)
+    # Sem FK: o corte continua valendo se o funcionário for excluído
+    funcionario_id = db.Column(db.Integer, nullable=True, index=True)
+    revogar_antes_de = db.Column(db.Integer, nullable=True)  # epoch (s), comparado ao `iat` do token
+    expira_em = db.Column(db.DateTime, nullable=True)  # `exp` do token revogado, se houver
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        if self.jti:
+            return f'<TokenRevogacao jti={self.jti}>'
+        return f'<TokenRevogacao funcionario={self.funcionario_id} antes_de={self.revogar_antes_de}>'
+
+
+class _Revogacoes:
+    """Estado em memória das revogações, atualizado de forma incremental"""
+
+    def __init__(self, intervalo: float = REVOGACAO_ATUALIZACAO_SEGUNDOS):
+        self.intervalo = intervalo
+        self._jtis: Set[str] = set()
+        self._cortes: Dict[str, int] = {}  # identidade do token (str) -> revogar_antes_de
+        self._ultimo_id = 0
+        self._proxima_leitura = 0.0
+        self._lock = threading.Lock()
+
+    def _aplicar(self, jti: Optional[str], funcionario_id: Optional[int], revogar_antes_de: Optional[int]):
+        if jti:
+            self._jtis.add(jti)
+        if funcionario_id is not None and revogar_antes_de is not None:
+            chave = str(funcionario_id)
+            if revogar_antes_de > self._cortes.get(chave, 0):
+                self._cortes[chave] = revogar_antes_de
+
+    def atualizar(self):
+        """Lê as revogações gravadas desde a última leitura"""
+        if not self._lock.acquire(blocking=False):
+            return  # outra thread já está lendo; esta segue com o estado atual
+        try:
+            agora = datetime.utcnow()
+            linhas = (
+                db.session.query(
+                    TokenRevogacao.id, TokenRevogacao.jti, TokenRevogacao.funcionario_id,
+                    TokenRevogacao.revogar_antes_de, TokenRevogacao.expira_em
+                )
+                .filter(TokenRevogacao.id > self._ultimo_id)
+                .order_by(TokenRevogacao.id)
+                .all()
+            )
+            for linha_id, jti, funcionario_id, revogar_antes_de, expira_em in linhas:
+                # Token já expirado é recusado pela própria validação do JWT
+                if jti and expira_em and expira_em < agora:
+                    jti = None
+                self._aplicar(jti, funcionario_id, revogar_antes_de)
+                self._ultimo_id = linha_id
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Falha ao ler revogações de tokens: {e}")
+        finally:
+            self._proxima_leitura = time.monotonic() + self.intervalo
+            self._lock.release()
+
+    def token_revogado(self, payload: dict) -> bool:
+        """Checagem do token_in_blocklist_loader: busca em set/dict"""
+        if time.monotonic() >= self._proxima_leitura:
+            self.atualizar()
+        if payload.get('jti') in self._jtis:
+            return True
+        corte = self._cortes.get(payload.get('sub'))
+        return corte is not None and payload.get('iat', 0) < corte
+
+    def registrar_local(self, jti: Optional[str], funcionario_id: Optional[int], revogar_antes_de: Optional[int]):
+        """Aplica neste processo uma revogação recém-gravada (sem esperar a leitura)"""
+        with self._lock:
+            self._aplicar(jti, funcionario_id, revogar_antes_de)
+
+    def limpar(self):
+        with self._lock:
+            self._jtis.clear()
+            self._cortes.clear()
+            self._ultimo_id = 0
+            self._proxima_leitura = 0.0
+
+
+# Instância global, consultada pelo token_in_blocklist_loader (config.py)
+revogacoes = _Revogacoes()
+
+
+def _agendar(session, revogacao: TokenRevogacao):
+    session.add(revogacao)
+    session.info.setdefault(CHAVE_SESSAO, []).append(
+        (revogacao.jti, revogacao.funcionario_id, revogacao.revogar_antes_de)
+    )
+
+
+def revogar_token(payload: dict, session=None):
+    """Revoga o token (jti) do payload; vale após o commit da sessão"""
+    session = session or db.session
+    exp = payload.get('exp')
+    _agendar(session, TokenRevogacao(
+        jti=payload['jti'],
+        funcionario_id=int(payload['sub']) if payload.get('sub') else None,
+        expira_em=datetime.utcfromtimestamp(exp) if exp else None
+    ))
+
+
+def revogar_tokens_funcionario(funcionario_id: int, session=None):
+    """Revoga todos os tokens já emitidos para o funcionário; vale após o commit"""
+    session = session or db.session
+    # Segundo seguinte: `iat` é inteiro, então tokens emitidos neste segundo também caem
+    corte = math.floor(time.time()) + 1
+    _agendar(session, TokenRevogacao(funcionario_id=funcionario_id, revogar_antes_de=corte))
+
+
+def aplicar_revogacoes_pendentes(session):
+    """Após o commit, as revogações gravadas valem neste processo imediatamente"""
+    for jti, funcionario_id, revogar_antes_de in session.info.pop(CHAVE_SESSAO, ()):
+        revogacoes.registrar_local(jti, funcionario_id, revogar_antes_de)
+
+
+def descartar_revogacoes_pendentes(session):
+    session.info.pop(CHAVE_SESSAO, None)
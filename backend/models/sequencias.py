@@ -0,0 +1,114 @@
+"""
+Alocador de números sequenciais (propostas, cargos, serviços).
+
+Cada sequência é uma linha da tabela `sequencia`. Um worker reserva um bloco
+de números com um único UPDATE atômico (`proximo_valor = proximo_valor + bloco`)
+em transação própria e entrega os números do bloco a partir da memória, sem
+consultar a tabela de destino e sem espera. Números de um bloco não usado
+(worker reiniciado) viram lacunas, o que é aceitável para códigos legíveis.
+"""
+
+import os
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy import update, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from config import db
+
+
+# Quantidade de números reservados por worker a cada ida ao banco
+TAMANHO_BLOCO_PADRAO = int(os.getenv('SEQUENCIA_TAMANHO_BLOCO', '10'))
+
+
+class Sequencia(db.Model):
+    """Próximo valor livre de cada sequência nomeada"""
+    __tablename__ = "sequencia"
+
+    nome = db.Column(db.String(50), primary_key=True)
+    proximo_valor = db.Column(db.BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f'<Sequencia {self.nome}={self.proximo_valor}>'
+
+
+# nome -> [próximo valor do bloco, limite exclusivo]; descartado após fork
+_blocos = {}
+_estado = {'pid': os.getpid()}
+_lock = threading.Lock()
+
+
+def _reservar_bloco(nome: str, tamanho: int, semente: Optional[Callable[[], int]]) -> int:
+    """Reserva `tamanho` números da sequência e retorna o primeiro deles"""
+    tabela = Sequencia.__table__
+
+    for _ in range(2):
+        with db.engine.begin() as conn:
+            incremento = update(tabela)\
+                .where(tabela.c.nome == nome)\
+                .values(proximo_valor=tabela.c.proximo_valor + tamanho)
+            if conn.dialect.update_returning:
+                fim = conn.execute(incremento.returning(tabela.c.proximo_valor)).scalar()
+            elif conn.execute(incremento).rowcount:
+                # Sem RETURNING: a linha já está bloqueada pelo UPDATE desta transação
+                fim = conn.execute(select(tabela.c.proximo_valor).where(tabela.c.nome == nome)).scalar()
+            else:
+                fim = None
+        if fim is not None:
+            return fim - tamanho
+
+        # Sequência ainda não existe: parte do maior valor já usado (só nesta vez)
+        inicio = (semente() if semente else 0) + 1
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(insert(tabela).values(nome=nome, proximo_valor=inicio + tamanho))
+            return inicio
+        except IntegrityError:
+            # Outro worker criou a sequência ao mesmo tempo; reserva pelo UPDATE
+            continue
+
+    raise RuntimeError(f'Não foi possível reservar números da sequência {nome}')
+
+
+def proximo_valor(nome: str, semente: Optional[Callable[[], int]] = None,
+                  tamanho_bloco: Optional[int] = None) -> int:
+    """
+    Retorna o próximo número da sequência `nome`.
+
+    `semente` é chamada apenas quando a sequência ainda não existe no banco e
+    deve retornar o maior valor já usado pelos registros atuais. A reserva usa
+    uma conexão própria; chame antes de gravar na sessão corrente, já que o
+    SQLite admite um único escritor por vez.
+    """
+    with _lock:
+        if _estado['pid'] != os.getpid():
+            # Processo filho (fork): blocos do processo pai não podem ser reaproveitados
+            _blocos.clear()
+            _estado['pid'] = os.getpid()
+
+        bloco = _blocos.get(nome)
+        if bloco is None or bloco[0] >= bloco[1]:
+            tamanho = tamanho_bloco or TAMANHO_BLOCO_PADRAO
+            inicio = _reservar_bloco(nome, tamanho, semente)
+            bloco = _blocos[nome] = [inicio, inicio + tamanho]
+
+        valor = bloco[0]
+        bloco[0] += 1
+        return valor
+
+
+def maior_sufixo_numerico(coluna, prefixo: str = '', tamanho_prefixo: Optional[int] = None) -> int:
+    """
+    Maior sufixo numérico já gravado em `coluna` (usado só para semear sequências).
+
+    Considera os valores que começam com `prefixo` e ignora os
+    `tamanho_prefixo` primeiros caracteres (padrão: o próprio prefixo).
+    """
+    corte = len(prefixo) if tamanho_prefixo is None else tamanho_prefixo
+    query = db.session.query(coluna)
+    if prefixo:
+        query = query.filter(coluna.like(f'{prefixo}%'))
+
+    sufixos = (valor[corte:] for (valor,) in query if valor)
+    return max((int(sufixo) for sufixo in sufixos if sufixo.isdigit()), default=0)
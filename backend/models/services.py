@@ -3,11 +3,20 @@ Serviços e lógica de negócio para propostas comerciais.
 """
 
 from datetime import datetime
+from decimal import Decimal
 from typing import List, Optional
+from sqlalchemy.orm.util import identity_key
 from config import db
 from .propostas import Proposta, ItemProposta, PropostaLog
-from .tributario import AtividadeRegime, RegimeTributario
-from .servicos import Servico
+from .clientes import Cliente
+from .tributario import RegimeTributario
+from .referencias import referencias
+from .sequencias import proximo_valor, maior_sufixo_numerico
+
+
+def _decimal(valor) -> Decimal:
+    """Converte float/Decimal/None para Decimal com 2 casas"""
+    return Decimal(str(valor or 0)).quantize(Decimal('0.01'))
 
 
 class PropostaService:
@@ -15,25 +24,15 @@ class PropostaService:
     
     @staticmethod
     def gerar_numero_proposta() -> str:
-        """Gera o próximo número de proposta no formato AAAA0001"""
+        """Gera o próximo número de proposta no formato AAAA0001 (sequência anual)"""
         ano_atual = datetime.now().year
+        prefixo = str(ano_atual)
         
-        # Busca o último número do ano
-        ultima_proposta = db.session.query(Proposta)\
-            .filter(Proposta.numero.like(f'{ano_atual}%'))\
-            .order_by(Proposta.numero.desc())\
-            .first()
-        
-        if ultima_proposta:
-            try:
-                ultimo_numero = int(ultima_proposta.numero[-4:])
-                proximo_numero = ultimo_numero + 1
-            except ValueError:
-                proximo_numero = 1
-        else:
-            proximo_numero = 1
-            
-        return f'{ano_atual}{proximo_numero:04d}'
+        proximo_numero = proximo_valor(
+            f'proposta_{ano_atual}',
+            semente=lambda: maior_sufixo_numerico(Proposta.numero, prefixo)
+        )
+        return f'{prefixo}{proximo_numero:04d}'
     
     @staticmethod
     def validar_regime_para_atividades(proposta: Proposta) -> bool:
@@ -41,36 +40,16 @@ class PropostaService:
         if not proposta.regime_tributario_id:
             return True
             
-        # Verifica se existe pelo menos uma combinação válida
-        combinacao_valida = db.session.query(AtividadeRegime)\
-            .filter(
-                AtividadeRegime.tipo_atividade_id == proposta.tipo_atividade_id,
-                AtividadeRegime.regime_tributario_id == proposta.regime_tributario_id,
-                AtividadeRegime.ativo == True
-            ).first()
-            
-        return combinacao_valida is not None
+        # Verifica se a combinação atividade/regime está vinculada (cache de referência)
+        return referencias.combinacao_valida(proposta.tipo_atividade_id, proposta.regime_tributario_id)
     
     @staticmethod
     def get_regimes_disponiveis_para_atividades(
         tipo_atividade_id: int, 
         tipo_pessoa: str = 'J'
-    ) -> List[RegimeTributario]:
-        """Retorna regimes tributários disponíveis para a atividade selecionada"""
-        query = db.session.query(RegimeTributario)\
-            .join(AtividadeRegime)\
-            .filter(
-                AtividadeRegime.tipo_atividade_id == tipo_atividade_id,
-                AtividadeRegime.ativo == True,
-                RegimeTributario.ativo == True
-            )
-        
-        if tipo_pessoa == 'F':
-            query = query.filter(RegimeTributario.aplicavel_pf == True)
-        elif tipo_pessoa == 'J':
-            query = query.filter(RegimeTributario.aplicavel_pj == True)
-            
-        return query.distinct().all()
+    ) -> List[dict]:
+        """Retorna regimes tributários disponíveis para a atividade selecionada (formato de to_json)"""
+        return referencias.regimes_da_atividade(tipo_atividade_id, tipo_pessoa)
     
     @staticmethod
     def calcular_servicos_automaticos(proposta: Proposta):
@@ -84,18 +63,16 @@ class PropostaService:
         servicos_adicionados = []
         
         # Contabilidade Mensal (sempre inclui para regimes empresariais)
-        servico_contabil = Servico.query.filter_by(
-            nome='Contabilidade Mensal', 
-            ativo=True
-        ).first()
+        servico_contabil = referencias.servico_por_nome('Contabilidade Mensal')
         
         if servico_contabil:
+            valor_base = _decimal(servico_contabil['valor_base'])
             item = ItemProposta(
                 proposta_id=proposta.id,
-                servico_id=servico_contabil.id,
+                servico_id=servico_contabil['id'],
                 quantidade=1,
-                valor_unitario=servico_contabil.valor_base,
-                valor_total=servico_contabil.valor_base,
+                valor_unitario=valor_base,
+                valor_total=valor_base,
                 descricao_personalizada='Serviço Automático'
             )
             db.session.add(item)
@@ -130,6 +107,70 @@ class PropostaService:
         db.session.add(log)
         db.session.commit()
     
+    @staticmethod
+    def calcular_taxa_abertura_empresa(cliente_abertura: bool, regime_codigo: str) -> float:
+        """
+        Calcula taxa de abertura de empresa
+        
+        Args:
+            cliente_abertura: Se o cliente é abertura de empresa (tabela cliente.abertura_empresa)
+            regime_codigo: Código do regime tributário
+            
+        Returns:
+            float: Valor da taxa (MEI: R$ 300, Outros: R$ 1.000, Cliente existente: R$ 0)
+        """
+        if not cliente_abertura:
+            return 0.0
+        
+        # ⚠️ REGRA CORRIGIDA: MEI = R$ 300, outros = R$ 1.000
+        if regime_codigo and regime_codigo.upper() == 'MEI':
+            return 300.0
+        else:
+            return 1000.0
+    
+    @staticmethod
+    def calcular_resumo_financeiro(proposta: Proposta, itens: Optional[list] = None) -> dict:
+        """
+        Calcula serviços, taxa de abertura, valor base e desconto real da proposta.
+        
+        `itens` permite informar a lista de itens ainda não associados à coleção
+        (ex.: pendentes de flush); por padrão usa `proposta.itens`.
+        """
+        if itens is None:
+            itens = proposta.itens
+        
+        with db.session.no_autoflush:
+            cliente = db.session.get(Cliente, proposta.cliente_id) if proposta.cliente_id else None
+            # Regime já carregado na sessão pode ter o código alterado e ainda não gravado
+            regime = db.session.identity_map.get(identity_key(RegimeTributario, proposta.regime_tributario_id))
+            regime_codigo = regime.codigo if regime is not None else referencias.regime_codigo(proposta.regime_tributario_id)
+        
+        valor_servicos = sum((_decimal(item.valor_total) for item in itens if item.ativo is not False), Decimal('0.00'))
+        taxa_abertura = _decimal(PropostaService.calcular_taxa_abertura_empresa(
+            cliente.abertura_empresa if cliente else False,
+            regime_codigo
+        ))
+        valor_base = valor_servicos + taxa_abertura
+        desconto_valor = valor_base - _decimal(proposta.valor_total)
+        desconto_percentual = (desconto_valor / valor_base * 100).quantize(Decimal('0.01')) if valor_base > 0 else Decimal('0.00')
+        
+        return {
+            'valor_servicos': valor_servicos,
+            'taxa_abertura': taxa_abertura,
+            'valor_base': valor_base,
+            'desconto_valor': desconto_valor,
+            'desconto_percentual': desconto_percentual
+        }
+    
+    @staticmethod
+    def atualizar_resumo_financeiro(proposta: Proposta, itens: Optional[list] = None) -> dict:
+        """Recalcula e grava na proposta as colunas do resumo financeiro (sem commit)"""
+        resumo = PropostaService.calcular_resumo_financeiro(proposta, itens)
+        for campo, valor in resumo.items():
+            if getattr(proposta, campo) != valor:
+                setattr(proposta, campo, valor)
+        return resumo
+    
     @staticmethod
     def atualizar_totais(proposta: Proposta):
         """Atualiza o valor total da proposta baseado nos itens"""
@@ -30,6 +30,9 @@ class Servico(db.Model, TimestampMixin, ActiveMixin):
     itens_proposta = db.relationship('ItemProposta', backref='servico', lazy=True)
     servico_regime = db.relationship('ServicoRegime', backref='servico', lazy=True, cascade="all, delete-orphan")
     
+    # Colunas retornadas com `view=summary` nas listagens e seletores
+    CAMPOS_RESUMO = ('id', 'codigo', 'nome', 'categoria', 'tipo_cobranca', 'valor_base', 'ativo')
+    
     def __repr__(self):
         return f'<Servico {self.nome}>'
     
@@ -0,0 +1,252 @@
+"""
+Motor de respostas do bot do chat.
+
+As palavras-chave de cada intenção são compiladas uma única vez em um
+autômato Aho-Corasick sobre tokens normalizados (minúsculas, sem acentos e
+sem palavras vazias): uma mensagem é lida em uma passada, qualquer que seja
+o número de intenções, e "serviço", "servico" e "SERVIÇOS" caem na mesma
+chave. Os nomes dos serviços ativos formam um segundo autômato, reconstruído
+quando o catálogo muda.
+
+Preços vêm do snapshot versionado de `models.referencias` (sempre o valor
+atual, sem consulta por mensagem). As propostas pendentes são contadas para
+todos os funcionários em uma consulta agrupada, reaproveitada por
+CHAT_BOT_CACHE_TTL segundos e descartada quando um commit altera propostas
+(ver models/events.py).
+"""
+
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+from typing import Dict, Iterator, List, Tuple
+
+
+# Validade da contagem de pendentes por funcionário
+CHAT_BOT_CACHE_TTL = int(os.getenv('CHAT_BOT_CACHE_TTL', '30'))
+
+# Ignoradas na mensagem e nos padrões: "abertura empresa" casa com "Abertura de Empresa"
+PALAVRAS_VAZIAS = frozenset({
+    'a', 'o', 'as', 'os', 'de', 'da', 'do', 'das', 'dos', 'e', 'em', 'no', 'na',
+    'nos', 'nas', 'um', 'uma', 'para', 'pra', 'por', 'com', 'que', 'the', 'of'
+})
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+# Palavras-chave por intenção
+INTENCOES = {
+    'saudacao': ('olá', 'oi', 'hello', 'hi', 'bom dia', 'boa tarde', 'boa noite'),
+    'pendentes': ('pendente', 'pendentes', 'aguardando aprovação', 'em aprovação'),
+    'preco': ('preço', 'preços', 'valor', 'valores', 'custo', 'custa', 'quanto custa', 'quanto sai'),
+    'proposta': ('proposta', 'propostas'),
+    'cliente': ('cliente', 'clientes'),
+    'servico': ('serviço', 'serviços'),
+    'ajuda': ('ajuda', 'help', 'suporte'),
+    'agradecimento': ('obrigado', 'obrigada', 'valeu', 'thanks'),
+    'despedida': ('tchau', 'bye', 'até'),
+}
+
+# Intenções de texto fixo, na ordem de prioridade
+RESPOSTAS = (
+    ('saudacao', "Olá! Como posso ajudá-lo com o sistema de propostas hoje?"),
+    ('proposta', "Posso ajudá-lo com propostas! Você pode criar, editar ou visualizar propostas no sistema. Gostaria de saber mais sobre alguma funcionalidade específica?"),
+    ('cliente', "Para gerenciar clientes, acesse a seção 'Clientes' no menu lateral. Lá você pode adicionar novos clientes, editar informações existentes e visualizar todos os clientes cadastrados."),
+    ('servico', "Os serviços são categorizados por tipo de atividade e regime tributário. Posso ajudá-lo a entender como configurar ou calcular serviços para suas propostas."),
+    ('ajuda', "Estou aqui para ajudar! Posso esclarecer dúvidas sobre: propostas, clientes, serviços, regimes tributários e funcionalidades do sistema. O que você gostaria de saber?"),
+    ('agradecimento', "De nada! Estou sempre aqui para ajudar. Se precisar de mais alguma coisa, é só perguntar!"),
+    ('despedida', "Até logo! Tenha um ótimo dia e não hesite em voltar se precisar de ajuda!"),
+)
+
+RESPOSTA_PADRAO = "Entendo sua pergunta! Para melhor ajudá-lo, posso esclarecer dúvidas sobre: criação de propostas, gestão de clientes, configuração de serviços, regimes tributários ou outras funcionalidades do sistema. O que você gostaria de saber especificamente?"
+
+COBRANCAS = {
+    'MENSAL': 'por mês',
+    'POR_NF': 'por nota fiscal',
+    'VALOR_UNICO': 'valor único',
+}
+
+
+def normalizar(texto: str) -> List[str]:
+    """Tokens em minúsculas, sem acentos e sem palavras vazias"""
+    texto = texto.casefold()
+    if not texto.isascii():
+        texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return [token for token in _TOKEN.findall(texto) if token not in PALAVRAS_VAZIAS]
+
+
+class AutomatoTokens:
+    """Aho-Corasick sobre sequências de tokens: acha todas as frases em uma passada"""
+
+    def __init__(self):
+        self._filhos: List[Dict[str, int]] = [{}]
+        self._falha: List[int] = [0]
+        self._saidas: List[Tuple[Tuple[object, int], ...]] = [()]
+
+    def adicionar(self, frase: str, rotulo):
+        tokens = normalizar(frase)
+        if not tokens:
+            return
+        no = 0
+        for token in tokens:
+            proximo = self._filhos[no].get(token)
+            if proximo is None:
+                proximo = len(self._filhos)
+                self._filhos.append({})
+                self._falha.append(0)
+                self._saidas.append(())
+                self._filhos[no][token] = proximo
+            no = proximo
+        self._saidas[no] += ((rotulo, len(tokens)),)
+
+    def compilar(self) -> 'AutomatoTokens':
+        """Calcula os links de falha (busca em largura a partir da raiz)"""
+        fila = deque(self._filhos[0].values())
+        while fila:
+            no = fila.popleft()
+            for token, filho in self._filhos[no].items():
+                fila.append(filho)
+                falha = self._falha[no]
+                while falha and token not in self._filhos[falha]:
+                    falha = self._falha[falha]
+                self._falha[filho] = self._filhos[falha].get(token, 0)
+                self._saidas[filho] += self._saidas[self._falha[filho]]
+        return self
+
+    def buscar(self, tokens: List[str]) -> Iterator[Tuple[object, int]]:
+        """(rótulo, tamanho da frase em tokens) de cada ocorrência"""
+        filhos, falha, saidas = self._filhos, self._falha, self._saidas
+        no = 0
+        for token in tokens:
+            while no and token not in filhos[no]:
+                no = falha[no]
+            no = filhos[no].get(token, 0)
+            yield from saidas[no]
+
+
+def compilar_intencoes(intencoes: Dict[str, tuple] = INTENCOES) -> AutomatoTokens:
+    automato = AutomatoTokens()
+    for intencao, frases in intencoes.items():
+        for frase in frases:
+            automato.adicionar(frase, intencao)
+    return automato.compilar()
+
+
+# Pendentes por funcionário responsável e quando a contagem expira
+_pendentes = {'expira_em': 0.0, 'valor': None}
+_pendentes_lock = threading.Lock()
+
+
+def _carregar_pendentes() -> Dict[int, int]:
+    """Propostas PENDENTE por funcionário responsável (uma consulta agrupada)"""
+    from config import db
+    from models import Proposta
+    linhas = (
+        db.session.query(Proposta.funcionario_responsavel_id, db.func.count(Proposta.id))
+        .filter(Proposta.status == 'PENDENTE', Proposta.ativo == True)
+        .group_by(Proposta.funcionario_responsavel_id)
+    )
+    return {funcionario_id: total for funcionario_id, total in linhas}
+
+
+def contar_pendentes(funcionario_id: int) -> int:
+    """Propostas PENDENTE do funcionário responsável (contagem em cache)"""
+    with _pendentes_lock:
+        if _pendentes['expira_em'] > time.monotonic():
+            return _pendentes['valor'].get(funcionario_id, 0)
+    valor = _carregar_pendentes()
+    with _pendentes_lock:
+        _pendentes['valor'], _pendentes['expira_em'] = valor, time.monotonic() + CHAT_BOT_CACHE_TTL
+    return valor.get(funcionario_id, 0)
+
+
+def invalidar_pendentes():
+    """Após o commit que alterou propostas: a próxima pergunta recarrega a contagem"""
+    with _pendentes_lock:
+        _pendentes['expira_em'] = 0.0
+
+
+def _montar_catalogo(servicos_ativos: List[dict]) -> Tuple[Dict[int, dict], AutomatoTokens]:
+    """Serviços ativos por id e o autômato dos seus nomes"""
+    servicos, automato = {}, AutomatoTokens()
+    for servico in sorted(servicos_ativos, key=lambda dados: dados['nome']):
+        servicos[servico['id']] = servico
+        automato.adicionar(servico['nome'], servico['id'])
+    return servicos, automato.compilar()
+
+
+# Catálogo montado para a versão `carimbo` do conjunto de serviços das referências
+_catalogo = {'carimbo': None, 'valor': None}
+_catalogo_lock = threading.Lock()
+
+
+def catalogo_servicos() -> Tuple[Dict[int, dict], AutomatoTokens]:
+    """Serviços ativos e o autômato dos nomes, remontados só quando um serviço muda"""
+    from models.referencias import referencias
+    carimbo = referencias.carimbo('servicos')
+    with _catalogo_lock:
+        if _catalogo['carimbo'] == carimbo:
+            return _catalogo['valor']
+    valor = _montar_catalogo(referencias.servicos_ativos())
+    with _catalogo_lock:
+        _catalogo['carimbo'], _catalogo['valor'] = carimbo, valor
+    return valor
+
+
+# Compilado uma vez na importação
+_intencoes = compilar_intencoes()
+
+
+def _moeda(valor) -> str:
+    return f"R$ {valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def _servicos_citados(tokens: List[str], automato: AutomatoTokens) -> List[int]:
+    """Serviços com o nome mais longo encontrado ("Contabilidade Mensal" vence "Contabilidade")"""
+    maior, ids = 0, []
+    for servico_id, tamanho in automato.buscar(tokens):
+        if tamanho > maior:
+            maior, ids = tamanho, [servico_id]
+        elif tamanho == maior and servico_id not in ids:
+            ids.append(servico_id)
+    return ids
+
+
+def _resposta_precos(servicos: Dict[int, dict], ids: List[int]) -> str:
+    partes = []
+    for servico_id in ids:
+        dados = servicos[servico_id]
+        cobranca = COBRANCAS.get(dados['tipo_cobranca'], dados['tipo_cobranca'].lower())
+        partes.append(f"{dados['nome']}: {_moeda(dados['valor_base'])} ({cobranca})")
+    return ("O valor base de " + "; ".join(partes) +
+            ". O valor final da proposta pode variar conforme regime tributário e faturamento.")
+
+
+def responder(mensagem: str, funcionario_id: int) -> str:
+    """Resposta do bot para a mensagem do funcionário"""
+    tokens = normalizar(mensagem)
+    intencoes = {intencao for intencao, _ in _intencoes.buscar(tokens)}
+
+    # Perguntas sobre dados têm prioridade sobre os textos fixos
+    if 'preco' in intencoes or 'servico' in intencoes or not intencoes:
+        servicos, automato = catalogo_servicos()
+        citados = _servicos_citados(tokens, automato)
+        if citados:
+            return _resposta_precos(servicos, citados)
+        if 'preco' in intencoes and 'proposta' not in intencoes:
+            exemplos = ', '.join(dados['nome'] for dados in list(servicos.values())[:5])
+            return f"De qual serviço você quer saber o valor? Alguns exemplos: {exemplos}."
+
+    if 'pendentes' in intencoes:
+        total = contar_pendentes(funcionario_id)
+        if total == 0:
+            return "Você não tem propostas pendentes de aprovação no momento."
+        if total == 1:
+            return "Você tem 1 proposta pendente de aprovação."
+        return f"Você tem {total} propostas pendentes de aprovação."
+
+    for intencao, resposta in RESPOSTAS:
+        if intencao in intencoes:
+            return resposta
+    return RESPOSTA_PADRAO
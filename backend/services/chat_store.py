@@ -0,0 +1,271 @@
+"""
+Histórico do chat persistido no banco, com cache de sessões em memória.
+
+Cada sessão é identificada por (funcionário, session_id) e guarda no máximo
+CHAT_MENSAGENS_POR_SESSAO mensagens: a tabela funciona como um buffer
+circular, podado em lote quando passa do limite. Cada funcionário mantém até
+CHAT_SESSOES_POR_FUNCIONARIO sessões; ao abrir uma nova além disso, a sessão
+usada há mais tempo é removida.
+
+Em memória, cada worker mantém as últimas mensagens das sessões mais usadas
+(LRU, até CHAT_SESSOES_EM_CACHE sessões). O buffer guarda a versão da sessão
+(`ultima_mensagem_id`) e só é servido se ela ainda for a do banco, conferida
+por uma busca na chave única de `chat_sessao`; mensagens gravadas por outro
+worker mudam a versão e forçam a releitura. Assim o histórico é consistente
+entre workers, e ler N mensagens nunca percorre mais que N linhas.
+"""
+
+import os
+import threading
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from config import db
+from models.chat import ChatSessao, ChatMensagem
+
+
+# Mensagens mantidas por sessão (no banco e no buffer em memória)
+CHAT_MENSAGENS_POR_SESSAO = int(os.getenv('CHAT_MENSAGENS_POR_SESSAO', '200'))
+
+# Sessões mantidas por funcionário; a menos usada é removida ao criar outra
+CHAT_SESSOES_POR_FUNCIONARIO = int(os.getenv('CHAT_SESSOES_POR_FUNCIONARIO', '50'))
+
+# Sessões com buffer em memória neste processo
+CHAT_SESSOES_EM_CACHE = int(os.getenv('CHAT_SESSOES_EM_CACHE', '500'))
+
+# Mensagens excedentes toleradas antes de podar a sessão (poda em lote)
+_FOLGA_PODA = 20
+
+
+class _Buffer:
+    """Últimas mensagens de uma sessão e a versão em que foram lidas"""
+
+    __slots__ = ('versao', 'mensagens')
+
+    def __init__(self, versao: Optional[int], mensagens, tamanho: int):
+        self.versao = versao
+        self.mensagens = deque(mensagens, maxlen=tamanho)
+
+
+class ChatStore:
+    """Acesso ao histórico do chat por (funcionário, sessão)"""
+
+    def __init__(self, mensagens_por_sessao: int = CHAT_MENSAGENS_POR_SESSAO,
+                 sessoes_por_funcionario: int = CHAT_SESSOES_POR_FUNCIONARIO,
+                 sessoes_em_cache: int = CHAT_SESSOES_EM_CACHE):
+        self.mensagens_por_sessao = mensagens_por_sessao
+        self.sessoes_por_funcionario = sessoes_por_funcionario
+        self.sessoes_em_cache = sessoes_em_cache
+        self._buffers: 'OrderedDict[Tuple[int, str], _Buffer]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------
+    # Cache em memória
+    # -------------------------------------------------
+
+    def _guardar_buffer(self, chave, buffer: _Buffer):
+        with self._lock:
+            self._buffers[chave] = buffer
+            self._buffers.move_to_end(chave)
+            while len(self._buffers) > self.sessoes_em_cache:
+                self._buffers.popitem(last=False)
+
+    def _descartar_buffer(self, *chaves):
+        with self._lock:
+            for chave in chaves:
+                self._buffers.pop(chave, None)
+
+    def limpar_cache(self):
+        with self._lock:
+            self._buffers.clear()
+
+    # -------------------------------------------------
+    # Banco
+    # -------------------------------------------------
+
+    @staticmethod
+    def _sessao(funcionario_id: int, sessao_id: str) -> Optional[ChatSessao]:
+        return ChatSessao.query.filter_by(funcionario_id=funcionario_id, sessao_id=sessao_id).first()
+
+    @staticmethod
+    def _remover_sessoes(sessao_pks: List[int]):
+        ChatMensagem.query.filter(ChatMensagem.sessao_pk.in_(sessao_pks)).delete(synchronize_session=False)
+        ChatSessao.query.filter(ChatSessao.id.in_(sessao_pks)).delete(synchronize_session=False)
+
+    def _liberar_vaga(self, funcionario_id: int):
+        """Remove as sessões menos usadas para caber uma nova"""
+        total = ChatSessao.query.filter_by(funcionario_id=funcionario_id).count()
+        excedentes = total - self.sessoes_por_funcionario + 1
+        if excedentes <= 0:
+            return
+        antigas = (
+            db.session.query(ChatSessao.id, ChatSessao.sessao_id)
+            .filter_by(funcionario_id=funcionario_id)
+            .order_by(ChatSessao.ultima_mensagem_em.asc())
+            .limit(excedentes)
+            .all()
+        )
+        self._remover_sessoes([pk for pk, _ in antigas])
+        self._descartar_buffer(*((funcionario_id, sessao_id) for _, sessao_id in antigas))
+
+    def _obter_ou_criar_sessao(self, funcionario_id: int, sessao_id: str) -> ChatSessao:
+        sessao = self._sessao(funcionario_id, sessao_id)
+        if sessao:
+            return sessao
+        self._liberar_vaga(funcionario_id)
+        sessao = ChatSessao(funcionario_id=funcionario_id, sessao_id=sessao_id, total_mensagens=0)
+        try:
+            with db.session.begin_nested():
+                db.session.add(sessao)
+        except IntegrityError:
+            # Outro worker criou a mesma sessão no intervalo
+            sessao = self._sessao(funcionario_id, sessao_id)
+        return sessao
+
+    def _podar(self, sessao: ChatSessao):
+        """Mantém apenas as últimas `mensagens_por_sessao` mensagens da sessão"""
+        corte = (
+            db.session.query(ChatMensagem.id)
+            .filter_by(sessao_pk=sessao.id)
+            .order_by(ChatMensagem.id.desc())
+            .offset(self.mensagens_por_sessao - 1)
+            .limit(1)
+            .scalar()
+        )
+        if corte is None:
+            return
+        ChatMensagem.query.filter(
+            ChatMensagem.sessao_pk == sessao.id,
+            ChatMensagem.id < corte
+        ).delete(synchronize_session=False)
+        sessao.total_mensagens = self.mensagens_por_sessao
+
+    # -------------------------------------------------
+    # Operações
+    # -------------------------------------------------
+
+    def adicionar(self, funcionario_id: int, sessao_id: str, remetente: str, texto: str,
+                  mensagem_uuid: Optional[str] = None) -> Dict:
+        """Grava uma mensagem na sessão (criando-a se preciso) e faz commit"""
+        agora = datetime.utcnow()
+        try:
+            sessao = self._obter_ou_criar_sessao(funcionario_id, sessao_id)
+            versao_anterior = sessao.ultima_mensagem_id
+
+            mensagem = ChatMensagem(
+                sessao_pk=sessao.id,
+                uuid=mensagem_uuid or str(uuid.uuid4()),
+                remetente=remetente,
+                mensagem=texto,
+                criado_em=agora
+            )
+            db.session.add(mensagem)
+            db.session.flush()
+
+            sessao.ultima_mensagem = texto
+            sessao.ultima_mensagem_em = agora
+            sessao.ultima_mensagem_id = mensagem.id
+            # Incremento no banco: gravações simultâneas de outros workers não se perdem
+            sessao.total_mensagens = ChatSessao.total_mensagens + 1
+            db.session.flush()
+            if sessao.total_mensagens > self.mensagens_por_sessao + _FOLGA_PODA:
+                self._podar(sessao)
+
+            dados = _serializar(mensagem, funcionario_id, sessao_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        chave = (funcionario_id, sessao_id)
+        with self._lock:
+            buffer = self._buffers.get(chave)
+            if buffer is not None:
+                if buffer.versao == versao_anterior:
+                    buffer.mensagens.append(dados)
+                    buffer.versao = dados['_versao']
+                    self._buffers.move_to_end(chave)
+                else:
+                    del self._buffers[chave]
+        return _publico(dados)
+
+    def mensagens(self, funcionario_id: int, sessao_id: str, limite: int = 50) -> List[Dict]:
+        """Últimas `limite` mensagens da sessão, da mais antiga para a mais recente"""
+        limite = max(1, min(limite, self.mensagens_por_sessao))
+        chave = (funcionario_id, sessao_id)
+
+        sessao = self._sessao(funcionario_id, sessao_id)
+        if sessao is None:
+            self._descartar_buffer(chave)
+            return []
+
+        with self._lock:
+            buffer = self._buffers.get(chave)
+            if buffer is not None and buffer.versao == sessao.ultima_mensagem_id:
+                self._buffers.move_to_end(chave)
+                recentes = list(buffer.mensagens)[-limite:]
+                return [_publico(dados) for dados in recentes]
+
+        linhas = (
+            ChatMensagem.query
+            .filter_by(sessao_pk=sessao.id)
+            .order_by(ChatMensagem.id.desc())
+            .limit(self.mensagens_por_sessao)
+            .all()
+        )
+        linhas.reverse()
+        carregadas = [_serializar(linha, funcionario_id, sessao_id) for linha in linhas]
+        # A versão é a do registro da sessão, lido antes das mensagens: se outro
+        # worker gravou no meio, a próxima leitura apenas recarrega
+        self._guardar_buffer(chave, _Buffer(sessao.ultima_mensagem_id, carregadas, self.mensagens_por_sessao))
+        return [_publico(dados) for dados in carregadas[-limite:]]
+
+    @staticmethod
+    def sessoes(funcionario_id: int) -> List[Dict]:
+        """Sessões do funcionário, da usada mais recentemente para a mais antiga"""
+        sessoes = (
+            ChatSessao.query
+            .filter_by(funcionario_id=funcionario_id)
+            .order_by(ChatSessao.ultima_mensagem_em.desc())
+            .all()
+        )
+        return [sessao.to_json() for sessao in sessoes]
+
+    def limpar(self, funcionario_id: int, sessao_id: str) -> bool:
+        """Remove a sessão e suas mensagens; retorna False se ela não existia"""
+        sessao = self._sessao(funcionario_id, sessao_id)
+        existia = sessao is not None
+        if existia:
+            try:
+                self._remover_sessoes([sessao.id])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        self._descartar_buffer((funcionario_id, sessao_id))
+        return existia
+
+
+def _serializar(mensagem: ChatMensagem, funcionario_id: int, sessao_id: str) -> Dict:
+    return {
+        'id': mensagem.uuid,
+        'user_id': str(funcionario_id),
+        'message': mensagem.mensagem,
+        'sender': mensagem.remetente,
+        'timestamp': mensagem.criado_em.isoformat(),
+        'session_id': sessao_id,
+        '_versao': mensagem.id
+    }
+
+
+def _publico(dados: Dict) -> Dict:
+    """Cópia sem os campos internos do buffer"""
+    return {campo: valor for campo, valor in dados.items() if campo != '_versao'}
+
+
+# Instância global do histórico
+chat_store = ChatStore()
@@ -0,0 +1,147 @@
+"""
+Canal de eventos em tempo real (Server-Sent Events).
+
+Um broker em memória mantém, por funcionário conectado, uma fila de eventos.
+As views e os listeners do SQLAlchemy publicam eventos (notificações novas,
+decisões de aprovação, respostas do chat) e o endpoint `/api/eventos/stream`
+os transmite. Eventos ligados a gravações no banco são registrados na sessão
+e só publicados após o commit, para que o cliente nunca receba algo que
+acabou desfeito por um rollback.
+
+O broker é local ao processo: com vários workers, cada cliente recebe os
+eventos gerados no worker em que está conectado, e o TTL dos contadores de
+notificação cobre a diferença.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterator, Optional, Set
+
+
+# Intervalo dos comentários de keep-alive enviados a conexões ociosas
+SSE_HEARTBEAT_SEGUNDOS = int(os.getenv('SSE_HEARTBEAT_SEGUNDOS', '15'))
+
+# Uma conexão é encerrada após este tempo; o EventSource reconecta sozinho
+SSE_DURACAO_MAXIMA_SEGUNDOS = int(os.getenv('SSE_DURACAO_MAXIMA_SEGUNDOS', '1800'))
+
+# Espera sugerida ao navegador antes de reconectar (ms)
+SSE_RETRY_MS = 5000
+
+# Eventos guardados por conexão enquanto o cliente não consome
+TAMANHO_FILA = 100
+
+# Destino especial: todos os gerentes conectados
+GERENTES = 'gerentes'
+
+CHAVE_SESSAO = 'eventos_pendentes'
+
+
+class Assinatura:
+    """Conexão SSE de um funcionário"""
+
+    def __init__(self, funcionario_id: int, gerente: bool = False):
+        self.funcionario_id = funcionario_id
+        self.gerente = gerente
+        self.fila: queue.Queue = queue.Queue(maxsize=TAMANHO_FILA)
+
+    def entregar(self, mensagem: str):
+        try:
+            self.fila.put_nowait(mensagem)
+        except queue.Full:
+            # Cliente lento: descarta o evento mais antigo em vez de bloquear quem publica
+            try:
+                self.fila.get_nowait()
+            except queue.Empty:
+                pass
+            self.fila.put_nowait(mensagem)
+
+
+class BrokerEventos:
+    """Distribui eventos às conexões SSE abertas neste processo"""
+
+    def __init__(self):
+        self._assinaturas: Dict[int, Set[Assinatura]] = {}
+        self._lock = threading.Lock()
+        self._sequencia = 0
+
+    def assinar(self, funcionario_id: int, gerente: bool = False) -> Assinatura:
+        assinatura = Assinatura(funcionario_id, gerente)
+        with self._lock:
+            self._assinaturas.setdefault(funcionario_id, set()).add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura):
+        with self._lock:
+            conexoes = self._assinaturas.get(assinatura.funcionario_id)
+            if conexoes:
+                conexoes.discard(assinatura)
+                if not conexoes:
+                    del self._assinaturas[assinatura.funcionario_id]
+
+    def conexoes(self) -> int:
+        with self._lock:
+            return sum(len(conexoes) for conexoes in self._assinaturas.values())
+
+    def publicar(self, destino, evento: str, dados: dict):
+        """Envia o evento a um funcionário (id) ou a todos os gerentes (GERENTES)"""
+        with self._lock:
+            self._sequencia += 1
+            mensagem = formatar_evento(evento, dados, self._sequencia)
+            if destino == GERENTES:
+                alvos = [a for conexoes in self._assinaturas.values() for a in conexoes if a.gerente]
+            else:
+                alvos = list(self._assinaturas.get(int(destino), ()))
+        for assinatura in alvos:
+            assinatura.entregar(mensagem)
+
+    def transmitir(self, assinatura: Assinatura,
+                   heartbeat: float = SSE_HEARTBEAT_SEGUNDOS,
+                   duracao_maxima: float = SSE_DURACAO_MAXIMA_SEGUNDOS) -> Iterator[str]:
+        """Gera o corpo text/event-stream da conexão até ela expirar ou o cliente sair"""
+        limite = time.monotonic() + duracao_maxima
+        try:
+            yield f'retry: {SSE_RETRY_MS}\n\n'
+            yield formatar_evento('conectado', {'funcionario_id': assinatura.funcionario_id})
+            while True:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    yield assinatura.fila.get(timeout=min(heartbeat, restante))
+                except queue.Empty:
+                    # Comentário SSE: mantém proxies e o navegador com a conexão aberta
+                    yield ': ping\n\n'
+        finally:
+            self.cancelar(assinatura)
+
+
+def formatar_evento(evento: str, dados: dict, evento_id: Optional[int] = None) -> str:
+    linhas = []
+    if evento_id is not None:
+        linhas.append(f'id: {evento_id}')
+    linhas.append(f'event: {evento}')
+    linhas.append(f'data: {json.dumps(dados, ensure_ascii=False, default=str)}')
+    return '\n'.join(linhas) + '\n\n'
+
+
+def publicar_apos_commit(session, destino, evento: str, dados: dict):
+    """Agenda o evento para ser publicado quando a sessão fizer commit"""
+    session.info.setdefault(CHAVE_SESSAO, []).append((destino, evento, dados))
+
+
+def publicar_pendentes(session):
+    """Publica os eventos agendados na sessão (chamado no after_commit)"""
+    for destino, evento, dados in session.info.pop(CHAVE_SESSAO, ()):
+        broker.publicar(destino, evento, dados)
+
+
+def descartar_pendentes(session):
+    """Descarta os eventos agendados (chamado no after_rollback)"""
+    session.info.pop(CHAVE_SESSAO, None)
+
+
+# Instância global do broker
+broker = BrokerEventos()
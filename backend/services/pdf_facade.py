@@ -0,0 +1,39 @@
+"""
+Acesso preguiçoso ao motor de PDF.
+
+`services.pdf_generator` importa weasyprint (com fontTools, PIL, pydyf etc.)
+e cria o gerador global. Importar este módulo não carrega nada disso: o motor
+só é importado na primeira vez que um atributo do gerador é usado, então
+workers que nunca geram PDF não pagam esse custo de inicialização e memória.
+"""
+
+import threading
+
+_estado = {'gerador': None}
+_lock = threading.Lock()
+
+
+def obter_gerador():
+    """Importa o motor de PDF no primeiro uso e devolve o gerador global"""
+    if _estado['gerador'] is None:
+        with _lock:
+            if _estado['gerador'] is None:
+                from services.pdf_generator import pdf_generator as gerador
+                _estado['gerador'] = gerador
+    return _estado['gerador']
+
+
+def motor_carregado() -> bool:
+    """Indica se o motor de PDF já foi importado neste processo"""
+    return _estado['gerador'] is not None
+
+
+class _GeradorPreguicoso:
+    """Repassa atributos ao `PropostaPDFGenerator` real, carregando-o sob demanda"""
+
+    def __getattr__(self, nome):
+        return getattr(obter_gerador(), nome)
+
+
+# Substituto de `services.pdf_generator.pdf_generator` para quem importa no carregamento do módulo
+pdf_generator = _GeradorPreguicoso()
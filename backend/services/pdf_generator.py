@@ -5,12 +5,23 @@ Layout 100% idêntico ao HTML original usando weasyprint.
 """
 
 import os
+import re
+import math
+import io
 import json
-import shutil
+import base64
+import hashlib
+import logging
+import threading
 from datetime import datetime
 from jinja2 import Environment, FileSystemLoader
 import weasyprint
-from reportlab.lib import colors
+from weasyprint.text.fonts import FontConfiguration
+
+from services.pdf_storage import DIRETORIO_PDFS, caminho_pdf
+
+# Logger do módulo: a renderização também roda nos processos do pool, sem app Flask
+logger = logging.getLogger(__name__)
 
 # Importações condicionais para evitar erros
 try:
@@ -23,17 +34,44 @@ try:
 except ImportError:
     MODELS_AVAILABLE = False
 
+# Versão do pipeline de renderização; incremente ao mudar opções do weasyprint
+# para invalidar os PDFs já gerados
+VERSAO_RENDER = '3'
+
+NOME_TEMPLATE = 'modelo_pdf.html'
+
+# Otimização da saída: imagens reamostradas para a resolução de impressão,
+# JPEG recomprimido e fontes subconjuntadas sem hinting
+PDF_OTIMIZAR = os.getenv('PDF_OTIMIZAR', '1') != '0'
+PDF_DPI = int(os.getenv('PDF_DPI', '120'))
+PDF_QUALIDADE_JPEG = int(os.getenv('PDF_QUALIDADE_JPEG', '85'))
+
+# Tamanho esperado de um PDF de proposta; acima disso o arquivo é reportado
+PDF_ORCAMENTO_KB = int(os.getenv('PDF_ORCAMENTO_KB', '250'))
+
+# Largura da logo no template (.header-right ocupa 1/3 da página de 800px);
+# a imagem embutida não precisa de mais pixels que isso em PDF_DPI
+LOGO_LARGURA_CSS_PX = 260
+LOGO_TAMANHO_MAXIMO = math.ceil(LOGO_LARGURA_CSS_PX * PDF_DPI / 96)
+
 
 class PropostaPDFGenerator:
     """Gerador de PDF usando Jinja2 templates e weasyprint para layout HTML idêntico"""
     
     def __init__(self):
-        self.upload_dir = os.path.join(os.getcwd(), 'uploads', 'pdfs')
+        self.upload_dir = DIRETORIO_PDFS
         os.makedirs(self.upload_dir, exist_ok=True)
         
         # Configurar Jinja2 com suporte ao Flask
-        template_dir = os.path.join(os.path.dirname(__file__), '..', 'templates')
-        self.jinja_env = Environment(loader=FileSystemLoader(template_dir))
+        # (sem auto_reload: o template é recompilado apenas quando o mtime muda, ver _template)
+        self.template_dir = os.path.join(os.path.dirname(__file__), '..', 'templates')
+        self.jinja_env = Environment(loader=FileSystemLoader(self.template_dir), auto_reload=False)
+        
+        # Contexto de renderização "quente", montado no primeiro uso
+        self._template_cache = None  # (mtime, template compilado)
+        self._logo_origem = None     # caminho da logo original, resolvido uma vez
+        self._logo_cache = None      # (caminho, mtime, data URI)
+        self._contexto_lock = threading.Lock()
         
         # Adicionar funções Flask ao Jinja2
         self._setup_flask_functions()
@@ -50,22 +88,17 @@ class PropostaPDFGenerator:
             'site': 'www.christino.com.br'
         }
         
-        # Cores baseadas no design HTML
+        # Cores baseadas no design HTML (o layout em si vem do CSS do template)
         self.cores = {
-            'preto': colors.Color(0.13, 0.13, 0.13),  # #222
-            'cinza_escuro': colors.Color(0.2, 0.2, 0.2),  # #333
-            'cinza_medio': colors.Color(0.67, 0.67, 0.67),  # #aaa
-            'fundo_header': colors.Color(0.94, 0.93, 0.92),  # #f0eeea
-            'fundo_tabela': colors.Color(0.98, 0.98, 0.98),  # #fbfbfa
-            'fundo_total': colors.Color(0.94, 0.94, 0.94),  # #efefef
-            'laranja': colors.Color(0.96, 0.48, 0.11),  # #f47a1c
-            'branco': colors.white
+            'preto': '#222222',
+            'cinza_escuro': '#333333',
+            'cinza_medio': '#aaaaaa',
+            'fundo_header': '#f0eeea',
+            'fundo_tabela': '#fbfbfa',
+            'fundo_total': '#efefef',
+            'laranja': '#f47a1c',
+            'branco': '#ffffff'
         }
-        
-        # Testar logo na inicialização
-        logo_path = self._find_logo_path()
-        if not logo_path:
-            print("⚠️ Logo não encontrada na inicialização - usando fallback")
     
     def _setup_flask_functions(self):
         """Configura funções Flask no Jinja2"""
@@ -102,45 +135,122 @@ class PropostaPDFGenerator:
         
         self.jinja_env.filters['currency'] = format_currency
     
+    def _template(self):
+        """Template compilado, recompilado apenas quando o arquivo muda"""
+        mtime = os.stat(os.path.join(self.template_dir, NOME_TEMPLATE)).st_mtime_ns
+        with self._contexto_lock:
+            if self._template_cache is None or self._template_cache[0] != mtime:
+                self.jinja_env.cache.clear()
+                self._template_cache = (mtime, self.jinja_env.get_template(NOME_TEMPLATE))
+            return self._template_cache[1]
+    
+    def _logo_data_uri(self):
+        """
+        Logo reduzida e embutida como data URI.
+        
+        O caminho é procurado uma única vez; a imagem só é reprocessada quando
+        o mtime do arquivo muda.
+        """
+        with self._contexto_lock:
+            if not self._logo_origem or not os.path.exists(self._logo_origem):
+                self._logo_origem = self._find_logo_path()
+                if not self._logo_origem:
+                    return None
+            
+            mtime = os.stat(self._logo_origem).st_mtime_ns
+            if self._logo_cache and self._logo_cache[:2] == (self._logo_origem, mtime):
+                return self._logo_cache[2]
+            
+            with open(self._logo_origem, 'rb') as f:
+                conteudo = f.read()
+            try:
+                from PIL import Image
+                with Image.open(io.BytesIO(conteudo)) as img:
+                    # Se a imagem for muito grande, reduzir para otimizar o PDF
+                    if max(img.size) > LOGO_TAMANHO_MAXIMO:
+                        img.thumbnail((LOGO_TAMANHO_MAXIMO, LOGO_TAMANHO_MAXIMO), Image.Resampling.LANCZOS)
+                        buffer = io.BytesIO()
+                        img.save(buffer, 'PNG', optimize=True)
+                        conteudo = buffer.getvalue()
+            except Exception as e:
+                logger.warning(f"Não foi possível reduzir a logo, usando original: {e}")
+            
+            data_uri = 'data:image/png;base64,' + base64.b64encode(conteudo).decode('ascii')
+            self._logo_cache = (self._logo_origem, mtime, data_uri)
+            return data_uri
+    
+    def _versao_assets(self) -> str:
+        """Versão do pipeline e das opções de saída (a logo já está embutida no HTML)"""
+        opcoes = json.dumps(opcoes_pdf(), sort_keys=True)
+        return f'{VERSAO_RENDER}|{weasyprint.__version__}|{opcoes}'
+    
+    def chave_conteudo(self, html_content: str) -> str:
+        """
+        Hash do HTML renderizado + versões dos assets.
+        
+        O HTML já reflete os dados da proposta e o template; se a chave não
+        mudou, o PDF existente é idêntico ao que seria gerado.
+        """
+        digest = hashlib.sha256()
+        digest.update(self._versao_assets().encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(html_content.encode('utf-8'))
+        return digest.hexdigest()[:20]
+    
+    def renderizar_html(self, template_data: dict) -> str:
+        """Renderiza o template com dados já preparados (propostas, prévias, benchmark)"""
+        dados = {'empresa': self.empresa, 'logo_src': self._logo_data_uri(), **template_data}
+        return self._template().render(**dados)
+    
+    def preparar_renderizacao(self, proposta_id: int):
+        """
+        Consulta a proposta e monta o HTML final (etapa rápida, feita no processo da API).
+        
+        Retorna `(html_content, caminho_arquivo)`. O nome do arquivo é derivado
+        do conteúdo (`<lote>/<id>/proposta_<numero>_<hash>.pdf`, ver
+        services/pdf_storage.py): se ele já existe, é o PDF
+        atual e não precisa ser renderizado de novo. A conversão para PDF fica
+        a cargo de `renderizar_pdf`, que pode rodar em outro processo.
+        """
+        from flask import current_app
+        with current_app.app_context():
+            proposta = Proposta.query.filter_by(id=proposta_id, ativo=True).first()
+            if not proposta:
+                raise ValueError(f"Proposta {proposta_id} não encontrada")
+            
+            # Preparar dados para o template
+            template_data = self._preparar_dados_template(proposta)
+            
+            # Renderizar HTML com Jinja2
+            html_content = self._template().render(**template_data)
+            
+            nome_arquivo = f"proposta_{proposta.numero}_{self.chave_conteudo(html_content)}.pdf"
+            return html_content, caminho_pdf(proposta.id, nome_arquivo, self.upload_dir)
+    
     def gerar_pdf_proposta(self, proposta_id: int) -> str:
         """Gera PDF da proposta usando Jinja2 template"""
         try:
             if not MODELS_AVAILABLE:
                 return self.gerar_pdf_proposta_temp()
             
-            from flask import current_app
-            with current_app.app_context():
-                proposta = Proposta.query.filter_by(id=proposta_id, ativo=True).first()
-                if not proposta:
-                    raise ValueError(f"Proposta {proposta_id} não encontrada")
-                
-                # Preparar dados para o template
-                template_data = self._preparar_dados_template(proposta)
-                
-                # Renderizar HTML com Jinja2
-                template = self.jinja_env.get_template('modelo_pdf.html')
-                html_content = template.render(**template_data)
-                
-                # Gerar PDF a partir do HTML
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                nome_arquivo = f"proposta_{proposta.numero}_{timestamp}.pdf"
-                caminho_arquivo = os.path.join(self.upload_dir, nome_arquivo)
-                
-                # Usar weasyprint para gerar PDF
-                self._gerar_pdf_from_html(html_content, caminho_arquivo)
-                
+            html_content, caminho_arquivo = self.preparar_renderizacao(proposta_id)
+            
+            # Conteúdo inalterado: reaproveitar o PDF já gerado
+            if os.path.exists(caminho_arquivo):
                 return caminho_arquivo
+            
+            # Usar weasyprint para gerar PDF
+            self._gerar_pdf_from_html(html_content, caminho_arquivo)
+            
+            return caminho_arquivo
                 
         except Exception as e:
-            print(f"Erro ao gerar PDF: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Erro ao gerar PDF: {e}")
             return self.gerar_pdf_proposta_temp()
 
     def gerar_pdf_proposta_temp(self) -> str:
-        """Gera PDF temporário com logo acessível"""
-        # Garantir que logo esteja acessível
-        logo_path = self._ensure_logo_accessibility()
+        """Gera PDF temporário com logo embutida"""
+        logo_src = self._logo_data_uri()
         
         template_data = {
             'data_atual': datetime.now().strftime('%d/%m/%Y'),
@@ -169,7 +279,7 @@ class PropostaPDFGenerator:
             'subtotal': 1230.00,
             'proposta': {'valor_total': 1230.00},
             'valor_vista': 1100.00,
-            'logo_path': logo_path  # Usar logo acessível
+            'logo_src': logo_src  # Logo embutida (data URI)
         }
         
         # Renderizar template com contexto Flask
@@ -179,18 +289,10 @@ class PropostaPDFGenerator:
             app.config['SERVER_NAME'] = 'localhost:5000'
             
             with app.app_context():
-                template = self.jinja_env.get_template('modelo_pdf.html')
-                html_content = template.render(**template_data)
+                html_content = self._template().render(**template_data)
         except Exception as e:
-            print(f"⚠️ Erro ao renderizar com Flask context: {e}")
-            print("🔄 Tentando renderização sem Flask context...")
-            template = self.jinja_env.get_template('modelo_pdf.html')
-            html_content = template.render(**template_data)
-        
-        # Salvar HTML para debug
-        debug_path = os.path.join(self.upload_dir, 'debug.html')
-        with open(debug_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            logger.warning(f"Erro ao renderizar com Flask context, tentando sem: {e}")
+            html_content = self._template().render(**template_data)
         
         # Gerar PDF
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -208,8 +310,8 @@ class PropostaPDFGenerator:
         # Calcular subtotal
         subtotal = sum(float(item.valor_total) for item in proposta.itens if item.ativo)
         
-        # Encontrar logo
-        logo_path = self._find_logo_path()
+        # Logo embutida (resolvida e reduzida uma única vez)
+        logo_src = self._logo_data_uri()
         
         # Carregar serviços para cada item
         itens_com_servicos = []
@@ -235,31 +337,21 @@ class PropostaPDFGenerator:
             'itens': itens_com_servicos,
             'subtotal': subtotal,
             'valor_vista': float(proposta.valor_total) * 0.9,
-            'logo_path': logo_path
+            'logo_src': logo_src
         }
         
         
         return template_data
     
     def _gerar_pdf_from_html(self, html_content: str, output_path: str):
-        """Gera PDF usando APENAS o CSS do HTML"""
+        """Gera PDF usando APENAS o CSS do HTML (com as opções de otimização de saída)"""
         try:
-            
-            # Criar documento HTML
-            html_doc = weasyprint.HTML(
-                string=html_content,
-                base_url=os.path.abspath(self.upload_dir),  # Para encontrar assets como logo
-                encoding='utf-8'
-            )
-            
-            # Gerar PDF sem qualquer CSS adicional
-            html_doc.write_pdf(output_path)
-            
-            
+            renderizar_pdf(html_content, output_path, os.path.abspath(self.upload_dir))
+            relatorio = relatorio_tamanho(output_path)
+            if not relatorio['dentro_orcamento']:
+                logger.warning(f"PDF acima do orçamento: {relatorio}")
         except Exception as e:
-            print(f"❌ Erro ao gerar PDF: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Erro ao gerar PDF: {e}")
             raise
     
     def _find_logo_path(self):
@@ -273,14 +365,13 @@ class PropostaPDFGenerator:
         
         # Padrões de busca
         search_patterns = [
+            'templates/assets/Logo_Contabilidade.png',
             'frontend/src/assets/images/Logo_Contabilidade.png',
             'assets/images/Logo_Contabilidade.png',
             'backend/assets/images/Logo_Contabilidade.png',
             'Logo_Contabilidade.png'
         ]
         
-        print("🔍 DEBUG: Procurando logo...")
-        
         for base_dir in base_dirs:
             for pattern in search_patterns:
                 full_path = os.path.join(base_dir, pattern)
@@ -300,75 +391,128 @@ class PropostaPDFGenerator:
         except:
             pass
         
-        print("❌ Logo não encontrada")
+        logger.warning("Logo não encontrada")
         return None
+
+
+# Recursos do weasyprint reaproveitados entre renderizações do mesmo processo
+_RE_STYLE = re.compile(r'<style[^>]*>(.*?)</style>', re.IGNORECASE | re.DOTALL)
+_MAX_FOLHAS_ESTILO = 8
+_weasyprint_contexto = {'font_config': None, 'folhas': {}, 'imagens': {}}
+_weasyprint_lock = threading.Lock()
+
+
+def _contexto_weasyprint(html_content: str):
+    """
+    Separa os blocos <style> do HTML e devolve o CSS já processado.
     
+    O parse do CSS e a FontConfiguration são feitos uma vez por processo; as
+    folhas ficam em cache pelo hash do texto, então uma alteração no template
+    gera uma nova folha automaticamente. Sem outras folhas de autor no
+    documento, aplicar o CSS via `stylesheets` equivale ao <style> embutido.
     
-    
-    def _ensure_logo_accessibility(self):
-        """Garante que a logo esteja em local acessível pelo weasyprint"""
-        logo_path = self._find_logo_path()
-        
-        if not logo_path:
-            print("❌ Logo não encontrada para cópia")
-            return None
+    Retorna `(html_sem_style, [CSS], font_config)`.
+    """
+    with _weasyprint_lock:
+        if _weasyprint_contexto['font_config'] is None:
+            _weasyprint_contexto['font_config'] = FontConfiguration()
+        font_config = _weasyprint_contexto['font_config']
         
-        # Copiar logo para pasta de assets acessível
-        assets_dir = os.path.join(self.upload_dir, 'assets')
-        os.makedirs(assets_dir, exist_ok=True)
+        blocos = _RE_STYLE.findall(html_content)
+        if not blocos:
+            return html_content, [], font_config
         
-        logo_dest = os.path.join(assets_dir, 'logo.png')
-        
-        try:
-            # Verificar se arquivo origem existe e tem conteúdo
-            if os.path.exists(logo_path):
-                file_size = os.path.getsize(logo_path)
-                
-                if file_size == 0:
-                    print("❌ Arquivo origem está vazio!")
-                    return None
-            else:
-                print(f"❌ Arquivo origem não existe: {logo_path}")
-                return None
-            
-            # Copiar arquivo
-            shutil.copy2(logo_path, logo_dest)
-            
-            # Verificar se cópia foi bem-sucedida
-            if os.path.exists(logo_dest):
-                copied_size = os.path.getsize(logo_dest)
-                
-                if copied_size != file_size:
-                    return None
-                
-                # Verificar se arquivo é uma imagem válida e otimizar se necessário
-                try:
-                    from PIL import Image
-                    with Image.open(logo_dest) as img:
-                        
-                        # Se a imagem for muito grande, redimensionar para otimizar o PDF
-                        max_size = 300  # Tamanho máximo para logo no PDF
-                        if img.size[0] > max_size or img.size[1] > max_size:
-                            img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-                            img.save(logo_dest, 'PNG', optimize=True)
-                            
-                except Exception as e:
-                    print(f"❌ Arquivo não é uma imagem válida: {e}")
-                    return None
-                
-                # Retornar caminho relativo para o template (weasyprint funciona melhor com caminhos relativos)
-                relative_path = os.path.relpath(logo_dest, self.upload_dir)
-                # Para o WeasyPrint, usar caminho relativo simples
-                return relative_path.replace('\\', '/')
-            else:
-                print(f"❌ Falha na cópia - arquivo destino não existe: {logo_dest}")
-                return None
-                
-        except Exception as e:
-            print(f"❌ Erro ao copiar logo: {e}")
-            import traceback
-            traceback.print_exc()
-            return logo_path
+        css_texto = '\n'.join(blocos)
+        chave = hashlib.sha1(css_texto.encode('utf-8')).hexdigest()
+        folhas = _weasyprint_contexto['folhas']
+        folha = folhas.get(chave)
+        if folha is None:
+            if len(folhas) >= _MAX_FOLHAS_ESTILO:
+                folhas.clear()
+            folha = folhas[chave] = weasyprint.CSS(string=css_texto, font_config=font_config)
+    
+    return _RE_STYLE.sub('', html_content), [folha], font_config
+
+
+def opcoes_pdf(otimizar: bool = None) -> dict:
+    """Opções de saída do write_pdf (`otimizar=False` reproduz os padrões do weasyprint)"""
+    if otimizar is None:
+        otimizar = PDF_OTIMIZAR
+    if not otimizar:
+        return {}
+    return {
+        'optimize_images': True,
+        'dpi': PDF_DPI,
+        'jpeg_quality': PDF_QUALIDADE_JPEG,
+        'full_fonts': False,
+        'hinting': False,
+    }
+
+
+def relatorio_tamanho(caminho: str) -> dict:
+    """Tamanho do PDF comparado ao orçamento PDF_ORCAMENTO_KB"""
+    tamanho = os.path.getsize(caminho)
+    return {
+        'arquivo': os.path.basename(caminho),
+        'tamanho_bytes': tamanho,
+        'orcamento_bytes': PDF_ORCAMENTO_KB * 1024,
+        'dentro_orcamento': tamanho <= PDF_ORCAMENTO_KB * 1024,
+    }
+
+
+def renderizar_pdf(html_content: str, output_path: str, base_url: str, otimizar: bool = None) -> str:
+    """
+    Converte o HTML em PDF com weasyprint e grava em `output_path`.
+    
+    Função de módulo (e não método) para poder ser executada nos processos
+    do pool da fila de PDFs. O identificador do PDF é derivado do HTML, para
+    que o mesmo conteúdo gere sempre o mesmo arquivo, e a gravação passa por
+    um arquivo temporário para que um PDF incompleto nunca pareça estar em cache.
+    """
+    # O diretório da proposta pode ter sido removido vazio pela coleta de lixo
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    caminho_temporario = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        _escrever_pdf(html_content, base_url, caminho_temporario, otimizar)
+        os.replace(caminho_temporario, output_path)
+    finally:
+        if os.path.exists(caminho_temporario):
+            os.remove(caminho_temporario)
+    return output_path
+
+
+def renderizar_pdf_bytes(html_content: str, base_url: str) -> bytes:
+    """Converte o HTML em PDF apenas em memória (prévias: nada é gravado em disco)"""
+    return _escrever_pdf(html_content, base_url, None)
+
+
+def _escrever_pdf(html_content: str, base_url: str, destino, otimizar: bool = None):
+    """Renderiza com o contexto do processo; `destino=None` devolve os bytes"""
+    identificador = hashlib.md5(html_content.encode('utf-8')).hexdigest().encode('ascii')
+    html_sem_estilo, folhas_estilo, font_config = _contexto_weasyprint(html_content)
+    
+    # Criar documento HTML
+    html_doc = weasyprint.HTML(
+        string=html_sem_estilo,
+        base_url=base_url,
+        encoding='utf-8'
+    )
+    
+    # Imagens decodificadas são reaproveitadas entre renderizações; cada
+    # conjunto de opções tem o seu cache, já que a imagem guarda as opções
+    opcoes = opcoes_pdf(otimizar)
+    with _weasyprint_lock:
+        cache_imagens = _weasyprint_contexto['imagens'].setdefault(json.dumps(opcoes, sort_keys=True), {})
+    
+    # Gerar PDF com o CSS do próprio template, já pré-processado
+    return html_doc.write_pdf(
+        destino,
+        stylesheets=folhas_estilo,
+        font_config=font_config,
+        pdf_identifier=identificador,
+        cache=cache_imagens,
+        **opcoes
+    )
 
 
 # Instância global do gerador
@@ -387,9 +531,7 @@ def test_pdf_generation():
             return False
             
     except Exception as e:
-        print(f"❌ Erro no teste: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Erro no teste: {e}")
         return False
 
 if __name__ == "__main__":
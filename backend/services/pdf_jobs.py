@@ -0,0 +1,236 @@
+"""
+Fila de geração de PDFs em segundo plano.
+
+O HTML da proposta é montado no processo da API (consultas ao banco + Jinja,
+etapa rápida) e apenas a conversão com weasyprint, que consome segundos de
+CPU, roda em um pool de processos. Pedidos repetidos para a mesma proposta,
+enquanto o job anterior não terminou, reaproveitam o mesmo job. Ao concluir,
+os campos `pdf_gerado`, `pdf_caminho` e `pdf_data_geracao` da proposta são
+atualizados dentro do contexto da aplicação que enfileirou o job.
+
+Como o nome do arquivo é derivado do conteúdo, um job cujo PDF já existe é
+concluído na hora, sem passar pelo pool.
+
+Os jobs ficam em memória no processo da API que os criou.
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, Optional
+
+from flask import current_app
+
+
+# Processos dedicados à renderização
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', str(min(2, os.cpu_count() or 1))))
+
+# Tempo que jobs finalizados continuam consultáveis
+JOB_RETENCAO_SEGUNDOS = 3600
+
+STATUS_PENDENTE = 'pendente'
+STATUS_PROCESSANDO = 'processando'
+STATUS_CONCLUIDO = 'concluido'
+STATUS_ERRO = 'erro'
+
+
+class PdfJob:
+    """Estado de uma geração de PDF enfileirada"""
+
+    def __init__(self, proposta_id: int):
+        self.id = uuid.uuid4().hex
+        self.proposta_id = proposta_id
+        self.status = STATUS_PENDENTE
+        self.pdf_caminho: Optional[str] = None
+        self.erro: Optional[str] = None
+        self.criado_em = datetime.now()
+        self.concluido_em: Optional[datetime] = None
+        self.tamanho: Optional[dict] = None  # relatório de tamanho x orçamento do PDF
+        self._finalizado = threading.Event()
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+
+    @property
+    def finalizado(self) -> bool:
+        return self._finalizado.is_set()
+
+    def aguardar(self, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até o job terminar (ou estourar o timeout)"""
+        return self._finalizado.wait(timeout)
+
+    def ao_finalizar(self, callback):
+        """Chama `callback(job)` quando o job terminar (na hora, se já terminou)"""
+        with self._callbacks_lock:
+            if not self._finalizado.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _marcar_finalizado(self):
+        with self._callbacks_lock:
+            self._finalizado.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def to_json(self):
+        return {
+            'job_id': self.id,
+            'proposta_id': self.proposta_id,
+            'status': self.status,
+            'pdf_caminho': self.pdf_caminho,
+            'erro': self.erro,
+            'tamanho_bytes': self.tamanho['tamanho_bytes'] if self.tamanho else None,
+            'dentro_orcamento': self.tamanho['dentro_orcamento'] if self.tamanho else None,
+            'criado_em': self.criado_em.isoformat(),
+            'concluido_em': self.concluido_em.isoformat() if self.concluido_em else None
+        }
+
+
+class FilaPdf:
+    """Fila de jobs de PDF com deduplicação por proposta"""
+
+    def __init__(self, max_workers: int = PDF_WORKERS):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, PdfJob] = {}
+        self._ativos: Dict[int, str] = {}  # proposta_id -> job_id em andamento
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Criado no primeiro uso: workers que nunca geram PDF não sobem processos
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _limpar_antigos(self):
+        limite = time.time() - JOB_RETENCAO_SEGUNDOS
+        for job_id, job in list(self._jobs.items()):
+            if job.finalizado and job.concluido_em.timestamp() < limite:
+                del self._jobs[job_id]
+
+    def obter(self, job_id: str) -> Optional[PdfJob]:
+        return self._jobs.get(job_id)
+
+    def enfileirar(self, proposta_id: int) -> PdfJob:
+        """
+        Enfileira a geração do PDF da proposta.
+
+        Se já existe um job pendente para a mesma proposta, ele é retornado
+        em vez de criar outro.
+        """
+        from services.pdf_facade import obter_gerador
+        from services.pdf_generator import renderizar_pdf
+        pdf_generator = obter_gerador()
+
+        with self._lock:
+            self._limpar_antigos()
+            job_id = self._ativos.get(proposta_id)
+            if job_id:
+                return self._jobs[job_id]
+
+            job = PdfJob(proposta_id)
+            self._jobs[job.id] = job
+            self._ativos[proposta_id] = job.id
+
+        app = current_app._get_current_object()
+        try:
+            html_content, caminho_arquivo = pdf_generator.preparar_renderizacao(proposta_id)
+            if os.path.exists(caminho_arquivo):
+                # PDF do mesmo conteúdo já existe: nada a renderizar
+                self._finalizar(app, job, caminho=caminho_arquivo)
+                return job
+            with self._lock:
+                future = self._pool().submit(
+                    renderizar_pdf, html_content, caminho_arquivo, os.path.abspath(pdf_generator.upload_dir)
+                )
+            job.status = STATUS_PROCESSANDO
+        except Exception as e:
+            self._finalizar(app, job, erro=str(e))
+            return job
+
+        future.add_done_callback(lambda f: self._ao_concluir(app, job, f))
+        return job
+
+    def renderizar_em_memoria(self, html_content: str, timeout: Optional[float] = None) -> bytes:
+        """
+        Renderiza o HTML no pool e devolve os bytes do PDF (prévias).
+
+        Não cria job nem grava arquivo; a requisição aguarda o resultado.
+        """
+        from services.pdf_facade import obter_gerador
+        from services.pdf_generator import renderizar_pdf_bytes
+
+        base_url = os.path.abspath(obter_gerador().upload_dir)
+        with self._lock:
+            future = self._pool().submit(renderizar_pdf_bytes, html_content, base_url)
+        try:
+            return future.result(timeout)
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            raise
+
+    def _ao_concluir(self, app, job: PdfJob, future):
+        """Callback do pool (thread interna do executor)"""
+        try:
+            caminho = future.result()
+        except BrokenProcessPool as e:
+            # Um processo morreu (ex.: falta de memória); o próximo job recria o pool
+            with self._lock:
+                self._executor = None
+            self._finalizar(app, job, erro=f'Pool de renderização interrompido: {e}')
+            return
+        except Exception as e:
+            self._finalizar(app, job, erro=str(e))
+            return
+        self._finalizar(app, job, caminho=caminho)
+
+    def _finalizar(self, app, job: PdfJob, caminho: Optional[str] = None, erro: Optional[str] = None):
+        if caminho:
+            from services.pdf_generator import relatorio_tamanho
+            job.tamanho = relatorio_tamanho(caminho)
+            if not job.tamanho['dentro_orcamento']:
+                app.logger.warning(
+                    f"PDF da proposta {job.proposta_id} acima do orçamento: "
+                    f"{job.tamanho['tamanho_bytes']} > {job.tamanho['orcamento_bytes']} bytes"
+                )
+            try:
+                self._registrar_pdf(app, job.proposta_id, caminho)
+            except Exception as e:
+                caminho, erro = None, f'PDF gerado, mas falhou ao atualizar a proposta: {e}'
+
+        job.pdf_caminho = caminho
+        job.erro = erro
+        job.status = STATUS_ERRO if erro else STATUS_CONCLUIDO
+        job.concluido_em = datetime.now()
+
+        if erro:
+            app.logger.error(f"Job de PDF {job.id} (proposta {job.proposta_id}) falhou: {erro}")
+
+        with self._lock:
+            if self._ativos.get(job.proposta_id) == job.id:
+                del self._ativos[job.proposta_id]
+        job._marcar_finalizado()
+
+    @staticmethod
+    def _registrar_pdf(app, proposta_id: int, caminho: str):
+        """Grava o resultado na proposta (sessão própria, fora da requisição)"""
+        from config import db
+        from models import Proposta
+
+        with app.app_context():
+            proposta = db.session.get(Proposta, proposta_id)
+            if proposta:
+                proposta.pdf_gerado = True
+                proposta.pdf_caminho = caminho
+                proposta.pdf_data_geracao = datetime.now()
+                db.session.commit()
+
+
+# Instância global da fila
+fila_pdf = FilaPdf()
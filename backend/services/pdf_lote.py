@@ -0,0 +1,85 @@
+"""
+Exportação de PDFs em lote como um ZIP transmitido aos poucos.
+
+Cada proposta passa pela fila de PDFs (mesmo pool de processos, mesmo cache
+por conteúdo). O ZIP é escrito à medida que os jobs terminam, na ordem em que
+terminam, e falhas individuais vão para `relatorio.json` dentro do próprio
+ZIP sem interromper o lote.
+"""
+
+import io
+import json
+import os
+import queue
+import time
+import zipfile
+from datetime import datetime
+from typing import Iterator, List
+
+from services.pdf_jobs import PdfJob, STATUS_CONCLUIDO
+
+
+class _BufferSaida(io.RawIOBase):
+    """Destino não pesquisável do ZipFile; os bytes são recolhidos a cada arquivo"""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def recolher(self) -> bytes:
+        dados = b''.join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+def transmitir_zip(jobs: List[PdfJob], timeout: float) -> Iterator[bytes]:
+    """
+    Gera os bytes do ZIP com os PDFs dos jobs, conforme eles terminam.
+
+    `timeout` limita a espera total; jobs ainda em andamento ao fim do prazo
+    são listados como falha no relatório.
+    """
+    concluidos = queue.Queue()
+    for job in jobs:
+        job.ao_finalizar(concluidos.put)
+
+    saida = _BufferSaida()
+    relatorio = {'gerado_em': datetime.now().isoformat(), 'sucesso': [], 'falhas': []}
+    pendentes = {job.id: job for job in jobs}
+    limite = time.monotonic() + timeout
+
+    # PDFs já são comprimidos: armazenar sem nova compressão
+    with zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_STORED) as arquivo_zip:
+        while pendentes:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                job = concluidos.get(timeout=restante)
+            except queue.Empty:
+                break
+            pendentes.pop(job.id, None)
+
+            if job.status == STATUS_CONCLUIDO and job.pdf_caminho and os.path.exists(job.pdf_caminho):
+                nome = os.path.basename(job.pdf_caminho)
+                arquivo_zip.write(job.pdf_caminho, arcname=nome)
+                relatorio['sucesso'].append({'proposta_id': job.proposta_id, 'arquivo': nome})
+            else:
+                relatorio['falhas'].append({
+                    'proposta_id': job.proposta_id,
+                    'erro': job.erro or 'Arquivo PDF não encontrado'
+                })
+            yield saida.recolher()
+
+        for job in pendentes.values():
+            relatorio['falhas'].append({'proposta_id': job.proposta_id, 'erro': 'Tempo esgotado'})
+
+        arquivo_zip.writestr('relatorio.json', json.dumps(relatorio, ensure_ascii=False, indent=2))
+
+    yield saida.recolher()
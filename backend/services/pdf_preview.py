@@ -0,0 +1,103 @@
+"""
+Prévia do PDF a partir do payload do assistente de propostas.
+
+Monta os dados do template direto do JSON enviado pelo frontend (o mesmo
+formato de `POST /propostas`), sem criar proposta, itens ou logs. Nomes,
+descrições e valores dos serviços vêm do snapshot versionado de
+`models.referencias` (sempre na versão atual, sem consulta por prévia); o
+nome do cliente é lido do banco.
+"""
+
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from config import db
+from models import Cliente
+from models.referencias import referencias
+
+
+# Limite de itens aceitos em uma prévia
+MAX_ITENS_PREVIA = 500
+
+_CENTAVOS = Decimal('0.01')
+
+
+def _numero(dados: dict, campo: str, padrao: Decimal) -> Decimal:
+    """Valor numérico do payload como Decimal; `padrao` só quando o campo falta (0 é um valor)"""
+    valor = dados.get(campo)
+    if valor is None or valor == '':
+        return padrao
+    try:
+        numero = Decimal(str(valor))
+    except InvalidOperation:
+        numero = None
+    if numero is None or not numero.is_finite():
+        raise ValueError(f'"{campo}" deve ser numérico')
+    return numero
+
+
+def montar_dados_previa(payload: dict) -> dict:
+    """
+    Converte o payload do assistente nos dados do template do PDF.
+
+    Levanta ValueError para payloads incompletos ou serviços inexistentes.
+    Valores enviados pelo frontend têm prioridade; na falta deles, usa o
+    valor base do serviço.
+    """
+    itens_payload = payload.get('itens') or []
+    if not itens_payload:
+        raise ValueError('Informe ao menos um item para a prévia')
+    if len(itens_payload) > MAX_ITENS_PREVIA:
+        raise ValueError(f'A prévia aceita no máximo {MAX_ITENS_PREVIA} itens')
+
+    try:
+        servico_ids = [int(item['servico_id']) for item in itens_payload]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('Cada item deve informar um servico_id válido')
+
+    servicos = {
+        servico_id: servico for servico_id, servico in
+        ((servico_id, referencias.servico(servico_id)) for servico_id in set(servico_ids))
+        if servico is not None
+    }
+    inexistentes = sorted(set(servico_ids) - servicos.keys())
+    if inexistentes:
+        raise ValueError(f'Serviços não encontrados: {inexistentes}')
+
+    itens, subtotal = [], Decimal('0')
+    for servico_id, item in zip(servico_ids, itens_payload):
+        servico = servicos[servico_id]
+        # Mesmas regras do item gravado: quantidade Numeric(10,2), total = quantidade x unitário
+        quantidade = _numero(item, 'quantidade', Decimal('1'))
+        valor_unitario = _numero(item, 'valor_unitario', Decimal(str(servico['valor_base'] or 0)))
+        valor_total = _numero(item, 'valor_total', (quantidade * valor_unitario).quantize(_CENTAVOS))
+        itens.append({
+            'servico': {'nome': servico['nome'], 'descricao': servico['descricao']},
+            'quantidade': quantidade,
+            'valor_unitario': float(valor_unitario),
+            'valor_total': float(valor_total),
+        })
+        subtotal += valor_total
+
+    percentual_desconto = _numero(payload, 'percentual_desconto', Decimal('0'))
+    valor_total = _numero(
+        payload, 'valor_total', (subtotal * (1 - percentual_desconto / 100)).quantize(_CENTAVOS)
+    )
+
+    cliente = {'nome': payload.get('cliente_nome') or ''}
+    if not cliente['nome'] and payload.get('cliente_id'):
+        cliente['nome'] = db.session.query(Cliente.nome)\
+            .filter(Cliente.id == int(payload['cliente_id'])).scalar() or ''
+
+    return {
+        'data_atual': datetime.now().strftime('%d/%m/%Y'),
+        'cliente': cliente,
+        'proposta': {
+            'valor_total': float(valor_total),
+            'percentual_desconto': float(percentual_desconto),
+            'valor_desconto': float(max(subtotal - valor_total, Decimal('0'))),
+        },
+        'itens': itens,
+        'subtotal': float(subtotal),
+        'valor_vista': float(valor_total) * 0.9,
+    }
@@ -0,0 +1,121 @@
+"""
+Armazenamento dos PDFs de propostas em disco.
+
+Os arquivos ficam em `uploads/pdfs/<lote>/<proposta_id>/`, onde `lote` agrupa
+1000 propostas (`000`, `001`, ...): nenhum diretório acumula milhares de
+entradas e todas as versões de uma proposta ficam juntas. Arquivos antigos do
+layout plano (`uploads/pdfs/*.pdf`) continuam válidos, pois `pdf_caminho`
+guarda o caminho completo.
+
+A coleta de lixo remove arquivos que nenhuma `Proposta.pdf_caminho`
+referencia e que são mais antigos que a janela de retenção (versões
+substituídas, PDFs temporários, restos de renderizações interrompidas).
+"""
+
+import os
+import time
+
+
+DIRETORIO_PDFS = os.path.join(os.getcwd(), 'uploads', 'pdfs')
+
+# Propostas por diretório de lote
+PROPOSTAS_POR_LOTE = 1000
+
+# Arquivos não referenciados são mantidos por este período antes da remoção
+PDF_RETENCAO_DIAS = int(os.getenv('PDF_RETENCAO_DIAS', '30'))
+
+_EXTENSOES = ('.pdf', '.tmp')
+
+
+def caminho_pdf(proposta_id: int, nome_arquivo: str, raiz: str = DIRETORIO_PDFS) -> str:
+    """Caminho do PDF no diretório da proposta (criado se necessário)"""
+    diretorio = os.path.join(raiz, f'{proposta_id // PROPOSTAS_POR_LOTE:03d}', str(proposta_id))
+    os.makedirs(diretorio, exist_ok=True)
+    return os.path.join(diretorio, nome_arquivo)
+
+
+def _varrer(raiz: str):
+    """Arquivos de PDF (e temporários) sob `raiz`: (caminho real, tamanho, mtime)"""
+    for diretorio, _, arquivos in os.walk(raiz):
+        for nome in arquivos:
+            if not nome.endswith(_EXTENSOES):
+                continue
+            caminho = os.path.join(diretorio, nome)
+            try:
+                info = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+            yield os.path.realpath(caminho), info.st_size, info.st_mtime
+
+
+def _referenciados() -> set:
+    """Caminhos (normalizados) gravados em alguma proposta"""
+    from config import db
+    from models import Proposta
+    linhas = db.session.query(Proposta.pdf_caminho).filter(Proposta.pdf_caminho.isnot(None))
+    return {os.path.realpath(caminho) for (caminho,) in linhas}
+
+
+def uso_disco(raiz: str = DIRETORIO_PDFS, retencao_dias: int = PDF_RETENCAO_DIAS) -> dict:
+    """Espaço ocupado pelos PDFs, separado entre referenciados e órfãos"""
+    referenciados = _referenciados()
+    limite = time.time() - retencao_dias * 86400
+    relatorio = {
+        'diretorio': raiz,
+        'retencao_dias': retencao_dias,
+        'total': {'arquivos': 0, 'bytes': 0},
+        'referenciados': {'arquivos': 0, 'bytes': 0},
+        'orfaos': {'arquivos': 0, 'bytes': 0},
+        'orfaos_expirados': {'arquivos': 0, 'bytes': 0},
+    }
+
+    for caminho, tamanho, mtime in _varrer(raiz):
+        grupos = ['total']
+        if caminho in referenciados:
+            grupos.append('referenciados')
+        else:
+            grupos.append('orfaos')
+            if mtime < limite:
+                grupos.append('orfaos_expirados')
+        for grupo in grupos:
+            relatorio[grupo]['arquivos'] += 1
+            relatorio[grupo]['bytes'] += tamanho
+
+    return relatorio
+
+
+def coletar_lixo(raiz: str = DIRETORIO_PDFS, retencao_dias: int = PDF_RETENCAO_DIAS,
+                 simular: bool = False) -> dict:
+    """
+    Remove PDFs não referenciados mais antigos que a retenção.
+
+    Com `simular=True` apenas lista o que seria removido. Diretórios de
+    proposta que ficam vazios também são removidos.
+    """
+    referenciados = _referenciados()
+    limite = time.time() - retencao_dias * 86400
+    removidos, bytes_liberados = [], 0
+
+    for caminho, tamanho, mtime in _varrer(raiz):
+        if caminho in referenciados or mtime >= limite:
+            continue
+        if not simular:
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                continue
+        removidos.append(os.path.relpath(caminho, os.path.realpath(raiz)))
+        bytes_liberados += tamanho
+
+    if not simular:
+        # De baixo para cima: o diretório da proposta antes do diretório do lote
+        for diretorio, _, _ in os.walk(raiz, topdown=False):
+            if diretorio != raiz and not os.listdir(diretorio):
+                os.rmdir(diretorio)
+
+    return {
+        'simulacao': simular,
+        'retencao_dias': retencao_dias,
+        'removidos': removidos,
+        'bytes_liberados': bytes_liberados,
+    }
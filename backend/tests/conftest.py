@@ -0,0 +1,193 @@
+"""
+Fixtures dos testes do backend.
+
+A aplicação é criada uma vez por sessão sobre um SQLite temporário; cada
+teste recria as tabelas e limpa os caches em memória dos módulos, que de
+outra forma guardariam dados do teste anterior.
+"""
+
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from flask import g
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    os.environ['DATABASE_URL'] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'testes.db'}"
+    from config import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        import models  # noqa: F401  (registra modelos e event listeners)
+        from config import db
+
+        @event.listens_for(db.engine, 'connect')
+        def _sem_fsync(conexao, _registro):
+            # Banco descartável: dispensa a sincronização em disco a cada commit
+            conexao.execute('PRAGMA synchronous = OFF')
+
+    @app.before_request
+    def _limpar_g():
+        # As requisições do test client reaproveitam o app context aberto pelo
+        # teste; sem isso `g` (ex.: o funcionário do token) passaria de uma para outra
+        vars(g).clear()
+    return app
+
+
+def _limpar_caches():
+    from models import organizacional, notificacoes, sequencias, referencias, revogacoes
+    from services import chat_bot
+    from services.chat_store import chat_store
+    from views import utils
+
+    organizacional.invalidar_gerentes()
+    organizacional.invalidar_funcionarios()
+    notificacoes.invalidar_contadores()
+    sequencias._blocos.clear()
+    utils._total_cache.clear()
+    referencias.limpar()
+    revogacoes.limpar()
+    chat_store.limpar_cache()
+    chat_bot._catalogo.update(carimbo=None, valor=None)
+    chat_bot.invalidar_pendentes()
+
+
+@pytest.fixture(autouse=True)
+def banco(app):
+    from config import db
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        _limpar_caches()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def contar_consultas(banco):
+    """Conta os comandos SQL executados dentro do bloco `with contar_consultas() as total`"""
+    class _Contador:
+        def __init__(self):
+            self.total = 0
+
+        def _contar(self, *args):
+            self.total += 1
+
+        def __enter__(self):
+            event.listen(banco.engine, 'before_cursor_execute', self._contar)
+            return self
+
+        def __exit__(self, *exc):
+            event.remove(banco.engine, 'before_cursor_execute', self._contar)
+
+    return _Contador
+
+
+@pytest.fixture
+def dados_base(banco):
+    """Empresa, cargo, tipo de atividade, regimes (SN e MEI, ambos vinculados), serviço e cliente"""
+    from models import (
+        Empresa, Cargo, TipoAtividade, RegimeTributario, AtividadeRegime, Servico, Cliente
+    )
+    empresa = Empresa(nome='Escritório', cnpj='00.000.000/0001-00', endereco='Rua A, 1')
+    banco.session.add(empresa)
+    banco.session.flush()
+    cargo = Cargo(codigo='CARGO01', nome='Contador', empresa_id=empresa.id)
+    tipo = TipoAtividade(codigo='SERV', nome='Serviços', aplicavel_pf=False, aplicavel_pj=True)
+    simples = RegimeTributario(codigo='SN', nome='Simples Nacional', aplicavel_pf=False, aplicavel_pj=True)
+    mei = RegimeTributario(codigo='MEI', nome='MEI', aplicavel_pf=False, aplicavel_pj=True)
+    servico = Servico(codigo='CON0001', nome='Contabilidade Mensal', categoria='CONTABIL',
+                      tipo_cobranca='MENSAL', valor_base=Decimal('800.00'))
+    cliente = Cliente(nome='João da Silva', cpf='123.456.789-00', abertura_empresa=True)
+    banco.session.add_all([cargo, tipo, simples, mei, servico, cliente])
+    banco.session.flush()
+    banco.session.add_all([
+        AtividadeRegime(tipo_atividade_id=tipo.id, regime_tributario_id=simples.id),
+        AtividadeRegime(tipo_atividade_id=tipo.id, regime_tributario_id=mei.id),
+    ])
+    banco.session.commit()
+    return {
+        'empresa': empresa, 'cargo': cargo, 'tipo': tipo, 'simples': simples, 'mei': mei,
+        'servico': servico, 'cliente': cliente,
+    }
+
+
+@pytest.fixture
+def criar_funcionario(banco, dados_base):
+    contador = {'n': 0}
+
+    def criar(gerente=False, ativo=True, **campos):
+        from models import Funcionario
+        contador['n'] += 1
+        funcionario = Funcionario(
+            nome=campos.pop('nome', f'Funcionário {contador["n"]}'),
+            email=campos.pop('email', f'funcionario{contador["n"]}@teste.com'),
+            gerente=gerente, ativo=ativo,
+            cargo_id=dados_base['cargo'].id, empresa_id=dados_base['empresa'].id,
+            **campos
+        )
+        funcionario.set_senha('senha123')
+        banco.session.add(funcionario)
+        banco.session.commit()
+        return funcionario
+
+    return criar
+
+
+@pytest.fixture
+def funcionario(criar_funcionario):
+    return criar_funcionario()
+
+
+@pytest.fixture
+def gerente(criar_funcionario):
+    return criar_funcionario(gerente=True)
+
+
+@pytest.fixture
+def auth(app):
+    """Cabeçalho Authorization com um token novo para o funcionário"""
+    def headers(funcionario):
+        with app.app_context():
+            token = create_access_token(identity=str(funcionario.id))
+        return {'Authorization': f'Bearer {token}'}
+    return headers
+
+
+@pytest.fixture
+def criar_proposta(banco, dados_base, funcionario):
+    contador = {'n': 0}
+
+    def criar(itens=1, regime=None, cliente=None, **campos):
+        from models import Proposta, ItemProposta
+        contador['n'] += 1
+        proposta = Proposta(
+            numero=campos.pop('numero', f'2026{contador["n"]:04d}'),
+            cliente_id=(cliente or dados_base['cliente']).id,
+            funcionario_responsavel_id=campos.pop('funcionario_responsavel_id', funcionario.id),
+            tipo_atividade_id=dados_base['tipo'].id,
+            regime_tributario_id=(regime or dados_base['simples']).id,
+            data_validade=datetime.utcnow() + timedelta(days=30),
+            **campos
+        )
+        banco.session.add(proposta)
+        banco.session.flush()
+        for _ in range(itens):
+            banco.session.add(ItemProposta(
+                proposta_id=proposta.id, servico_id=dados_base['servico'].id,
+                quantidade=1, valor_unitario=Decimal('800.00'), valor_total=Decimal('800.00')
+            ))
+        banco.session.commit()
+        return proposta
+
+    return criar
@@ -0,0 +1,97 @@
+"""Busca textual (FTS5) de propostas e clientes"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models import busca, Proposta, Cliente
+
+
+@pytest.fixture(autouse=True)
+def estado_busca():
+    busca._estado.update(disponivel=None, expira_em=None)
+    yield
+    busca._estado.update(disponivel=None, expira_em=None)
+
+
+def _numeros(client, headers, termo):
+    resposta = client.get('/api/propostas/', query_string={'search': termo}, headers=headers)
+    assert resposta.status_code == 200
+    return {p['numero'] for p in resposta.get_json()['items']}
+
+
+def _cpfs(client, headers, termo):
+    resposta = client.get('/api/clientes/', query_string={'search': termo}, headers=headers)
+    assert resposta.status_code == 200
+    return {c['cpf'] for c in resposta.get_json()['items']}
+
+
+def test_indices_criados_com_as_tabelas(client, auth, funcionario, criar_proposta):
+    criar_proposta(numero='20260001', observacoes='Abertura de empresa')
+    criar_proposta(numero='20260002', observacoes='Contabilidade')
+
+    assert _numeros(client, auth(funcionario), 'abertura') == {'20260001'}
+    assert busca._estado['disponivel'] is True
+
+
+def test_trecho_do_numero_da_proposta(client, auth, funcionario, criar_proposta):
+    criar_proposta(numero='20260001')
+    criar_proposta(numero='20260102')
+
+    assert _numeros(client, auth(funcionario), '0001') == {'20260001'}
+    assert _numeros(client, auth(funcionario), '2026') == {'20260001', '20260102'}
+
+
+def test_trecho_do_cpf_e_nome_sem_acento(client, auth, funcionario, dados_base):
+    headers = auth(funcionario)
+
+    assert _cpfs(client, headers, '456.789') == {'123.456.789-00'}
+    assert _cpfs(client, headers, '45678900') == {'123.456.789-00'}
+    assert _cpfs(client, headers, 'joao') == {'123.456.789-00'}
+    assert _cpfs(client, headers, '999') == set()
+
+
+@pytest.mark.parametrize('model, termo', [(Proposta, '0001'), (Cliente, '456.789')])
+def test_busca_nao_varre_a_tabela(banco, model, termo):
+    query, _ = busca.filtrar_busca_textual(model.query, model, termo)
+    sql = str(query.statement.compile(banco.engine, compile_kwargs={'literal_binds': True}))
+
+    plano = [linha[3] for linha in banco.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+    assert f'SCAN {model.__tablename__}' not in plano
+    assert f'SEARCH {model.__tablename__} USING INTEGER PRIMARY KEY (rowid=?)' in plano
+
+
+def test_indice_ausente_e_verificado_de_novo(app, banco, monkeypatch):
+    def sem_tabela(*args, **kwargs):
+        raise OperationalError('SELECT 1', {}, Exception('no such table: proposta_fts'))
+
+    with monkeypatch.context() as m:
+        m.setattr(type(banco.engine), 'connect', sem_tabela)
+        assert busca.busca_textual_disponivel() is False
+    # Dentro do intervalo: continua com ilike, sem consultar
+    assert busca.busca_textual_disponivel() is False
+
+    busca._estado['expira_em'] = 0.0
+    assert busca.busca_textual_disponivel() is True
+
+
+def test_erro_transitorio_nao_desliga_a_busca(app, banco, monkeypatch):
+    def banco_travado(*args, **kwargs):
+        raise OperationalError('SELECT 1', {}, Exception('database is locked'))
+
+    with monkeypatch.context() as m:
+        m.setattr(type(banco.engine), 'connect', banco_travado)
+        assert busca.busca_textual_disponivel() is False
+    assert busca._estado['disponivel'] is None
+
+    assert busca.busca_textual_disponivel() is True
+
+
+def test_sqlite_sem_fts5_desliga_a_busca(app, banco, monkeypatch):
+    def sem_fts5(*args, **kwargs):
+        raise OperationalError('SELECT 1', {}, Exception('no such module: fts5'))
+
+    monkeypatch.setattr(type(banco.engine), 'connect', sem_fts5)
+    assert busca.busca_textual_disponivel() is False
+    assert busca._estado == {'disponivel': False, 'expira_em': None}
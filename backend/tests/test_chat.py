@@ -0,0 +1,34 @@
+"""Endpoints do chat"""
+
+import pytest
+
+
+def test_conversa_do_funcionario(client, auth, funcionario):
+    headers = auth(funcionario)
+
+    resposta = client.post('/api/chat/send-message', json={'message': 'oi', 'session_id': 's1'}, headers=headers)
+    assert resposta.status_code == 200
+    assert resposta.get_json()['bot_response']['sender'] == 'bot'
+
+    mensagens = client.get('/api/chat/messages?session_id=s1', headers=headers).get_json()['messages']
+    assert [m['sender'] for m in mensagens] == ['user', 'bot']
+    assert client.get('/api/chat/sessions', headers=headers).get_json()['sessions'][0]['session_id'] == 's1'
+
+    resposta = client.post('/api/chat/clear-session', json={'session_id': 's1'}, headers=headers)
+    assert resposta.status_code == 200
+    assert client.get('/api/chat/messages?session_id=s1', headers=headers).get_json()['messages'] == []
+
+
+@pytest.mark.parametrize('metodo, url', [
+    ('post', '/api/chat/send-message'),
+    ('get', '/api/chat/messages'),
+    ('get', '/api/chat/sessions'),
+    ('post', '/api/chat/clear-session'),
+])
+def test_funcionario_inativo_nao_usa_o_chat(client, auth, criar_funcionario, metodo, url):
+    inativo = criar_funcionario(ativo=False)
+
+    resposta = getattr(client, metodo)(url, json={'message': 'oi'}, headers=auth(inativo))
+
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] == 'Funcionário não encontrado'
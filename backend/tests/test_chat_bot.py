@@ -0,0 +1,36 @@
+"""Respostas do bot com dados do sistema"""
+
+from decimal import Decimal
+
+from services.chat_bot import responder
+
+
+def test_preco_acompanha_alteracao_do_servico(banco, funcionario, dados_base):
+    assert 'R$ 800,00 (por mês)' in responder('Quanto custa a contabilidade mensal?', funcionario.id)
+
+    dados_base['servico'].valor_base = Decimal('950.00')
+    banco.session.commit()
+
+    assert 'R$ 950,00 (por mês)' in responder('Quanto custa a contabilidade mensal?', funcionario.id)
+
+
+def test_pendentes_do_funcionario(funcionario, gerente, criar_proposta):
+    criar_proposta(status='PENDENTE')
+    criar_proposta(status='PENDENTE')
+    criar_proposta(status='PENDENTE', funcionario_responsavel_id=gerente.id)
+
+    assert responder('Tenho propostas pendentes?', funcionario.id) == 'Você tem 2 propostas pendentes de aprovação.'
+    assert responder('Tenho propostas pendentes?', gerente.id) == 'Você tem 1 proposta pendente de aprovação.'
+
+
+def test_pendentes_em_cache_ate_o_commit_de_uma_proposta(funcionario, criar_proposta, contar_consultas):
+    criar_proposta(status='PENDENTE')
+    funcionario_id = funcionario.id
+
+    with contar_consultas() as contador:
+        assert responder('Tenho propostas pendentes?', funcionario_id) == 'Você tem 1 proposta pendente de aprovação.'
+        assert responder('Quantas pendentes?', funcionario_id) == 'Você tem 1 proposta pendente de aprovação.'
+    assert contador.total == 1
+
+    criar_proposta(status='PENDENTE')
+    assert responder('Tenho propostas pendentes?', funcionario_id) == 'Você tem 2 propostas pendentes de aprovação.'
@@ -0,0 +1,47 @@
+"""Histórico do chat: buffer circular no banco e cache entre workers"""
+
+from models.chat import ChatMensagem
+from services.chat_store import ChatStore
+
+
+def test_mensagens_em_ordem_e_limitadas(funcionario):
+    store = ChatStore()
+    for n in range(5):
+        store.adicionar(funcionario.id, 's1', 'user', f'mensagem {n}')
+
+    assert [m['message'] for m in store.mensagens(funcionario.id, 's1', limite=3)] == [
+        'mensagem 2', 'mensagem 3', 'mensagem 4'
+    ]
+    assert store.mensagens(funcionario.id, 'outra') == []
+
+
+def test_sessao_e_podada_ao_passar_do_limite(banco, funcionario):
+    store = ChatStore(mensagens_por_sessao=5)
+    for n in range(30):
+        store.adicionar(funcionario.id, 's1', 'user', f'mensagem {n}')
+
+    assert banco.session.query(ChatMensagem).count() <= 5 + 20
+    assert [m['message'] for m in store.mensagens(funcionario.id, 's1')] == [
+        f'mensagem {n}' for n in range(25, 30)
+    ]
+
+
+def test_gravacao_de_outro_worker_invalida_o_buffer(funcionario):
+    worker_a, worker_b = ChatStore(), ChatStore()
+    worker_a.adicionar(funcionario.id, 's1', 'user', 'oi')
+    assert len(worker_a.mensagens(funcionario.id, 's1')) == 1
+
+    worker_b.adicionar(funcionario.id, 's1', 'bot', 'olá')
+
+    assert [m['message'] for m in worker_a.mensagens(funcionario.id, 's1')] == ['oi', 'olá']
+
+
+def test_sessao_menos_usada_e_removida(funcionario):
+    store = ChatStore(sessoes_por_funcionario=2)
+    for sessao in ('s1', 's2', 's3'):
+        store.adicionar(funcionario.id, sessao, 'user', sessao)
+
+    assert sorted(s['session_id'] for s in store.sessoes(funcionario.id)) == ['s2', 's3']
+    assert store.mensagens(funcionario.id, 's1') == []
+    assert store.limpar(funcionario.id, 's2') is True
+    assert store.limpar(funcionario.id, 's2') is False
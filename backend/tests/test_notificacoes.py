@@ -0,0 +1,49 @@
+"""Leitura e exclusão de notificações em lote"""
+
+from models import Notificacao
+
+
+def _notificar(banco, funcionario, quantidade):
+    notificacoes = [
+        Notificacao(tipo='SISTEMA', titulo=f'Aviso {n}', mensagem='Teste', para_funcionario_id=funcionario.id)
+        for n in range(quantidade)
+    ]
+    banco.session.add_all(notificacoes)
+    banco.session.commit()
+    return [notificacao.id for notificacao in notificacoes]
+
+
+def _nao_lidas(client, headers):
+    resposta = client.get('/api/notificacoes/contador', headers=headers)
+    assert resposta.status_code == 200
+    return resposta.get_json()['total_nao_lidas']
+
+
+def test_ler_em_lote_so_altera_as_do_funcionario(client, auth, banco, funcionario, gerente):
+    ids = _notificar(banco, funcionario, 3)
+    ids_gerente = _notificar(banco, gerente, 1)
+    headers = auth(funcionario)
+    assert _nao_lidas(client, headers) == 3
+
+    resposta = client.post('/api/notificacoes/ler-todas', json={'ids': [ids[0]] + ids_gerente}, headers=headers)
+    assert resposta.get_json()['atualizadas'] == 1
+    assert _nao_lidas(client, headers) == 2
+
+    resposta = client.post('/api/notificacoes/ler-todas', headers=headers)
+    assert resposta.get_json()['atualizadas'] == 2
+    assert _nao_lidas(client, headers) == 0
+    assert _nao_lidas(client, auth(gerente)) == 1
+
+
+def test_excluir_em_lote(client, auth, banco, funcionario, gerente):
+    _notificar(banco, funcionario, 2)
+    _notificar(banco, gerente, 1)
+    headers = auth(funcionario)
+
+    resposta = client.post('/api/notificacoes/excluir-lote', json={}, headers=headers)
+    assert resposta.status_code == 400
+
+    resposta = client.post('/api/notificacoes/excluir-lote', json={'todas': True}, headers=headers)
+    assert resposta.get_json()['excluidas'] == 2
+    assert _nao_lidas(client, headers) == 0
+    assert _nao_lidas(client, auth(gerente)) == 1
@@ -0,0 +1,16 @@
+"""Consulta de jobs de geração de PDF"""
+
+
+def test_job_inexistente(client, auth, funcionario):
+    resposta = client.get('/api/propostas/pdf-jobs/nao-existe', headers=auth(funcionario))
+
+    assert resposta.status_code == 404
+
+
+def test_funcionario_inativo_nao_consulta_jobs(client, auth, criar_funcionario):
+    inativo = criar_funcionario(ativo=False)
+
+    resposta = client.get('/api/propostas/pdf-jobs/nao-existe', headers=auth(inativo))
+
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] == 'Funcionário não encontrado'
@@ -0,0 +1,49 @@
+"""Dados da prévia do PDF"""
+
+from decimal import Decimal
+
+import pytest
+
+from services.pdf_preview import montar_dados_previa
+
+
+def test_previa_usa_servico_e_cliente_atuais(banco, dados_base):
+    servico = dados_base['servico']
+    payload = {'cliente_id': dados_base['cliente'].id, 'itens': [{'servico_id': servico.id, 'quantidade': 2}]}
+
+    dados = montar_dados_previa(payload)
+    assert dados['cliente']['nome'] == 'João da Silva'
+    assert dados['itens'][0]['valor_total'] == 1600.0
+
+    servico.nome = 'Contabilidade Completa'
+    servico.valor_base = Decimal('950.00')
+    banco.session.commit()
+
+    item = montar_dados_previa(payload)['itens'][0]
+    assert item['servico']['nome'] == 'Contabilidade Completa'
+    assert item['valor_unitario'] == 950.0
+
+
+def test_previa_rejeita_servico_inexistente(dados_base):
+    with pytest.raises(ValueError, match='Serviços não encontrados'):
+        montar_dados_previa({'itens': [{'servico_id': dados_base['servico'].id}, {'servico_id': 999}]})
+
+
+def test_previa_respeita_quantidade_decimal_e_zeros(dados_base):
+    servico_id = dados_base['servico'].id
+
+    dados = montar_dados_previa({'itens': [
+        {'servico_id': servico_id, 'quantidade': 1.5},
+        {'servico_id': servico_id, 'quantidade': 0},
+        {'servico_id': servico_id, 'quantidade': 2, 'valor_unitario': 0},
+    ]})
+
+    assert [item['valor_total'] for item in dados['itens']] == [1200.0, 0.0, 0.0]
+    assert dados['itens'][0]['quantidade'] == Decimal('1.5')
+    assert dados['subtotal'] == 1200.0
+    assert dados['proposta']['valor_total'] == 1200.0
+
+
+def test_previa_rejeita_valor_nao_numerico(dados_base):
+    with pytest.raises(ValueError, match='"quantidade" deve ser numérico'):
+        montar_dados_previa({'itens': [{'servico_id': dados_base['servico'].id, 'quantidade': 'dois'}]})
@@ -0,0 +1,52 @@
+"""Listagem de propostas: consultas por página e paginação por cursor"""
+
+import pytest
+
+
+def _consultas_da_pagina(client, headers, contar_consultas, per_page):
+    with contar_consultas() as contador:
+        resposta = client.get(f'/api/propostas/?per_page={per_page}', headers=headers)
+    assert resposta.status_code == 200
+    assert len(resposta.get_json()['items']) == per_page
+    return contador.total
+
+
+def test_consultas_por_pagina_nao_crescem_com_o_tamanho(client, auth, funcionario, criar_proposta, contar_consultas):
+    for _ in range(60):
+        criar_proposta(itens=2)
+    headers = auth(funcionario)
+    # Aquece caches de processo (revogações de token) fora da medição
+    client.get('/api/propostas/?per_page=1', headers=headers)
+
+    consultas_10 = _consultas_da_pagina(client, headers, contar_consultas, 10)
+    consultas_50 = _consultas_da_pagina(client, headers, contar_consultas, 50)
+
+    assert consultas_10 == consultas_50
+
+
+def test_percorre_as_paginas_por_cursor(client, auth, funcionario, criar_proposta):
+    for _ in range(5):
+        criar_proposta()
+    headers = auth(funcionario)
+
+    numeros, cursor = [], ''
+    while cursor is not None:
+        pagina = client.get('/api/propostas/', query_string={'cursor': cursor, 'per_page': 2}, headers=headers).get_json()
+        numeros += [p['numero'] for p in pagina['items']]
+        cursor = pagina['next_cursor']
+
+    assert sorted(numeros) == [f'2026{n:04d}' for n in range(1, 6)]
+
+
+@pytest.mark.parametrize('cursor', [
+    'WzEyMywxXQ',                  # [123, 1]: data que não é texto
+    'WyIyMDI2LTAxLTAxIl0',         # ["2026-01-01"]: falta o id
+    'WyJvbnRlbSIsMV0',             # ["ontem", 1]
+    'WyIyMDI2LTAxLTAxIiwiMSJd',    # ["2026-01-01", "1"]: id como texto
+    'bmFvIGUganNvbg',              # não é JSON
+])
+def test_cursor_invalido_responde_400(client, auth, funcionario, cursor):
+    resposta = client.get('/api/propostas/', query_string={'cursor': cursor}, headers=auth(funcionario))
+
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] == 'Cursor de paginação inválido'
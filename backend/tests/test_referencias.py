@@ -0,0 +1,91 @@
+"""Snapshots versionados dos dados de referência"""
+
+from decimal import Decimal
+
+from models import FaixaFaturamento, RegimeTributario, Servico
+from models.referencias import referencias, _Referencias
+
+
+def test_alteracao_atualiza_o_snapshot_apos_o_commit(banco, dados_base):
+    simples = dados_base['simples']
+    assert referencias.regime(simples.id)['nome'] == 'Simples Nacional'
+
+    simples.nome = 'Simples'
+    banco.session.commit()
+
+    assert referencias.regime(simples.id)['nome'] == 'Simples'
+
+
+def test_rollback_mantem_o_snapshot_anterior(banco, dados_base):
+    servico = dados_base['servico']
+    assert referencias.servico(servico.id)['valor_base'] == 800.0
+
+    servico.valor_base = Decimal('1.00')
+    banco.session.flush()
+    # A própria transação vê a alteração
+    assert referencias.servico(servico.id)['valor_base'] == 1.0
+    banco.session.rollback()
+
+    assert referencias.servico(servico.id)['valor_base'] == 800.0
+
+
+def test_update_em_lote_incrementa_a_versao(banco, dados_base):
+    carimbo = referencias.carimbo('servicos')
+    assert [s['nome'] for s in referencias.servicos_ativos()] == ['Contabilidade Mensal']
+
+    banco.session.query(Servico).update({'ativo': False})
+    banco.session.commit()
+
+    assert referencias.carimbo('servicos') != carimbo
+    assert referencias.servicos_ativos() == []
+
+
+def test_outro_worker_percebe_a_alteracao(banco, dados_base):
+    outro_worker = _Referencias(intervalo=0)
+    mei = dados_base['mei']
+    assert outro_worker.regime_codigo(mei.id) == 'MEI'
+
+    banco.session.query(RegimeTributario).filter_by(id=mei.id).update({'nome': 'Microempreendedor'})
+    banco.session.commit()
+
+    assert outro_worker.regime(mei.id)['nome'] == 'Microempreendedor'
+
+
+def test_snapshot_entregue_e_uma_copia(dados_base):
+    regime = referencias.regime(dados_base['simples'].id)
+    regime['nome'] = 'alterado'
+
+    assert referencias.regime(dados_base['simples'].id)['nome'] == 'Simples Nacional'
+
+
+def test_faixas_servidas_do_snapshot(client, banco, contar_consultas, dados_base):
+    simples = dados_base['simples']
+    banco.session.add_all([
+        FaixaFaturamento(regime_tributario_id=simples.id, valor_inicial=Decimal('0'),
+                         valor_final=Decimal('180000'), aliquota=Decimal('4.00')),
+        FaixaFaturamento(regime_tributario_id=dados_base['mei'].id, valor_inicial=Decimal('0'),
+                         valor_final=Decimal('81000'), aliquota=Decimal('0.00')),
+    ])
+    banco.session.commit()
+
+    primeira = client.get('/api/faixas-faturamento/', query_string={'regime_tributario_id': simples.id})
+    assert [f['aliquota'] for f in primeira.get_json()] == [4.0]
+
+    with contar_consultas() as contador:
+        segunda = client.get('/api/faixas-faturamento/', query_string={'regime_tributario_id': simples.id})
+        condicional = client.get('/api/faixas-faturamento/', query_string={'regime_tributario_id': simples.id},
+                                 headers={'If-None-Match': primeira.headers['ETag']})
+    assert contador.total == 0
+    assert segunda.get_json() == primeira.get_json()
+    assert condicional.status_code == 304
+
+
+def test_tipos_atividade_refletem_alteracao(client, banco, dados_base):
+    tipo = dados_base['tipo']
+    assert client.get(f'/api/tipos-atividade/{tipo.id}').get_json()['nome'] == tipo.nome
+
+    tipo.nome = 'Prestação de Serviços'
+    banco.session.commit()
+
+    resposta = client.get('/api/tipos-atividade/', query_string={'search': 'prestação'})
+    assert [t['id'] for t in resposta.get_json()] == [tipo.id]
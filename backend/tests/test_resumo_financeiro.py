@@ -0,0 +1,57 @@
+"""Resumo financeiro persistido na proposta: taxa de abertura, base e desconto"""
+
+from sqlalchemy import text
+
+from models import Proposta
+
+
+def _detalhe(client, headers, proposta_id):
+    resposta = client.get(f'/api/propostas/{proposta_id}', headers=headers)
+    assert resposta.status_code == 200
+    return resposta.get_json()
+
+
+def test_alterar_abertura_do_cliente_recalcula_propostas(client, auth, funcionario, dados_base, criar_proposta):
+    proposta = criar_proposta()
+    headers = auth(funcionario)
+
+    dados = _detalhe(client, headers, proposta.id)
+    assert dados['taxa_abertura'] == {
+        'aplicavel': True, 'valor': 1000.0, 'motivo': 'Taxa de abertura empresa (R$ 1.000)'
+    }
+
+    resposta = client.put(f'/api/clientes/{dados_base["cliente"].id}', json={'abertura_empresa': False}, headers=headers)
+    assert resposta.status_code == 200
+
+    dados = _detalhe(client, headers, proposta.id)
+    assert dados['taxa_abertura']['aplicavel'] is False
+    assert dados['taxa_abertura']['valor'] == 0.0
+    assert dados['resumo_financeiro']['valor_base'] == 800.0
+
+
+def test_alterar_codigo_do_regime_recalcula_propostas(banco, dados_base, criar_proposta):
+    proposta = criar_proposta(itens=2, regime=dados_base['mei'])
+    assert float(proposta.taxa_abertura) == 300.0
+
+    dados_base['mei'].codigo = 'SIMEI'
+    banco.session.commit()
+
+    banco.session.expire_all()
+    proposta = banco.session.get(Proposta, proposta.id)
+    assert float(proposta.taxa_abertura) == 1000.0
+    assert float(proposta.valor_base) == 2600.0
+
+
+def test_leitura_de_proposta_sem_resumo_nao_grava(client, auth, funcionario, banco, dados_base, criar_proposta):
+    proposta = criar_proposta(regime=dados_base['mei'])
+    banco.session.execute(text("UPDATE proposta SET valor_base = NULL WHERE id = :id"), {'id': proposta.id})
+    banco.session.commit()
+
+    dados = _detalhe(client, auth(funcionario), proposta.id)
+    assert dados['taxa_abertura']['valor'] == 300.0
+    assert dados['taxa_abertura']['motivo'] == 'Taxa de abertura MEI (R$ 300)'
+    assert dados['resumo_financeiro']['valor_base'] == 1100.0
+
+    assert banco.session.execute(
+        text("SELECT valor_base FROM proposta WHERE id = :id"), {'id': proposta.id}
+    ).scalar() is None
@@ -0,0 +1,45 @@
+"""Revogação de tokens JWT"""
+
+from flask_jwt_extended import decode_token
+
+from models.revogacoes import _Revogacoes
+
+URL = '/api/notificacoes/contador'
+
+
+def test_logout_revoga_so_o_token_usado(client, auth, funcionario):
+    sessao_a, sessao_b = auth(funcionario), auth(funcionario)
+
+    assert client.post('/api/auth/logout', headers=sessao_a).status_code == 200
+
+    assert client.get(URL, headers=sessao_a).status_code == 401
+    assert client.get(URL, headers=sessao_b).status_code == 200
+
+
+def test_logout_chega_aos_outros_workers(client, auth, funcionario):
+    headers = auth(funcionario)
+    client.post('/api/auth/logout', headers=headers)
+
+    outro_worker = _Revogacoes()
+    payload = decode_token(headers['Authorization'].split()[1])
+    assert outro_worker.token_revogado(payload) is True
+
+
+def test_desativar_funcionario_revoga_os_tokens(client, auth, banco, funcionario):
+    headers = auth(funcionario)
+    assert client.get(URL, headers=headers).status_code == 200
+
+    funcionario.ativo = False
+    banco.session.commit()
+
+    assert client.get(URL, headers=headers).status_code == 401
+
+
+def test_rollback_descarta_a_revogacao(client, auth, banco, funcionario):
+    headers = auth(funcionario)
+
+    funcionario.ativo = False
+    banco.session.flush()
+    banco.session.rollback()
+
+    assert client.get(URL, headers=headers).status_code == 200
@@ -0,0 +1,35 @@
+"""Alocador de números sequenciais"""
+
+from datetime import datetime
+
+from models import PropostaService
+from models import sequencias
+from models.sequencias import Sequencia, proximo_valor
+
+
+def test_sequencia_nova_parte_da_semente_e_reserva_um_bloco(banco):
+    valores = [proximo_valor('teste', semente=lambda: 41, tamanho_bloco=5) for _ in range(3)]
+
+    assert valores == [42, 43, 44]
+    assert banco.session.get(Sequencia, 'teste').proximo_valor == 47
+
+
+def test_workers_recebem_blocos_sem_sobreposicao(banco):
+    primeiro = [proximo_valor('teste', tamanho_bloco=3) for _ in range(2)]
+    # Outro worker: sem os blocos em memória deste processo
+    blocos = dict(sequencias._blocos)
+    sequencias._blocos.clear()
+    segundo = [proximo_valor('teste', tamanho_bloco=3) for _ in range(4)]
+    sequencias._blocos.update(blocos)
+    primeiro.append(proximo_valor('teste', tamanho_bloco=3))
+
+    assert primeiro == [1, 2, 3]
+    assert segundo == [4, 5, 6, 7]
+
+
+def test_numero_da_proposta_continua_a_partir_das_existentes(criar_proposta):
+    ano = datetime.now().year
+    criar_proposta(numero=f'{ano}0007')
+
+    assert PropostaService.gerar_numero_proposta() == f'{ano}0008'
+    assert PropostaService.gerar_numero_proposta() == f'{ano}0009'
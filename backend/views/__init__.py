@@ -6,7 +6,10 @@ Organizado por domínios de negócio para melhor manutenibilidade.
 # =====================================================
 # IMPORTS DOS UTILITÁRIOS
 # =====================================================
-from .utils import handle_api_errors, validate_required_fields, paginate_query, build_search_filters
+from .utils import (
+    handle_api_errors, validate_required_fields, paginate_query, paginate_keyset, build_search_filters,
+    resolve_fields, apply_projection, serialize_fields, table_signature, conditional_response
+)
 
 # =====================================================
 # IMPORTS DAS VIEWS POR DOMÍNIO
@@ -26,6 +29,7 @@ from .error_handlers import error_handlers_bp
 from .cargos import cargos_bp
 from .empresas import empresas_bp
 from .mensalidades import mensalidades_bp
+from .eventos import eventos_bp
 
 # =====================================================
 # BLUEPRINT PRINCIPAL
@@ -52,6 +56,7 @@ def register_blueprints(app):
     api_bp.register_blueprint(cargos_bp, url_prefix='/cargos')
     api_bp.register_blueprint(empresas_bp, url_prefix='/empresas')
     api_bp.register_blueprint(mensalidades_bp, url_prefix='/mensalidades')
+    api_bp.register_blueprint(eventos_bp, url_prefix='/eventos')
     
     # Registra o blueprint principal na aplicação
     app.register_blueprint(api_bp)
@@ -68,5 +73,11 @@ __all__ = [
     'handle_api_errors',
     'validate_required_fields',
     'paginate_query',
-    'build_search_filters'
+    'paginate_keyset',
+    'build_search_filters',
+    'resolve_fields',
+    'apply_projection',
+    'serialize_fields',
+    'table_signature',
+    'conditional_response'
 ]
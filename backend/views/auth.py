@@ -5,7 +5,8 @@ Views relacionadas à autenticação.
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
 
-from models import Funcionario
+from config import db
+from models import Funcionario, revogar_token, revogar_tokens_funcionario
 from .utils import handle_api_errors
 
 auth_bp = Blueprint('auth', __name__)
@@ -93,10 +94,12 @@ def test_auth():
 @jwt_required()
 def logout():
     """
-    Faz logout do usuário.
+    Faz logout do usuário, revogando o token usado na requisição.
     """
     try:
         funcionario_id = get_jwt_identity()
+        revogar_token(get_jwt())
+        db.session.commit()
         
         return jsonify({
             "message": "Logout realizado com sucesso",
@@ -105,7 +108,26 @@ def logout():
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             "error": "Erro ao realizar logout",
             "message": str(e)
         }), 500
+
+@auth_bp.route('/logout-todos', methods=['POST'])
+@jwt_required()
+@handle_api_errors
+def logout_todos():
+    """
+    Encerra todas as sessões do usuário: revoga todos os tokens já emitidos
+    para ele (inclusive o desta requisição).
+    """
+    funcionario_id = int(get_jwt_identity())
+    revogar_tokens_funcionario(funcionario_id)
+    db.session.commit()
+    
+    return jsonify({
+        "message": "Todas as sessões foram encerradas",
+        "success": True,
+        "funcionario_id": str(funcionario_id)
+    }), 200
@@ -4,23 +4,17 @@ Views para gerenciamento de cargos.
 
 from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
-import random
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Cargo, Funcionario
-from .utils import handle_api_errors, paginate_query
+from flask_jwt_extended import jwt_required
+from models import Cargo, proximo_valor, maior_sufixo_numerico
+from .utils import (
+    handle_api_errors, paginate_query, resolve_fields, apply_projection, serialize_fields,
+    current_funcionario, funcionario_requerido
+)
 
 cargos_bp = Blueprint('cargos', __name__)
 
-def verificar_admin():
-    """Verifica se o usuário logado é admin (gerente)"""
-    funcionario_id = int(get_jwt_identity())
-    funcionario = Funcionario.query.get(funcionario_id)
-    if not funcionario or not funcionario.gerente:
-        return False
-    return funcionario
-
 def gerar_codigo_cargo(nome: str) -> str:
-    """Gera código automático: 3 primeiras letras do nome + 3 números aleatórios"""
+    """Gera código automático: 3 primeiras letras do nome + número sequencial (mín. 3 dígitos)"""
     # Pegar as 3 primeiras letras do nome, converter para maiúsculo
     letras = nome[:3].upper().replace(' ', '')
     
@@ -28,10 +22,14 @@ def gerar_codigo_cargo(nome: str) -> str:
     while len(letras) < 3:
         letras += 'X'
     
-    # Gerar 3 números aleatórios
-    numeros = ''.join([str(random.randint(0, 9)) for _ in range(3)])
+    # Número único entre todos os cargos (semeado com o maior sufixo já usado)
+    numero = proximo_valor(
+        'cargo',
+        semente=lambda: maior_sufixo_numerico(Cargo.codigo, tamanho_prefixo=3),
+        tamanho_bloco=5
+    )
     
-    return f"{letras}{numeros}"
+    return f"{letras}{numero:03d}"
 
 @cargos_bp.route('/', methods=['GET'])
 @jwt_required()
@@ -54,9 +52,13 @@ def get_cargos():
             Cargo.codigo.ilike(f'%{search}%')
         )
 
+    campos = resolve_fields(Cargo)
+    if campos:
+        query = apply_projection(query, Cargo, campos)
+
     cargos = paginate_query(query.order_by(Cargo.nome), page, per_page)
 
-    data = [c.to_json() for c in cargos.items]
+    data = [serialize_fields(c, campos) if campos else c.to_json() for c in cargos.items]
 
     return jsonify({
         'cargos': data,
@@ -76,12 +78,10 @@ def get_cargo(cargo_id: int):
 @cargos_bp.route('/', methods=['POST'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido(gerente=True, mensagem='Apenas administradores podem criar cargos')
 def create_cargo():
     """Cria um novo cargo - apenas admin"""
-    admin = verificar_admin()
-    
-    if not admin:
-        return jsonify({'error': 'Apenas administradores podem criar cargos'}), 403
+    admin = current_funcionario()
 
     data = request.get_json()
 
@@ -96,15 +96,6 @@ def create_cargo():
     # Gerar código automático
     nome_cargo = data['nome'].strip()
     codigo = gerar_codigo_cargo(nome_cargo)
-    
-    # Verificar se o código já existe (pode acontecer com números aleatórios)
-    tentativas = 0
-    while Cargo.query.filter_by(codigo=codigo).first() and tentativas < 10:
-        codigo = gerar_codigo_cargo(nome_cargo)
-        tentativas += 1
-    
-    if tentativas >= 10:
-        return jsonify({'error': 'Erro ao gerar código único para o cargo'}), 500
 
     cargo = Cargo(
         codigo=codigo,
@@ -123,11 +114,10 @@ def create_cargo():
 @cargos_bp.route('/<int:cargo_id>', methods=['PUT'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido(gerente=True, mensagem='Apenas administradores podem atualizar cargos')
 def update_cargo(cargo_id: int):
     """Atualiza um cargo existente - apenas admin"""
-    admin = verificar_admin()
-    if not admin:
-        return jsonify({'error': 'Apenas administradores podem atualizar cargos'}), 403
+    admin = current_funcionario()
 
     cargo = Cargo.query.get_or_404(cargo_id)
     
@@ -159,11 +149,10 @@ def update_cargo(cargo_id: int):
 @cargos_bp.route('/<int:cargo_id>', methods=['DELETE'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido(gerente=True, mensagem='Apenas administradores podem excluir cargos')
 def delete_cargo(cargo_id: int):
     """Desativa um cargo (soft delete) - apenas admin"""
-    admin = verificar_admin()
-    if not admin:
-        return jsonify({'error': 'Apenas administradores podem excluir cargos'}), 403
+    admin = current_funcionario()
 
     cargo = Cargo.query.get_or_404(cargo_id)
     
@@ -2,33 +2,37 @@
 Módulo de views para o sistema de chat.
 """
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
-import json
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+import re
+import threading
 import uuid
 
+from services.chat_bot import responder
+from services.chat_store import chat_store
+from services.eventos import broker
+from .utils import handle_api_errors, current_funcionario, funcionario_requerido
+
 # =====================================================
 # BLUEPRINT
 # =====================================================
 chat_bp = Blueprint('chat', __name__)
 
-# =====================================================
-# SIMULAÇÃO DE BANCO DE DADOS EM MEMÓRIA
-# =====================================================
-# Em produção, isso deveria ser substituído por um modelo real
-chat_messages = []
-chat_sessions = {}
-
 # =====================================================
 # ENDPOINTS
 # =====================================================
 
 @chat_bp.route('/send-message', methods=['POST'])
 @jwt_required()
+@handle_api_errors
+@funcionario_requerido()
 def send_message():
     """
     Envia uma mensagem no chat e retorna a resposta do bot.
+    
+    Com `"stream": true` a resposta é imediata (202, com `resposta_id`) e o
+    texto do bot chega pelo canal de eventos (`/api/eventos/stream`) como
+    `chat_parcial` (trechos) seguido de `chat_resposta` (mensagem completa).
     """
     try:
         data = request.get_json()
@@ -36,44 +40,42 @@ def send_message():
         if not data or 'message' not in data:
             return jsonify({'error': 'Mensagem é obrigatória'}), 400
         
-        user_id = get_jwt_identity()
+        user_id = current_funcionario().id
         user_message = data['message'].strip()
         
         if not user_message:
             return jsonify({'error': 'Mensagem não pode estar vazia'}), 400
         
-        # Criar mensagem do usuário
-        user_msg = {
-            'id': str(uuid.uuid4()),
-            'user_id': user_id,
-            'message': user_message,
-            'sender': 'user',
-            'timestamp': datetime.utcnow().isoformat(),
-            'session_id': data.get('session_id', 'default')
-        }
+        session_id = data.get('session_id', 'default')
         
-        chat_messages.append(user_msg)
+        # Gravar mensagem do usuário
+        user_msg = chat_store.adicionar(user_id, session_id, 'user', user_message)
+        
+        if data.get('stream'):
+            resposta_id = str(uuid.uuid4())
+            threading.Thread(
+                target=transmitir_resposta_bot,
+                args=(current_app._get_current_object(), user_message, user_id, session_id, resposta_id),
+                daemon=True
+            ).start()
+            return jsonify({
+                'success': True,
+                'user_message': user_msg,
+                'resposta_id': resposta_id,
+                'session_id': user_msg['session_id']
+            }), 202
         
         # Gerar resposta do bot baseada no contexto
         bot_response = generate_bot_response(user_message, user_id)
         
-        # Criar mensagem do bot
-        bot_msg = {
-            'id': str(uuid.uuid4()),
-            'user_id': user_id,
-            'message': bot_response,
-            'sender': 'bot',
-            'timestamp': datetime.utcnow().isoformat(),
-            'session_id': data.get('session_id', 'default')
-        }
-        
-        chat_messages.append(bot_msg)
+        # Gravar mensagem do bot
+        bot_msg = chat_store.adicionar(user_id, session_id, 'bot', bot_response)
         
         return jsonify({
             'success': True,
             'user_message': user_msg,
             'bot_response': bot_msg,
-            'session_id': data.get('session_id', 'default')
+            'session_id': session_id
         }), 200
         
     except Exception as e:
@@ -81,24 +83,21 @@ def send_message():
 
 @chat_bp.route('/messages', methods=['GET'])
 @jwt_required()
+@handle_api_errors
+@funcionario_requerido()
 def get_messages():
     """
     Retorna o histórico de mensagens do usuário.
+    
+    `limit` é limitado a CHAT_MENSAGENS_POR_SESSAO, o tamanho do histórico
+    mantido por sessão.
     """
     try:
-        user_id = get_jwt_identity()
+        user_id = current_funcionario().id
         session_id = request.args.get('session_id', 'default')
         limit = int(request.args.get('limit', 50))
         
-        # Filtrar mensagens do usuário e sessão
-        user_messages = [
-            msg for msg in chat_messages 
-            if msg['user_id'] == user_id and msg['session_id'] == session_id
-        ]
-        
-        # Ordenar por timestamp e limitar
-        user_messages.sort(key=lambda x: x['timestamp'])
-        user_messages = user_messages[-limit:]
+        user_messages = chat_store.mensagens(user_id, session_id, limit)
         
         return jsonify({
             'success': True,
@@ -111,30 +110,18 @@ def get_messages():
 
 @chat_bp.route('/sessions', methods=['GET'])
 @jwt_required()
+@handle_api_errors
+@funcionario_requerido()
 def get_sessions():
     """
-    Retorna as sessões de chat do usuário.
+    Retorna as sessões de chat do usuário, da mais recente para a mais antiga.
     """
     try:
-        user_id = get_jwt_identity()
-        
-        # Agrupar mensagens por sessão
-        sessions = {}
-        for msg in chat_messages:
-            if msg['user_id'] == user_id:
-                session_id = msg['session_id']
-                if session_id not in sessions:
-                    sessions[session_id] = {
-                        'session_id': session_id,
-                        'last_message': msg['message'],
-                        'last_timestamp': msg['timestamp'],
-                        'message_count': 0
-                    }
-                sessions[session_id]['message_count'] += 1
+        user_id = current_funcionario().id
         
         return jsonify({
             'success': True,
-            'sessions': list(sessions.values())
+            'sessions': chat_store.sessoes(user_id)
         }), 200
         
     except Exception as e:
@@ -142,21 +129,19 @@ def get_sessions():
 
 @chat_bp.route('/clear-session', methods=['POST'])
 @jwt_required()
+@handle_api_errors
+@funcionario_requerido()
 def clear_session():
     """
     Limpa uma sessão específica do chat.
     """
     try:
-        user_id = get_jwt_identity()
-        data = request.get_json()
+        user_id = current_funcionario().id
+        data = request.get_json() or {}
         session_id = data.get('session_id', 'default')
         
-        # Remover mensagens da sessão
-        global chat_messages
-        chat_messages = [
-            msg for msg in chat_messages 
-            if not (msg['user_id'] == user_id and msg['session_id'] == session_id)
-        ]
+        # Remover a sessão e suas mensagens
+        chat_store.limpar(user_id, session_id)
         
         return jsonify({
             'success': True,
@@ -170,33 +155,33 @@ def clear_session():
 # FUNÇÕES AUXILIARES
 # =====================================================
 
-def generate_bot_response(user_message: str, user_id: str) -> str:
-    """
-    Gera uma resposta do bot baseada na mensagem do usuário.
+def transmitir_resposta_bot(app, user_message: str, user_id: int, session_id: str, resposta_id: str):
     """
-    message_lower = user_message.lower()
+    Monta a resposta do bot e a envia pelo canal de eventos, frase a frase.
     
-    # Respostas baseadas em palavras-chave
-    if any(word in message_lower for word in ['olá', 'oi', 'hello', 'hi']):
-        return "Olá! Como posso ajudá-lo com o sistema de propostas hoje?"
-    
-    elif any(word in message_lower for word in ['proposta', 'propostas']):
-        return "Posso ajudá-lo com propostas! Você pode criar, editar ou visualizar propostas no sistema. Gostaria de saber mais sobre alguma funcionalidade específica?"
-    
-    elif any(word in message_lower for word in ['cliente', 'clientes']):
-        return "Para gerenciar clientes, acesse a seção 'Clientes' no menu lateral. Lá você pode adicionar novos clientes, editar informações existentes e visualizar todos os clientes cadastrados."
-    
-    elif any(word in message_lower for word in ['serviço', 'serviços']):
-        return "Os serviços são categorizados por tipo de atividade e regime tributário. Posso ajudá-lo a entender como configurar ou calcular serviços para suas propostas."
-    
-    elif any(word in message_lower for word in ['ajuda', 'help', 'suporte']):
-        return "Estou aqui para ajudar! Posso esclarecer dúvidas sobre: propostas, clientes, serviços, regimes tributários e funcionalidades do sistema. O que você gostaria de saber?"
-    
-    elif any(word in message_lower for word in ['obrigado', 'valeu', 'thanks']):
-        return "De nada! Estou sempre aqui para ajudar. Se precisar de mais alguma coisa, é só perguntar!"
-    
-    elif any(word in message_lower for word in ['tchau', 'bye', 'até']):
-        return "Até logo! Tenha um ótimo dia e não hesite em voltar se precisar de ajuda!"
+    A mensagem completa é gravada no histórico ao final, com o mesmo id
+    enviado em `chat_resposta` (roda em thread própria, daí o `app`).
+    """
+    with app.app_context():
+        bot_response = generate_bot_response(user_message, user_id)
+        
+        # Trechos por frase: o cliente exibe o texto à medida que chega
+        trechos = [t for t in re.split(r'(?<=[.!?])\s+', bot_response) if t]
+        for indice, trecho in enumerate(trechos):
+            broker.publicar(user_id, 'chat_parcial', {
+                'resposta_id': resposta_id,
+                'session_id': session_id,
+                'indice': indice,
+                'trecho': trecho
+            })
+        
+        bot_msg = chat_store.adicionar(user_id, session_id, 'bot', bot_response, mensagem_uuid=resposta_id)
+    broker.publicar(user_id, 'chat_resposta', bot_msg)
+
+def generate_bot_response(user_message: str, user_id: int) -> str:
+    """
+    Gera uma resposta do bot baseada na mensagem do usuário.
     
-    else:
-        return "Entendo sua pergunta! Para melhor ajudá-lo, posso esclarecer dúvidas sobre: criação de propostas, gestão de clientes, configuração de serviços, regimes tributários ou outras funcionalidades do sistema. O que você gostaria de saber especificamente?"
+    Ver services/chat_bot.py (intenções compiladas e respostas com dados).
+    """
+    return responder(user_message, user_id)
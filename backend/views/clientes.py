@@ -9,7 +9,11 @@ from flask_jwt_extended import jwt_required
 
 from config import db
 from models import Cliente, Endereco, EntidadeJuridica
-from .utils import handle_api_errors, validate_required_fields, paginate_query
+from models.busca import filtrar_busca_textual
+from .utils import (
+    handle_api_errors, validate_required_fields, paginate_query, paginate_keyset, cursor_mode_requested,
+    resolve_fields, apply_projection, serialize_fields
+)
 
 clientes_bp = Blueprint('clientes', __name__)
 
@@ -23,24 +27,55 @@ def get_clientes():
     search = request.args.get('search', '').strip()
 
     query = Cliente.query
+    relevancia = None
 
     if ativo is not None:
         query = query.filter(Cliente.ativo == ativo)
     if search:
-        query = query.filter(
-            or_(
-                Cliente.nome.ilike(f'%{search}%'),
-                Cliente.cpf.ilike(f'%{search}%'),
-                Cliente.email.ilike(f'%{search}%')
+        # Índice FTS5 quando disponível; ilike como fallback
+        busca = filtrar_busca_textual(query, Cliente, search)
+        if busca is not None:
+            query, relevancia = busca
+        else:
+            query = query.filter(
+                or_(
+                    Cliente.nome.ilike(f'%{search}%'),
+                    Cliente.cpf.ilike(f'%{search}%'),
+                    Cliente.email.ilike(f'%{search}%')
+                )
             )
+
+    # Projeção (fields= / view=summary) sem endereços nem entidades jurídicas
+    campos = resolve_fields(Cliente)
+    if campos:
+        query = apply_projection(query, Cliente, campos)
+
+    if cursor_mode_requested():
+        pagina = paginate_keyset(
+            query,
+            [(Cliente.nome, 'asc'), (Cliente.id, 'asc')],
+            cursor=request.args.get('cursor'),
+            per_page=per_page,
+            include_total=request.args.get('incluir_total', 'false').lower() == 'true'
         )
+        data = [serialize_fields(c, campos) if campos else c.to_json_completo() for c in pagina.items]
+        return jsonify({
+            'items': data,
+            'clientes': data,
+            'next_cursor': pagina.next_cursor,
+            'has_more': pagina.has_more,
+            'total': pagina.total,
+            'per_page': pagina.per_page
+        })
+
+    if relevancia is not None:
+        query = query.order_by(relevancia.asc(), Cliente.nome.asc())
+    else:
+        query = query.order_by(Cliente.nome.asc())
 
-    clientes = paginate_query(
-        query.order_by(Cliente.nome.asc()),
-        page, per_page
-    )
+    clientes = paginate_query(query, page, per_page)
 
-    data = [c.to_json_completo() for c in clientes.items]
+    data = [serialize_fields(c, campos) if campos else c.to_json_completo() for c in clientes.items]
     return jsonify({
         'items': data,
         'clientes': data,
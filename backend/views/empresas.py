@@ -4,20 +4,15 @@ Views para gerenciamento de empresas.
 
 from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Empresa, Funcionario
-from .utils import handle_api_errors, paginate_query
+from flask_jwt_extended import jwt_required
+from models import Empresa
+from .utils import (
+    handle_api_errors, paginate_query, resolve_fields, apply_projection, serialize_fields,
+    funcionario_requerido
+)
 
 empresas_bp = Blueprint('empresas', __name__)
 
-def verificar_gerente():
-    """Verifica se o usuário logado é gerente"""
-    funcionario_id = int(get_jwt_identity())
-    funcionario = Funcionario.query.get(funcionario_id)
-    if not funcionario or not funcionario.gerente:
-        return False
-    return True
-
 @empresas_bp.route('/', methods=['GET'])
 @jwt_required()
 @handle_api_errors
@@ -39,9 +34,13 @@ def get_empresas():
             Empresa.cnpj.ilike(f'%{search}%')
         )
 
+    campos = resolve_fields(Empresa)
+    if campos:
+        query = apply_projection(query, Empresa, campos)
+
     empresas = paginate_query(query.order_by(Empresa.nome), page, per_page)
 
-    data = [e.to_json() for e in empresas.items]
+    data = [serialize_fields(e, campos) if campos else e.to_json() for e in empresas.items]
 
     return jsonify({
         'empresas': data,
@@ -61,11 +60,9 @@ def get_empresa(empresa_id: int):
 @empresas_bp.route('/', methods=['POST'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido(gerente=True, mensagem='Apenas gerentes podem criar empresas')
 def create_empresa():
     """Cria uma nova empresa - apenas gerentes"""
-    if not verificar_gerente():
-        return jsonify({'error': 'Apenas gerentes podem criar empresas'}), 403
-
     data = request.get_json()
 
     if not data:
@@ -99,11 +96,9 @@ def create_empresa():
 @empresas_bp.route('/<int:empresa_id>', methods=['PUT'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido(gerente=True, mensagem='Apenas gerentes podem atualizar empresas')
 def update_empresa(empresa_id: int):
     """Atualiza uma empresa existente - apenas gerentes"""
-    if not verificar_gerente():
-        return jsonify({'error': 'Apenas gerentes podem atualizar empresas'}), 403
-
     empresa = Empresa.query.get_or_404(empresa_id)
     data = request.get_json()
 
@@ -139,11 +134,9 @@ def update_empresa(empresa_id: int):
 @empresas_bp.route('/<int:empresa_id>', methods=['DELETE'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido(gerente=True, mensagem='Apenas gerentes podem excluir empresas')
 def delete_empresa(empresa_id: int):
     """Desativa uma empresa (soft delete) - apenas gerentes"""
-    if not verificar_gerente():
-        return jsonify({'error': 'Apenas gerentes podem excluir empresas'}), 403
-
     empresa = Empresa.query.get_or_404(empresa_id)
 
     # Verificar se há funcionários ou cargos vinculados
@@ -0,0 +1,46 @@
+"""
+Views do canal de eventos em tempo real (Server-Sent Events).
+"""
+
+from flask import Blueprint, Response, jsonify
+from flask_jwt_extended import jwt_required
+
+from services.eventos import broker
+from .utils import handle_api_errors, current_funcionario, funcionario_requerido
+
+eventos_bp = Blueprint('eventos', __name__)
+
+
+@eventos_bp.route('/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+@handle_api_errors
+@funcionario_requerido()
+def stream_eventos():
+    """
+    Abre o fluxo text/event-stream do funcionário logado.
+
+    O EventSource do navegador não envia cabeçalhos, então o token também é
+    aceito em `?token=` (apenas nesta rota). Eventos: `notificacao`,
+    `proposta_decisao`, `chat_parcial` e `chat_resposta`; conexões ociosas
+    recebem um comentário de keep-alive a cada SSE_HEARTBEAT_SEGUNDOS.
+    """
+    funcionario = current_funcionario()
+
+    # A conexão não usa o banco depois daqui
+    assinatura = broker.assinar(funcionario.id, gerente=bool(funcionario.gerente))
+    return Response(
+        broker.transmitir(assinatura),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # nginx: não acumular o fluxo em buffer
+        }
+    )
+
+
+@eventos_bp.route('/status', methods=['GET'])
+@jwt_required()
+@handle_api_errors
+def status_eventos():
+    """Quantidade de conexões SSE abertas neste processo"""
+    return jsonify({'conexoes': broker.conexoes()})
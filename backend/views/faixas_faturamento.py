@@ -3,11 +3,9 @@ Views relacionadas às faixas de faturamento.
 """
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
 
-from config import db
-from models import FaixaFaturamento
-from .utils import handle_api_errors
+from models.referencias import referencias
+from .utils import handle_api_errors, conditional_response
 
 faixas_faturamento_bp = Blueprint('faixas_faturamento', __name__)
 
@@ -18,18 +16,11 @@ def get_faixas_faturamento():
     try:
         regime_tributario_id = request.args.get('regime_tributario_id', type=int)
         
-        query = FaixaFaturamento.query.filter_by(ativo=True)
+        def montar_resposta():
+            return jsonify(referencias.faixas(regime_tributario_id or None))
         
-        if regime_tributario_id:
-            query = query.filter_by(regime_tributario_id=regime_tributario_id)
-        
-        faixas = query.order_by(FaixaFaturamento.valor_inicial).all()
-        result = []
-        
-        for faixa in faixas:
-            result.append(faixa.to_json())
-        
-        return jsonify(result)
+        # ETag: versões das faixas e dos regimes (incluídos em to_json)
+        return conditional_response(referencias.carimbo('faixas'), montar_resposta)
     except Exception as e:
         print(f"Erro geral: {e}")
         return jsonify({"error": f"Erro: {str(e)}"}), 500
@@ -38,5 +29,7 @@ def get_faixas_faturamento():
 @handle_api_errors
 def get_faixa_faturamento(faixa_id: int):
     """Busca uma faixa de faturamento específica"""
-    faixa = FaixaFaturamento.query.get_or_404(faixa_id)
-    return jsonify(faixa.to_json())
+    faixa = referencias.faixa(faixa_id)
+    if faixa is None:
+        return jsonify({'error': 'Faixa de faturamento não encontrada'}), 404
+    return jsonify(faixa)
@@ -9,7 +9,7 @@ from flask_jwt_extended import jwt_required
 
 from config import db
 from models import Funcionario
-from .utils import handle_api_errors, validate_required_fields, paginate_query
+from .utils import handle_api_errors, validate_required_fields, paginate_query, resolve_fields, apply_projection, serialize_fields
 
 funcionarios_bp = Blueprint('funcionarios', __name__)
 
@@ -34,10 +34,18 @@ def get_funcionarios():
             )
         )
 
+    # Projeção (fields= / view=summary) sem cargo nem empresa
+    campos = resolve_fields(Funcionario)
+    if campos:
+        query = apply_projection(query, Funcionario, campos)
+
     funcionarios = paginate_query(query.order_by(Funcionario.nome), page, per_page)
 
     data = []
     for f in funcionarios.items:
+        if campos:
+            data.append(serialize_fields(f, campos))
+            continue
         funcionario_data = f.to_json()
         # Adicionar dados do cargo
         if f.cargo:
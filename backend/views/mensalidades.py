@@ -3,12 +3,10 @@ Views para mensalidades automáticas.
 """
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from config import db
-from models.tributario import MensalidadeAutomatica, TipoAtividade, RegimeTributario, FaixaFaturamento
-from models.clientes import Cliente
+from flask_jwt_extended import jwt_required
+from models.referencias import referencias
 from models.propostas import Proposta
-from views.utils import validate_required_fields
+from views.utils import validate_required_fields, conditional_response
 
 mensalidades_bp = Blueprint('mensalidades', __name__)
 
@@ -39,12 +37,7 @@ def buscar_mensalidade():
         faixa_faturamento_id = data.get('faixa_faturamento_id')
         
         # Buscar mensalidade automática
-        mensalidade = MensalidadeAutomatica.query.filter_by(
-            tipo_atividade_id=tipo_atividade_id,
-            regime_tributario_id=regime_tributario_id,
-            faixa_faturamento_id=faixa_faturamento_id,
-            ativo=True
-        ).first()
+        mensalidade = referencias.mensalidade(tipo_atividade_id, regime_tributario_id, faixa_faturamento_id)
         
         if not mensalidade:
             return jsonify({
@@ -56,7 +49,7 @@ def buscar_mensalidade():
         return jsonify({
             'success': True,
             'message': 'Mensalidade automática encontrada',
-            'data': mensalidade.to_json()
+            'data': mensalidade
         })
         
     except Exception as e:
@@ -92,12 +85,11 @@ def buscar_mensalidade_por_proposta(proposta_id):
             }), 400
         
         # Buscar mensalidade automática
-        mensalidade = MensalidadeAutomatica.query.filter_by(
-            tipo_atividade_id=proposta.tipo_atividade_id,
-            regime_tributario_id=proposta.regime_tributario_id,
-            faixa_faturamento_id=proposta.faixa_faturamento_id,
-            ativo=True
-        ).first()
+        mensalidade = referencias.mensalidade(
+            proposta.tipo_atividade_id,
+            proposta.regime_tributario_id,
+            proposta.faixa_faturamento_id
+        )
         
         if not mensalidade:
             return jsonify({
@@ -109,7 +101,7 @@ def buscar_mensalidade_por_proposta(proposta_id):
         return jsonify({
             'success': True,
             'message': 'Mensalidade automática encontrada',
-            'data': mensalidade.to_json()
+            'data': mensalidade
         })
         
     except Exception as e:
@@ -127,13 +119,17 @@ def listar_mensalidades():
     Lista todas as mensalidades automáticas cadastradas.
     """
     try:
-        mensalidades = MensalidadeAutomatica.query.filter_by(ativo=True).all()
+        def montar_resposta():
+            mensalidades = referencias.mensalidades()
+            
+            return jsonify({
+                'success': True,
+                'message': f'{len(mensalidades)} mensalidades encontradas',
+                'data': mensalidades
+            })
         
-        return jsonify({
-            'success': True,
-            'message': f'{len(mensalidades)} mensalidades encontradas',
-            'data': [mensalidade.to_json() for mensalidade in mensalidades]
-        })
+        # ETag: versões das mensalidades e das tabelas referenciadas em to_json
+        return conditional_response(referencias.carimbo('mensalidades'), montar_resposta)
         
     except Exception as e:
         return jsonify({
@@ -171,19 +167,14 @@ def calcular_total_com_mensalidade():
         valor_servicos = float(data.get('valor_servicos', 0))
         
         # Buscar mensalidade automática
-        mensalidade = MensalidadeAutomatica.query.filter_by(
-            tipo_atividade_id=tipo_atividade_id,
-            regime_tributario_id=regime_tributario_id,
-            faixa_faturamento_id=faixa_faturamento_id,
-            ativo=True
-        ).first()
+        mensalidade = referencias.mensalidade(tipo_atividade_id, regime_tributario_id, faixa_faturamento_id)
         
         valor_mensalidade = 0.0
         mensalidade_info = None
         
         if mensalidade:
-            valor_mensalidade = float(mensalidade.valor_mensalidade)
-            mensalidade_info = mensalidade.to_json()
+            valor_mensalidade = mensalidade['valor_mensalidade']
+            mensalidade_info = mensalidade
         
         valor_total = valor_servicos + valor_mensalidade
         
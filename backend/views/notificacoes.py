@@ -3,12 +3,15 @@ Views relacionadas às notificações.
 """
 
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from sqlalchemy import or_
 
 from config import db
-from models import Notificacao, Funcionario
-from .utils import handle_api_errors, paginate_query
+from models import Notificacao
+from .utils import (
+    handle_api_errors, paginate_query, paginate_keyset, cursor_mode_requested,
+    resolve_fields, apply_projection, serialize_fields, current_funcionario, funcionario_requerido
+)
 
 notificacoes_bp = Blueprint('notificacoes', __name__)
 
@@ -16,19 +19,15 @@ notificacoes_bp = Blueprint('notificacoes', __name__)
 @notificacoes_bp.route('/', methods=['GET'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido()
 def get_notificacoes():
     """Busca notificações do funcionário logado"""
-    funcionario_id = int(get_jwt_identity())
+    funcionario_id = current_funcionario().id
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     lida = request.args.get('lida', type=str)  # 'true', 'false' ou None para todas
     tipo = request.args.get('tipo', '').strip()
     
-    # Verificar se funcionário existe e está ativo
-    funcionario = Funcionario.query.get(funcionario_id)
-    if not funcionario or not funcionario.ativo:
-        raise ValueError('Funcionário não encontrado')
-    
     # Query base - filtrar apenas notificações não deletadas
     query = Notificacao.query.filter_by(para_funcionario_id=funcionario_id, ativo=True).filter(
         Notificacao.deleted_at.is_(None)  # FILTRAR NÃO DELETADAS
@@ -44,13 +43,34 @@ def get_notificacoes():
     if tipo:
         query = query.filter(Notificacao.tipo == tipo)
     
+    # Projeção (fields= / view=summary)
+    campos = resolve_fields(Notificacao)
+    if campos:
+        query = apply_projection(query, Notificacao, campos)
+    
+    if cursor_mode_requested():
+        pagina = paginate_keyset(
+            query,
+            [(Notificacao.created_at, 'desc'), (Notificacao.id, 'desc')],
+            cursor=request.args.get('cursor'),
+            per_page=per_page,
+            include_total=request.args.get('incluir_total', 'false').lower() == 'true'
+        )
+        return jsonify({
+            'items': [serialize_fields(n, campos) if campos else n.to_json() for n in pagina.items],
+            'next_cursor': pagina.next_cursor,
+            'has_more': pagina.has_more,
+            'total': pagina.total,
+            'per_page': pagina.per_page
+        })
+    
     # Ordenar por data de criação (mais recentes primeiro)
     query = query.order_by(Notificacao.created_at.desc())
     
     # Paginar resultados
     notificacoes = paginate_query(query, page, per_page)
     
-    data = [n.to_json() for n in notificacoes.items]
+    data = [serialize_fields(n, campos) if campos else n.to_json() for n in notificacoes.items]
     return jsonify({
         'items': data,
         'total': notificacoes.total,
@@ -63,14 +83,11 @@ def get_notificacoes():
 @notificacoes_bp.route('/<int:notificacao_id>/ler', methods=['POST'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido()
 def marcar_como_lida(notificacao_id: int):
     """Marca uma notificação como lida"""
-    funcionario_id = int(get_jwt_identity())
-    
-    # Verificar se funcionário existe e está ativo
-    funcionario = Funcionario.query.get(funcionario_id)
-    if not funcionario or not funcionario.ativo:
-        raise ValueError('Funcionário não encontrado')
+    funcionario = current_funcionario()
+    funcionario_id = funcionario.id
     
     # Buscar notificação
     notificacao = Notificacao.query.get_or_404(notificacao_id)
@@ -92,88 +109,100 @@ def marcar_como_lida(notificacao_id: int):
     })
 
 
+def _ids_do_corpo(data):
+    """Lista `ids` opcional do corpo da requisição (None = todas)"""
+    ids = data.get('ids')
+    if ids is None:
+        return None
+    if not isinstance(ids, list) or not ids:
+        raise ValueError('"ids" deve ser uma lista não vazia de ids de notificação')
+    try:
+        return [int(i) for i in ids]
+    except (TypeError, ValueError):
+        raise ValueError('"ids" deve conter apenas números')
+
+
 @notificacoes_bp.route('/ler-todas', methods=['POST'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido()
 def marcar_todas_como_lidas():
-    """Marca todas as notificações não lidas do funcionário como lidas"""
-    funcionario_id = int(get_jwt_identity())
-    
-    # Verificar se funcionário existe e está ativo
-    funcionario = Funcionario.query.get(funcionario_id)
-    if not funcionario or not funcionario.ativo:
-        raise ValueError('Funcionário não encontrado')
-    
-    # Buscar todas as notificações não lidas e não deletadas do funcionário
-    notificacoes = Notificacao.query.filter_by(
-        para_funcionario_id=funcionario_id,
-        lida=False,
-        ativo=True
-    ).filter(
-        Notificacao.deleted_at.is_(None)  # SÓ PROCESSAR NÃO DELETADAS
-    ).all()
-    
-    # Marcar todas como lidas
-    for notificacao in notificacoes:
-        notificacao.marcar_como_lida()
+    """
+    Marca como lidas todas as notificações não lidas do funcionário, ou só as
+    informadas em `{"ids": [...]}`, com um único UPDATE e um único commit.
+    """
+    funcionario = current_funcionario()
+    funcionario_id = funcionario.id
+    
+    ids = _ids_do_corpo(request.get_json(silent=True) or {})
+    atualizadas = Notificacao.marcar_lidas_em_lote(funcionario_id, ids)
+    db.session.commit()
     
     current_app.logger.info(
-        f"{len(notificacoes)} notificações marcadas como lidas pelo funcionário {funcionario.nome}"
+        f"{atualizadas} notificações marcadas como lidas pelo funcionário {funcionario.nome}"
     )
     
     return jsonify({
-        'message': f'{len(notificacoes)} notificações marcadas como lidas'
+        'message': f'{atualizadas} notificações marcadas como lidas',
+        'atualizadas': atualizadas
+    })
+
+
+@notificacoes_bp.route('/excluir-lote', methods=['POST'])
+@jwt_required()
+@handle_api_errors
+@funcionario_requerido()
+def excluir_notificacoes_lote():
+    """
+    Soft delete em lote: `{"ids": [...]}` ou `{"todas": true}`, em um único UPDATE.
+    """
+    funcionario = current_funcionario()
+    funcionario_id = funcionario.id
+    
+    data = request.get_json(silent=True) or {}
+    ids = _ids_do_corpo(data)
+    if ids is None and data.get('todas') is not True:
+        raise ValueError('Informe "ids" ou "todas": true')
+    
+    excluidas = Notificacao.excluir_em_lote(funcionario_id, ids)
+    db.session.commit()
+    
+    current_app.logger.info(
+        f"{excluidas} notificações excluídas pelo funcionário {funcionario.nome}"
+    )
+    
+    return jsonify({
+        'message': f'{excluidas} notificações excluídas',
+        'excluidas': excluidas
     })
 
 
 @notificacoes_bp.route('/contador', methods=['GET'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido()
 def get_contador_notificacoes():
     """Retorna contador de notificações não lidas"""
-    funcionario_id = int(get_jwt_identity())
-    
-    # Verificar se funcionário existe e está ativo
-    funcionario = Funcionario.query.get(funcionario_id)
-    if not funcionario or not funcionario.ativo:
-        raise ValueError('Funcionário não encontrado')
-    
-    # Contar notificações não lidas e não deletadas
-    total_nao_lidas = Notificacao.query.filter_by(
-        para_funcionario_id=funcionario_id,
-        lida=False,
-        ativo=True
-    ).filter(
-        Notificacao.deleted_at.is_(None)  # SÓ CONTAR NÃO DELETADAS
-    ).count()
-    
-    # Contar notificações por tipo (não deletadas)
-    aprovacao_nao_lidas = Notificacao.query.filter_by(
-        para_funcionario_id=funcionario_id,
-        tipo='APROVACAO_DESCONTO',
-        lida=False,
-        ativo=True
-    ).filter(
-        Notificacao.deleted_at.is_(None)  # SÓ CONTAR NÃO DELETADAS
-    ).count()
+    funcionario_id = current_funcionario().id
+    
+    # Não lidas e não deletadas, total e por tipo (consulta agrupada única, em cache)
+    contadores = Notificacao.contar_nao_lidas(funcionario_id)
     
     return jsonify({
-        'total_nao_lidas': total_nao_lidas,
-        'aprovacao_nao_lidas': aprovacao_nao_lidas
+        'total_nao_lidas': contadores['total'],
+        'aprovacao_nao_lidas': contadores['por_tipo'].get('APROVACAO_DESCONTO', 0),
+        'por_tipo': contadores['por_tipo']
     })
 
 
 @notificacoes_bp.route('/<int:notificacao_id>', methods=['DELETE'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido()
 def delete_notificacao(notificacao_id: int):
     """Soft delete de uma notificação"""
-    funcionario_id = int(get_jwt_identity())
-    
-    # Verificar se funcionário existe e está ativo
-    funcionario = Funcionario.query.get(funcionario_id)
-    if not funcionario or not funcionario.ativo:
-        raise ValueError('Funcionário não encontrado')
+    funcionario = current_funcionario()
+    funcionario_id = funcionario.id
     
     # Buscar notificação
     notificacao = Notificacao.query.get_or_404(notificacao_id)
@@ -3,102 +3,79 @@ Views relacionadas às propostas.
 """
 
 from flask import Blueprint, request, jsonify, current_app
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 from datetime import datetime, timedelta
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 import json
-import random
-import time
 
 from config import db
-from models import Proposta, Funcionario, Cliente, ItemProposta, Servico, PropostaLog, RegimeTributario
-from .utils import handle_api_errors, validate_required_fields, paginate_query
+from models import Proposta, Funcionario, Cliente, ItemProposta, Servico, PropostaLog, PropostaService
+from models.busca import filtrar_busca_textual
+from models.referencias import referencias
+from .utils import (
+    handle_api_errors, validate_required_fields, paginate_query, paginate_keyset, cursor_mode_requested,
+    resolve_fields, apply_projection, serialize_fields, table_signature, conditional_response,
+    current_funcionario, funcionario_requerido
+)
 
 propostas_bp = Blueprint('propostas', __name__)
 
 def gerar_numero_proposta_unico():
     """
-    ⚠️ CORREÇÃO: Gera um número único para a proposta usando timestamp + microsegundos + random
-    Esta função resolve o problema de números duplicados que estava causando a criação de duas propostas.
-    """
-    # Usar timestamp detalhado com microsegundos
-    timestamp = datetime.now().strftime('%Y%m%d%H%M%S%f')[:-3]  # Remove últimos 3 dígitos dos microsegundos
-    
-    # Adicionar sufixo aleatório para garantir unicidade
-    random_suffix = random.randint(100, 999)
-    
-    numero_candidato = f"PROP-{timestamp}{random_suffix}"
-    
-    # Verificar se já existe no banco (loop até encontrar único)
-    tentativas = 0
-    while Proposta.query.filter_by(numero=numero_candidato).first() and tentativas < 10:
-        tentativas += 1
-        time.sleep(0.001)  # Aguardar 1ms para mudar timestamp
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S%f')[:-3]
-        random_suffix = random.randint(100, 999)
-        numero_candidato = f"PROP-{timestamp}{random_suffix}"
+    Gera um número único para a proposta (AAAA0001).
     
-    current_app.logger.info(f"Número único gerado após {tentativas} tentativas: {numero_candidato}")
-    return numero_candidato
+    Os números vêm do alocador de sequências: sem consulta prévia à tabela de
+    propostas e sem espera, mesmo com vários workers criando propostas.
+    """
+    return PropostaService.gerar_numero_proposta()
+
+
+# Colunas aceitas em ?ordenar_por= na listagem (modo offset)
+COLUNAS_ORDENACAO = {
+    'created_at': Proposta.created_at,
+    'valor_total': Proposta.valor_total,
+    'valor_base': Proposta.valor_base,
+    'desconto_percentual': Proposta.desconto_percentual,
+}
 
 
 def calcular_taxa_abertura_empresa(cliente_abertura: bool, regime_codigo: str) -> float:
+    """Calcula taxa de abertura de empresa (ver PropostaService.calcular_taxa_abertura_empresa)"""
+    return PropostaService.calcular_taxa_abertura_empresa(cliente_abertura, regime_codigo)
+
+
+def dados_financeiros_proposta(proposta: Proposta) -> dict:
     """
-    Calcula taxa de abertura de empresa
+    Monta os dados financeiros a partir das colunas persistidas na proposta.
     
-    Args:
-        cliente_abertura: Se o cliente é abertura de empresa (tabela cliente.abertura_empresa)
-        regime_codigo: Código do regime tributário
-        
-    Returns:
-        float: Valor da taxa (MEI: R$ 300, Outros: R$ 1.000, Cliente existente: R$ 0)
+    Propostas sem resumo gravado (a migração `backfill_resumo_financeiro_proposta`
+    preenche as antigas) são calculadas em memória, sem gravar nada.
     """
-    if not cliente_abertura:
-        return 0.0
-    
-    # ⚠️ REGRA CORRIGIDA: MEI = R$ 300, outros = R$ 1.000
-    if regime_codigo and regime_codigo.upper() == 'MEI':
-        return 300.0
+    if proposta.valor_base is None:
+        resumo = PropostaService.calcular_resumo_financeiro(proposta)
     else:
-        return 1000.0
+        resumo = {
+            campo: getattr(proposta, campo)
+            for campo in ('valor_servicos', 'taxa_abertura', 'valor_base', 'desconto_valor', 'desconto_percentual')
+        }
+    
+    return {
+        'proposta': proposta,
+        'cliente_abertura': bool(proposta.cliente and proposta.cliente.abertura_empresa),
+        'regime_codigo': referencias.regime_codigo(proposta.regime_tributario_id) or '',
+        'valor_servicos': float(resumo['valor_servicos']),
+        'taxa_abertura': float(resumo['taxa_abertura']),
+        'valor_base': float(resumo['valor_base']),
+        'valor_final': float(proposta.valor_total),
+        'desconto_valor': float(resumo['desconto_valor']),
+        'desconto_percentual': float(resumo['desconto_percentual'])
+    }
 
 
 def obter_dados_completos_proposta(proposta_id: int) -> dict:
     """Obtém dados completos da proposta para cálculos"""
     proposta = Proposta.query.get_or_404(proposta_id)
-    
-    # ⚠️ BUSCAR: Dados necessários com relacionamentos
-    cliente = proposta.cliente
-    regime = proposta.regime_tributario
-    
-    # ⚠️ CALCULAR: Valor dos serviços
-    valor_servicos = sum(float(item.valor_total) for item in proposta.itens if item.ativo)
-    
-    # ⚠️ CALCULAR: Taxa de abertura
-    taxa_abertura = calcular_taxa_abertura_empresa(
-        cliente.abertura_empresa if cliente else False,
-        regime.codigo if regime else ''
-    )
-    
-    # ⚠️ VALOR BASE: Serviços + Taxa de abertura
-    valor_base = valor_servicos + taxa_abertura
-    
-    # ⚠️ CALCULAR: Desconto real (Base - Valor Final)
-    valor_final = float(proposta.valor_total)
-    desconto_valor = valor_base - valor_final
-    desconto_percentual = (desconto_valor / valor_base * 100) if valor_base > 0 else 0
-    
-    return {
-        'proposta': proposta,
-        'cliente_abertura': cliente.abertura_empresa if cliente else False,
-        'regime_codigo': regime.codigo if regime else '',
-        'valor_servicos': valor_servicos,
-        'taxa_abertura': taxa_abertura,
-        'valor_base': valor_base,
-        'valor_final': valor_final,
-        'desconto_valor': desconto_valor,
-        'desconto_percentual': desconto_percentual
-    }
+    return dados_financeiros_proposta(proposta)
 
 
 @propostas_bp.route('/', methods=['GET'])
@@ -111,8 +88,19 @@ def get_propostas():
     cliente_id = request.args.get('cliente_id', type=int)
     funcionario_id = request.args.get('funcionario_id', type=int)
     search = request.args.get('search', '').strip()
+    ordenar_por = request.args.get('ordenar_por')
+    ordem = request.args.get('ordem', 'desc').lower()
+    valor_min = request.args.get('valor_min', type=float)
+    valor_max = request.args.get('valor_max', type=float)
+    desconto_min = request.args.get('desconto_min', type=float)
+
+    if ordenar_por and ordenar_por not in COLUNAS_ORDENACAO:
+        return jsonify({
+            'error': f"ordenar_por inválido. Use: {', '.join(COLUNAS_ORDENACAO)}"
+        }), 400
 
     query = Proposta.query.filter(Proposta.ativo == True)
+    relevancia = None
 
     if status:
         query = query.filter(Proposta.status == status.upper())
@@ -120,17 +108,65 @@ def get_propostas():
         query = query.filter(Proposta.cliente_id == cliente_id)
     if funcionario_id:
         query = query.filter(Proposta.funcionario_responsavel_id == funcionario_id)
+    # Filtros sobre o resumo financeiro persistido
+    if valor_min is not None:
+        query = query.filter(Proposta.valor_total >= valor_min)
+    if valor_max is not None:
+        query = query.filter(Proposta.valor_total <= valor_max)
+    if desconto_min is not None:
+        query = query.filter(Proposta.desconto_percentual >= desconto_min)
     if search:
-        query = query.filter(
-            or_(
-                Proposta.numero.ilike(f'%{search}%'),
-                Proposta.observacoes.ilike(f'%{search}%')
+        # Índice FTS5 quando disponível; ilike como fallback
+        busca = filtrar_busca_textual(query, Proposta, search)
+        if busca is not None:
+            query, relevancia = busca
+        else:
+            query = query.filter(
+                or_(
+                    Proposta.numero.ilike(f'%{search}%'),
+                    Proposta.observacoes.ilike(f'%{search}%')
+                )
             )
+
+    # Projeção (fields= / view=summary) ou carregamento em lote do payload completo
+    campos = resolve_fields(Proposta)
+    if campos:
+        query = apply_projection(query, Proposta, campos)
+    else:
+        query = query.options(*Proposta.opcoes_listagem())
+
+    if cursor_mode_requested():
+        pagina = paginate_keyset(
+            query,
+            [(Proposta.created_at, 'desc'), (Proposta.id, 'desc')],
+            cursor=request.args.get('cursor'),
+            per_page=per_page,
+            include_total=request.args.get('incluir_total', 'false').lower() == 'true'
         )
+        data = [serialize_fields(p, campos) if campos else p.to_json() for p in pagina.items]
+        return jsonify({
+            'items': data,
+            'propostas': data,
+            'next_cursor': pagina.next_cursor,
+            'has_more': pagina.has_more,
+            'total': pagina.total,
+            'per_page': pagina.per_page
+        })
 
-    propostas = paginate_query(query.order_by(Proposta.created_at.desc()), page, per_page)
+    if ordenar_por:
+        coluna = COLUNAS_ORDENACAO[ordenar_por]
+        query = query.order_by(
+            coluna.asc() if ordem == 'asc' else coluna.desc(),
+            Proposta.id.desc()
+        )
+    elif relevancia is not None:
+        query = query.order_by(relevancia.asc(), Proposta.created_at.desc())
+    else:
+        query = query.order_by(Proposta.created_at.desc())
+
+    propostas = paginate_query(query, page, per_page)
 
-    data = [p.to_json() for p in propostas.items]
+    data = [serialize_fields(p, campos) if campos else p.to_json() for p in propostas.items]
     return jsonify({
         'items': data,
         'propostas': data,
@@ -146,6 +182,20 @@ def get_propostas():
 def get_proposta(proposta_id: int):
     """Busca uma proposta específica com dados completos"""
     
+    # ETag: proposta, itens, cliente e responsável (304 sem carregar o ORM)
+    assinatura = table_signature(
+        (Proposta, Proposta.id == proposta_id),
+        (ItemProposta, ItemProposta.proposta_id == proposta_id),
+        (Cliente, Cliente.id == select(Proposta.cliente_id).where(Proposta.id == proposta_id).scalar_subquery()),
+        (Funcionario, Funcionario.id == select(Proposta.funcionario_responsavel_id)
+            .where(Proposta.id == proposta_id).scalar_subquery()),
+    )
+    return conditional_response(assinatura, lambda: _detalhe_proposta(proposta_id))
+
+
+def _detalhe_proposta(proposta_id: int):
+    """Monta o JSON completo da proposta (GET /propostas/<id>)"""
+    
     # ⚠️ BUSCAR: Dados completos com cálculos corretos
     dados_completos = obter_dados_completos_proposta(proposta_id)
     proposta = dados_completos['proposta']
@@ -193,20 +243,16 @@ def get_proposta(proposta_id: int):
 @propostas_bp.route('/', methods=['POST'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido()
 def create_proposta():
     data = request.get_json() or {}
-    funcionario_id = int(get_jwt_identity())
+    funcionario_id = current_funcionario().id
 
     # Validação de campos obrigatórios
     validation_error = validate_required_fields(data, ['cliente_id', 'tipo_atividade_id', 'regime_tributario_id'])
     if validation_error:
         return validation_error
     
-    # Verificar se funcionário existe e está ativo
-    funcionario = Funcionario.query.get(funcionario_id)
-    if not funcionario or not funcionario.ativo:
-        raise ValueError('Funcionário não encontrado')
-
     # Verificar se cliente existe e está ativo
     cliente = Cliente.query.get(data['cliente_id'])
     if not cliente:
@@ -236,17 +282,19 @@ def create_proposta():
     )
     
     # ⚠️ VERIFICAR: Se requer aprovação gerencial
-    if proposta.calcular_requer_aprovacao():
+    requer_aprovacao = proposta.calcular_requer_aprovacao()
+    if requer_aprovacao:
         proposta.requer_aprovacao = True
         proposta.status = 'PENDENTE'
-        
-        # Criar notificação para gerentes
+    db.session.add(proposta)
+    db.session.flush()  # Para obter o ID da proposta
+    
+    if requer_aprovacao:
+        # Criar notificação para gerentes (mesma transação; gravada no commit abaixo)
         from models.notificacoes import Notificacao
         Notificacao.criar_notificacao_aprovacao(proposta, funcionario_id)
         
         current_app.logger.info(f"Proposta {proposta.numero} requer aprovação gerencial - Desconto: {proposta.percentual_desconto}%")
-    db.session.add(proposta)
-    db.session.flush()  # Para obter o ID da proposta
 
     # Criar itens da proposta se fornecidos
     if 'itens' in data and isinstance(data['itens'], list):
@@ -277,10 +325,11 @@ def create_proposta():
 @propostas_bp.route('/<int:proposta_id>', methods=['PUT'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido()
 def update_proposta(proposta_id: int):
     proposta = Proposta.query.get_or_404(proposta_id)
     data = request.get_json() or {}
-    funcionario_id = int(get_jwt_identity())
+    funcionario_id = current_funcionario().id
     
     # ⚠️ CAPTURAR: Dados antigos para comparação
     dados_antigos = capturar_dados_atuais(proposta)
@@ -346,8 +395,7 @@ def update_proposta(proposta_id: int):
         proposta.percentual_desconto = desconto_novo
         
         # ⚠️ RECALCULAR: Valor total baseado no novo desconto
-        dados_completos = obter_dados_completos_proposta(proposta_id)
-        valor_base = dados_completos['valor_base']
+        valor_base = float(PropostaService.calcular_resumo_financeiro(proposta)['valor_base'])
         desconto_valor = (valor_base * proposta.percentual_desconto) / 100
         novo_valor_total = valor_base - desconto_valor
         
@@ -446,8 +494,8 @@ def update_proposta(proposta_id: int):
         current_app.logger.error(f"Erro ao salvar proposta {proposta_id}: {str(e)}")
         raise e
     
-    # ⚠️ RETORNAR: Proposta atualizada com cálculos corretos
-    dados_atualizados = obter_dados_completos_proposta(proposta_id)
+    # ⚠️ RETORNAR: Proposta atualizada com cálculos corretos (resumo gravado no flush)
+    dados_atualizados = dados_financeiros_proposta(proposta)
     resposta = proposta.to_json()
     
     # ⚠️ INCLUIR: Dados financeiros calculados
@@ -774,19 +822,12 @@ def finalizar_proposta(proposta_id: int):
 @propostas_bp.route('/<int:proposta_id>/aprovar', methods=['POST'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido(gerente=True, mensagem='Apenas gerentes podem aprovar propostas')
 def aprovar_proposta(proposta_id: int):
     """Aprova uma proposta que requer aprovação gerencial"""
     proposta = Proposta.query.get_or_404(proposta_id)
-    funcionario_id = int(get_jwt_identity())
-
-    # Verificar se funcionário existe e está ativo
-    funcionario = Funcionario.query.get(funcionario_id)
-    if not funcionario or not funcionario.ativo:
-        raise ValueError('Funcionário não encontrado')
-    
-    # Verificar se funcionário é gerente
-    if not funcionario.gerente:
-        raise ValueError('Apenas gerentes podem aprovar propostas')
+    funcionario = current_funcionario()
+    funcionario_id = funcionario.id
 
     # Verificar se proposta requer aprovação
     if not proposta.requer_aprovacao:
@@ -809,21 +850,14 @@ def aprovar_proposta(proposta_id: int):
 @propostas_bp.route('/<int:proposta_id>/rejeitar', methods=['POST'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido(gerente=True, mensagem='Apenas gerentes podem rejeitar propostas')
 def rejeitar_proposta(proposta_id: int):
     """Rejeita uma proposta que requer aprovação gerencial"""
     proposta = Proposta.query.get_or_404(proposta_id)
-    funcionario_id = int(get_jwt_identity())
+    funcionario = current_funcionario()
+    funcionario_id = funcionario.id
     data = request.get_json() or {}
 
-    # Verificar se funcionário existe e está ativo
-    funcionario = Funcionario.query.get(funcionario_id)
-    if not funcionario or not funcionario.ativo:
-        raise ValueError('Funcionário não encontrado')
-    
-    # Verificar se funcionário é gerente
-    if not funcionario.gerente:
-        raise ValueError('Apenas gerentes podem rejeitar propostas')
-
     # Verificar se proposta requer aprovação
     if not proposta.requer_aprovacao:
         raise ValueError('Esta proposta não requer aprovação')
@@ -850,15 +884,11 @@ def rejeitar_proposta(proposta_id: int):
 @propostas_bp.route('/<int:proposta_id>', methods=['DELETE'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido()
 def delete_proposta(proposta_id: int):
     """Soft delete de uma proposta - marca como inativa"""
     proposta = Proposta.query.get_or_404(proposta_id)
-    funcionario_id = int(get_jwt_identity())
-
-    # Verificar se funcionário existe e está ativo
-    funcionario = Funcionario.query.get(funcionario_id)
-    if not funcionario or not funcionario.ativo:
-        raise ValueError('Funcionário não encontrado')
+    funcionario = current_funcionario()
 
     # Soft delete - marcar como inativa
     proposta.ativo = False
@@ -945,22 +975,36 @@ def processar_itens_proposta(proposta: Proposta, novos_itens: list, alteracoes_r
 # ENDPOINTS PARA PDF
 # ============================================================================
 
+import io
 import os
-from flask import send_file, current_app
-from services.pdf_generator import pdf_generator
+from flask import send_file, current_app, Response
+from services.pdf_facade import pdf_generator  # motor de PDF carregado só no primeiro uso
+from services.pdf_jobs import fila_pdf, STATUS_ERRO
+from services.pdf_lote import transmitir_zip
+from services.pdf_preview import montar_dados_previa
+from services.pdf_storage import uso_disco, coletar_lixo
+
+# Tempo máximo que o modo síncrono de gerar-pdf aguarda o job
+PDF_TIMEOUT_SEGUNDOS = int(os.getenv('PDF_TIMEOUT_SEGUNDOS', '120'))
+
+# Limite de propostas por exportação em lote
+MAX_PDF_LOTE = int(os.getenv('MAX_PDF_LOTE', '200'))
 
 
 @propostas_bp.route('/<int:proposta_id>/gerar-pdf', methods=['POST'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido()
 def gerar_pdf_proposta(proposta_id: int):
-    """Gera PDF da proposta e salva no servidor"""
+    """
+    Gera PDF da proposta e salva no servidor.
+    
+    A renderização roda na fila de PDFs. Com `?async=true` a resposta é
+    imediata (202) com o `job_id` para consulta em `/pdf-jobs/<job_id>`;
+    sem o parâmetro a requisição aguarda o job, como antes.
+    """
     try:
-        # Verificar se funcionário existe
-        funcionario_id = int(get_jwt_identity())
-        funcionario = Funcionario.query.get(funcionario_id)
-        if not funcionario or not funcionario.ativo:
-            raise ValueError('Funcionário não encontrado')
+        funcionario = current_funcionario()
         
         # Se proposta_id é 0, significa que é uma proposta nova (mock)
         if proposta_id == 0:
@@ -982,25 +1026,42 @@ def gerar_pdf_proposta(proposta_id: int):
             # Verificar se proposta existe
             proposta = Proposta.query.get_or_404(proposta_id)
             
-            # Gerar PDF
-            caminho_pdf = pdf_generator.gerar_pdf_proposta(proposta_id)
+            # Enfileirar (pedidos repetidos reaproveitam o job em andamento)
+            job = fila_pdf.enfileirar(proposta_id)
             
-            # Atualizar proposta com informações do PDF
-            proposta.pdf_gerado = True
-            proposta.pdf_caminho = caminho_pdf
-            proposta.pdf_data_geracao = datetime.now()
+            if request.args.get('async', 'false').lower() == 'true':
+                return jsonify({
+                    'message': 'Geração de PDF enfileirada',
+                    **job.to_json(),
+                    'status_url': f'/api/propostas/pdf-jobs/{job.id}'
+                }), 202
             
-            db.session.commit()
+            if not job.aguardar(PDF_TIMEOUT_SEGUNDOS):
+                # Ainda renderizando: o cliente pode acompanhar pelo job
+                return jsonify({
+                    'message': 'PDF ainda em geração',
+                    **job.to_json(),
+                    'status_url': f'/api/propostas/pdf-jobs/{job.id}'
+                }), 202
+            
+            if job.status == STATUS_ERRO:
+                raise RuntimeError(job.erro)
+            
+            # O job gravou os campos de PDF em outra sessão
+            db.session.refresh(proposta)
             
             current_app.logger.info(
-                f"PDF gerado para proposta {proposta.numero}: {caminho_pdf} "
+                f"PDF gerado para proposta {proposta.numero}: {proposta.pdf_caminho} "
                 f"(Funcionário: {funcionario.nome})"
             )
             
             return jsonify({
                 'message': 'PDF gerado com sucesso',
-                'pdf_caminho': caminho_pdf,
-                'pdf_data_geracao': proposta.pdf_data_geracao.isoformat()
+                'pdf_caminho': proposta.pdf_caminho,
+                'pdf_data_geracao': proposta.pdf_data_geracao.isoformat(),
+                # Tamanho do arquivo x orçamento PDF_ORCAMENTO_KB
+                'tamanho_bytes': job.tamanho['tamanho_bytes'] if job.tamanho else None,
+                'dentro_orcamento': job.tamanho['dentro_orcamento'] if job.tamanho else None
             })
         
     except Exception as e:
@@ -1009,21 +1070,120 @@ def gerar_pdf_proposta(proposta_id: int):
         return jsonify({'error': f'Erro ao gerar PDF: {str(e)}'}), 500
 
 
+@propostas_bp.route('/pdf-lote', methods=['POST'])
+@jwt_required()
+@handle_api_errors
+@funcionario_requerido()
+def exportar_pdfs_lote():
+    """
+    Exporta os PDFs de várias propostas em um ZIP transmitido aos poucos.
+    
+    Body: `{"ids": [1, 2, 3]}` ou filtros `{"status": "APROVADA", "cliente_id": 1,
+    "data_inicio": "2025-09-01", "data_fim": "2025-09-30"}` (data de criação).
+    As renderizações rodam no pool da fila de PDFs e reaproveitam PDFs em
+    cache; falhas individuais ficam em `relatorio.json` dentro do ZIP.
+    """
+    funcionario = current_funcionario()
+    
+    data = request.get_json() or {}
+    query = Proposta.query.filter(Proposta.ativo == True)
+    
+    if data.get('ids'):
+        query = query.filter(Proposta.id.in_([int(i) for i in data['ids']]))
+    else:
+        if not any(data.get(campo) for campo in ('status', 'cliente_id', 'data_inicio', 'data_fim')):
+            raise ValueError('Informe "ids" ou ao menos um filtro (status, cliente_id, data_inicio, data_fim)')
+        if data.get('status'):
+            query = query.filter(Proposta.status == data['status'].upper())
+        if data.get('cliente_id'):
+            query = query.filter(Proposta.cliente_id == int(data['cliente_id']))
+        if data.get('data_inicio'):
+            query = query.filter(Proposta.created_at >= datetime.fromisoformat(data['data_inicio']))
+        if data.get('data_fim'):
+            # Data final inclusiva
+            query = query.filter(Proposta.created_at < datetime.fromisoformat(data['data_fim']) + timedelta(days=1))
+    
+    proposta_ids = [
+        proposta_id for (proposta_id,) in
+        query.with_entities(Proposta.id).order_by(Proposta.id).limit(MAX_PDF_LOTE + 1)
+    ]
+    if not proposta_ids:
+        return jsonify({'error': 'Nenhuma proposta encontrada para exportar'}), 404
+    if len(proposta_ids) > MAX_PDF_LOTE:
+        raise ValueError(f'O lote excede o limite de {MAX_PDF_LOTE} propostas')
+    
+    # Enfileira tudo antes de começar a transmitir (HTML montado aqui, render no pool)
+    jobs = [fila_pdf.enfileirar(proposta_id) for proposta_id in proposta_ids]
+    
+    current_app.logger.info(
+        f"Exportação em lote de {len(jobs)} PDFs iniciada (Funcionário: {funcionario.nome})"
+    )
+    
+    # Prazo total: um timeout por "rodada" de renders em paralelo
+    rodadas = -(-len(jobs) // fila_pdf.max_workers)
+    nome_zip = f"propostas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return Response(
+        transmitir_zip(jobs, timeout=PDF_TIMEOUT_SEGUNDOS * rodadas),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{nome_zip}"'}
+    )
+
+
+@propostas_bp.route('/preview-pdf', methods=['POST'])
+@jwt_required()
+@handle_api_errors
+@funcionario_requerido()
+def preview_pdf_proposta():
+    """
+    Prévia do PDF a partir do payload do assistente (mesmo formato de POST /propostas).
+    
+    Nada é gravado: nem proposta no banco nem arquivo em disco. Serviços vêm
+    do snapshot de referências e o PDF é renderizado no pool da fila de PDFs
+    e devolvido diretamente na resposta.
+    """
+    
+    template_data = montar_dados_previa(request.get_json() or {})
+    html_content = pdf_generator.renderizar_html(template_data)
+    pdf_bytes = fila_pdf.renderizar_em_memoria(html_content, timeout=PDF_TIMEOUT_SEGUNDOS)
+    
+    resposta = send_file(
+        io.BytesIO(pdf_bytes),
+        mimetype='application/pdf',
+        as_attachment=False,
+        download_name='previa_proposta.pdf'
+    )
+    resposta.headers['Cache-Control'] = 'no-store'
+    return resposta
+
+
+@propostas_bp.route('/pdf-jobs/<job_id>', methods=['GET'])
+@jwt_required()
+@handle_api_errors
+@funcionario_requerido()
+def status_pdf_job(job_id: str):
+    """Consulta o andamento de um job de geração de PDF"""
+    job = fila_pdf.obter(job_id)
+    if not job:
+        return jsonify({'error': 'Job não encontrado ou expirado'}), 404
+    return jsonify(job.to_json())
+
+
 @propostas_bp.route('/<int:proposta_id>/pdf', methods=['GET'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido()
 def visualizar_pdf_proposta(proposta_id: int):
-    """Visualiza/baixa o PDF da proposta"""
+    """
+    Visualiza/baixa o PDF da proposta.
+    
+    O arquivo é servido com ETag/Last-Modified (304 em GET condicional) e
+    aceita `Range` (206). Com `USE_X_SENDFILE` o envio fica com o servidor web;
+    sem ele, o servidor WSGI usa o file_wrapper (sendfile do SO quando disponível).
+    """
     try:
         # Verificar se proposta existe
         proposta = Proposta.query.get_or_404(proposta_id)
         
-        # Verificar se funcionário existe
-        funcionario_id = int(get_jwt_identity())
-        funcionario = Funcionario.query.get(funcionario_id)
-        if not funcionario or not funcionario.ativo:
-            raise ValueError('Funcionário não encontrado')
-        
         # Verificar se PDF existe
         if not proposta.pdf_gerado or not proposta.pdf_caminho:
             return jsonify({'error': 'PDF não foi gerado para esta proposta'}), 404
@@ -1039,32 +1199,66 @@ def visualizar_pdf_proposta(proposta_id: int):
         
         # Retornar arquivo
         nome_arquivo = os.path.basename(proposta.pdf_caminho)
-        return send_file(
+        resposta = send_file(
             proposta.pdf_caminho,
             as_attachment=True,
             download_name=nome_arquivo,
-            mimetype='application/pdf'
+            mimetype='application/pdf',
+            conditional=True,
+            etag=True,
+            max_age=0
         )
+        # O nome do arquivo muda a cada conteúdo novo; a validação é sempre pelo ETag
+        resposta.headers['Cache-Control'] = 'private, no-cache'
+        return resposta
         
     except Exception as e:
         current_app.logger.error(f"Erro ao visualizar PDF da proposta {proposta_id}: {str(e)}")
         return jsonify({'error': f'Erro ao visualizar PDF: {str(e)}'}), 500
 
 
+@propostas_bp.route('/pdf-armazenamento', methods=['GET'])
+@jwt_required()
+@handle_api_errors
+@funcionario_requerido(gerente=True, mensagem='Apenas gerentes podem consultar o armazenamento de PDFs')
+def relatorio_armazenamento_pdf():
+    """Espaço em disco ocupado pelos PDFs (referenciados x órfãos) - apenas gerentes"""
+    return jsonify(uso_disco(pdf_generator.upload_dir))
+
+
+@propostas_bp.route('/pdf-armazenamento/limpar', methods=['POST'])
+@jwt_required()
+@handle_api_errors
+@funcionario_requerido(gerente=True, mensagem='Apenas gerentes podem limpar o armazenamento de PDFs')
+def limpar_armazenamento_pdf():
+    """
+    Remove PDFs que nenhuma proposta referencia, após a retenção - apenas gerentes.
+    
+    `?simular=true` apenas lista os arquivos que seriam removidos.
+    """
+    funcionario = current_funcionario()
+    
+    simular = request.args.get('simular', 'false').lower() == 'true'
+    resultado = coletar_lixo(pdf_generator.upload_dir, simular=simular)
+    
+    current_app.logger.info(
+        f"Coleta de PDFs {'simulada' if simular else 'executada'}: {len(resultado['removidos'])} arquivos, "
+        f"{resultado['bytes_liberados']} bytes (Funcionário: {funcionario.nome})"
+    )
+    return jsonify(resultado)
+
+
 @propostas_bp.route('/<int:proposta_id>/pdf', methods=['DELETE'])
 @jwt_required()
 @handle_api_errors
+@funcionario_requerido()
 def excluir_pdf_proposta(proposta_id: int):
     """Exclui o PDF da proposta"""
     try:
         # Verificar se proposta existe
         proposta = Proposta.query.get_or_404(proposta_id)
         
-        # Verificar se funcionário existe
-        funcionario_id = int(get_jwt_identity())
-        funcionario = Funcionario.query.get(funcionario_id)
-        if not funcionario or not funcionario.ativo:
-            raise ValueError('Funcionário não encontrado')
+        funcionario = current_funcionario()
         
         # Verificar se PDF existe
         if not proposta.pdf_gerado or not proposta.pdf_caminho:
@@ -10,7 +10,11 @@ from sqlalchemy import or_
 from config import db
 from models.servicos import Servico, ServicoRegime
 from models.tributario import RegimeTributario
-from .utils import handle_api_errors, validate_required_fields, paginate_query, build_search_filters
+from models.referencias import referencias
+from .utils import (
+    handle_api_errors, validate_required_fields, paginate_query, build_search_filters,
+    resolve_fields, apply_projection, serialize_fields, conditional_response
+)
 
 servicos_bp = Blueprint('servicos', __name__)
 
@@ -42,11 +46,16 @@ def get_servicos():
         if search_filters:
             query = query.filter(or_(*search_filters))
     
+    # Projeção (fields= / view=summary) sem percorrer servico_regime
+    campos = resolve_fields(Servico)
+    if campos:
+        query = apply_projection(query, Servico, campos)
+    
     # Paginação
     paginated = paginate_query(query, page, per_page)
     
     return jsonify({
-        'items': [servico.to_json() for servico in paginated.items],
+        'items': [serialize_fields(s, campos) if campos else s.to_json() for s in paginated.items],
         'total': paginated.total,
         'pages': paginated.pages,
         'current_page': paginated.page,
@@ -61,25 +70,18 @@ def get_servicos_por_regime(regime_id: int):
     """Retorna serviços disponíveis para um regime tributário específico"""
     
     # Verificar se o regime existe
-    regime = RegimeTributario.query.get_or_404(regime_id)
-    
-    # ✅ IMPLEMENTAR: Query para buscar serviços vinculados ao regime
-    # Assumindo que existe uma tabela de relacionamento servico_regime
-    servicos = db.session.query(Servico)\
-        .join(ServicoRegime)\
-        .filter(
-            ServicoRegime.regime_tributario_id == regime_id,
-            ServicoRegime.ativo == True,
-            Servico.ativo == True
-        )\
-        .order_by(Servico.categoria, Servico.nome)\
-        .all()
-    
-    current_app.logger.info(f"Encontrados {len(servicos)} serviços para regime {regime.codigo}")
+    regime = referencias.regime(regime_id)
+    if regime is None:
+        return jsonify({'error': 'Regime tributário não encontrado'}), 404
+    
+    # Serviços ativos com vínculo ativo ao regime (cache de referência)
+    servicos = referencias.servicos_do_regime(regime_id)
+    
+    current_app.logger.info(f"Encontrados {len(servicos)} serviços para regime {regime['codigo']}")
     
     return jsonify({
-        'regime': regime.to_json(),
-        'servicos': [s.to_json() for s in servicos],
+        'regime': regime,
+        'servicos': servicos,
         'total': len(servicos)
     })
 
@@ -91,13 +93,21 @@ def get_servicos_para_proposta():
     """
     Retorna todos os serviços ativos (simplificado)
     """
-    # Retornar todos os serviços ativos
-    servicos = Servico.query.filter(Servico.ativo == True).all()
+    campos = resolve_fields(Servico)
     
-    return jsonify({
-        'items': [servico.to_json() for servico in servicos],
-        'total': len(servicos)
-    })
+    def montar_resposta():
+        # Retornar todos os serviços ativos (cache de referência, já no formato de to_json)
+        servicos = referencias.servicos_ativos()
+        if campos:
+            servicos = [{campo: s[campo] for campo in campos} for s in servicos]
+        
+        return jsonify({
+            'items': servicos,
+            'total': len(servicos)
+        })
+    
+    # ETag: versões de serviços, vínculos com regimes e regimes (usados em to_json)
+    return conditional_response(referencias.carimbo('servicos'), montar_resposta)
 
 
 @servicos_bp.route('/<int:servico_id>', methods=['GET'])
@@ -105,8 +115,10 @@ def get_servicos_para_proposta():
 @handle_api_errors
 def get_servico(servico_id: int):
     """Busca um serviço específico"""
-    servico = Servico.query.get_or_404(servico_id)
-    return jsonify(servico.to_json())
+    servico = referencias.servico(servico_id)
+    if servico is None:
+        return jsonify({'error': 'Serviço não encontrado'}), 404
+    return jsonify(servico)
 
 
 @servicos_bp.route('/', methods=['POST'])
@@ -230,19 +242,8 @@ def get_regimes_tributarios():
         return jsonify({'error': 'tipo_atividade_id é obrigatório'}), 400
     
     try:
-        # Buscar regimes tributários que são aplicáveis ao tipo de atividade
-        from models.tributario import AtividadeRegime
-        
-        regimes = db.session.query(RegimeTributario).join(
-            AtividadeRegime, 
-            AtividadeRegime.regime_tributario_id == RegimeTributario.id
-        ).filter(
-            AtividadeRegime.tipo_atividade_id == tipo_atividade_id,
-            RegimeTributario.ativo == True,
-            AtividadeRegime.ativo == True
-        ).order_by(RegimeTributario.nome).all()
-        
-        return jsonify([regime.to_json() for regime in regimes])
+        # Regimes tributários aplicáveis ao tipo de atividade, por nome
+        return jsonify(referencias.regimes_da_atividade(tipo_atividade_id))
         
     except Exception as e:
         current_app.logger.error(f"Erro ao buscar regimes por tipo de atividade: {e}")
@@ -357,16 +358,19 @@ def delete_servico(servico_id: int):
 def gerar_codigo_servico(nome: str) -> str:
     """Gera código único para o serviço baseado no nome"""
     import re
-    from datetime import datetime
+    from models import proximo_valor, maior_sufixo_numerico
     
     # Pegar as 3 primeiras letras do nome, apenas letras
     nome_limpo = re.sub(r'[^a-zA-Z]', '', nome.upper())
     prefixo = nome_limpo[:3].ljust(3, 'X')  # Garantir 3 caracteres
     
-    # Adicionar timestamp para unicidade
-    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')[-6:]  # Últimos 6 dígitos
+    # Número sequencial para unicidade (semeado com o maior sufixo já usado)
+    numero = proximo_valor(
+        'servico',
+        semente=lambda: maior_sufixo_numerico(Servico.codigo, tamanho_prefixo=3)
+    )
     
-    return f"{prefixo}{timestamp}"
+    return f"{prefixo}{numero:04d}"
 
 
 
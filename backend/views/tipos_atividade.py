@@ -3,11 +3,11 @@ Views relacionadas aos tipos de atividade.
 """
 
 from flask import Blueprint, request, jsonify, current_app
-from sqlalchemy import or_
 
 from config import db
 from models import TipoAtividade, AtividadeRegime
-from .utils import handle_api_errors, validate_required_fields, build_search_filters
+from models.referencias import referencias
+from .utils import handle_api_errors, validate_required_fields
 
 tipos_atividade_bp = Blueprint('tipos_atividade', __name__)
 
@@ -19,27 +19,28 @@ def get_tipos_atividade():
     aplicavel_pj = request.args.get('aplicavel_pj', type=bool)
     search = request.args.get('search', '').strip()
 
-    query = TipoAtividade.query
+    tipos = referencias.tipos_atividade()
 
     if ativo is not None:
-        query = query.filter(TipoAtividade.ativo == ativo)
+        tipos = [t for t in tipos if t['ativo'] == ativo]
     if aplicavel_pf is not None:
-        query = query.filter(TipoAtividade.aplicavel_pf == aplicavel_pf)
+        tipos = [t for t in tipos if t['aplicavel_pf'] == aplicavel_pf]
     if aplicavel_pj is not None:
-        query = query.filter(TipoAtividade.aplicavel_pj == aplicavel_pj)
+        tipos = [t for t in tipos if t['aplicavel_pj'] == aplicavel_pj]
     if search:
-        search_filters = build_search_filters(TipoAtividade, search, ['nome', 'codigo'])
-        if search_filters:
-            query = query.filter(or_(*search_filters))
+        # Mesmo critério de build_search_filters: trecho em nome ou código, sem diferenciar maiúsculas
+        termo = search.casefold()
+        tipos = [t for t in tipos if termo in t['nome'].casefold() or termo in t['codigo'].casefold()]
 
-    tipos = query.order_by(TipoAtividade.nome).all()
-    return jsonify([t.to_json() for t in tipos])
+    return jsonify(tipos)
 
 @tipos_atividade_bp.route('/<int:tipo_id>', methods=['GET'])
 @handle_api_errors
 def get_tipo_atividade(tipo_id: int):
-    tipo = TipoAtividade.query.get_or_404(tipo_id)
-    return jsonify(tipo.to_json())
+    tipo = referencias.tipo_atividade(tipo_id)
+    if tipo is None:
+        return jsonify({'error': 'Tipo de atividade não encontrado'}), 404
+    return jsonify(tipo)
 
 @tipos_atividade_bp.route('/', methods=['POST'])
 @handle_api_errors
@@ -2,15 +2,24 @@
 Utilitários e decoradores para as views da API.
 """
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g
+from flask_jwt_extended import get_jwt_identity
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import or_
+from sqlalchemy import or_, and_, inspect, func, select
+from sqlalchemy.orm import load_only, noload
 from typing import Dict, List, Optional, Any, Tuple
 from functools import wraps
+import base64
+import hashlib
+import json
+import threading
+import time
 import traceback
-from datetime import datetime
+from datetime import datetime, date
+from decimal import Decimal
 
 from config import db
+from models import Funcionario
 
 def handle_api_errors(f):
     """Decorator para tratamento padronizado de erros da API"""
@@ -32,6 +41,37 @@ def handle_api_errors(f):
             return jsonify({'error': 'Erro interno do servidor'}), 500
     return decorated_function
 
+def current_funcionario():
+    """
+    Funcionário do token JWT (FuncionarioResumo, ou None se não existe).
+
+    Resolvido no máximo uma vez por requisição (guardado em `flask.g`) e,
+    entre requisições, vindo do cache de Funcionario.resumo_em_cache.
+    """
+    if 'funcionario_atual' not in g:
+        g.funcionario_atual = Funcionario.resumo_em_cache(int(get_jwt_identity()))
+    return g.funcionario_atual
+
+def funcionario_requerido(gerente: bool = False, mensagem: str = 'Apenas gerentes podem realizar esta ação'):
+    """
+    Decorator que exige funcionário ativo (e gerente, com `gerente=True`).
+
+    Usar abaixo de @jwt_required e @handle_api_errors: funcionário inexistente
+    ou inativo vira 400 ('Funcionário não encontrado'); sem o papel de
+    gerente, 403 com `mensagem`.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            funcionario = current_funcionario()
+            if funcionario is None or not funcionario.ativo:
+                raise ValueError('Funcionário não encontrado')
+            if gerente and not funcionario.gerente:
+                return jsonify({'error': mensagem}), 403
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
 def validate_required_fields(data: Dict[str, Any], required_fields: List[str]) -> Optional[Tuple[Dict, int]]:
     """Valida campos obrigatórios"""
     missing = [field for field in required_fields if not data.get(field)]
@@ -44,6 +84,217 @@ def paginate_query(query, page: int = 1, per_page: int = 20, max_per_page: int =
     per_page = min(per_page, max_per_page)
     return query.paginate(page=page, per_page=per_page, error_out=False)
 
+# Cache curto de totais para a paginação por cursor (evita COUNT(*) a cada página)
+_TOTAL_CACHE_TTL = 30
+_total_cache: Dict[str, Tuple[float, int]] = {}
+_total_cache_lock = threading.Lock()
+
+
+class KeysetPagination:
+    """Resultado de uma página obtida por cursor (keyset)"""
+
+    def __init__(self, items: list, per_page: int, next_cursor: Optional[str], total: Optional[int] = None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.has_more = next_cursor is not None
+        self.total = total
+
+
+def cursor_mode_requested() -> bool:
+    """Indica se o cliente pediu paginação por cursor (`?cursor=` presente, mesmo vazio)"""
+    return 'cursor' in request.args
+
+
+def _encode_cursor(values: list) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+# Tipos JSON aceitos no cursor para cada tipo de coluna da chave de ordenação
+_CURSOR_TIPOS_JSON = {
+    int: (int,),
+    float: (int, float),
+    Decimal: (int, float),
+    str: (str,),
+    datetime: (str,),
+}
+
+
+def _decode_cursor(cursor: str, columns: list) -> list:
+    """Valores da chave de ordenação do cursor; ValueError se ele não bate com `columns`"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor de paginação inválido')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Cursor de paginação inválido')
+    decoded = []
+    for column, value in zip(columns, values):
+        coluna = column.property.columns[0]
+        python_type = coluna.type.python_type
+        if value is None:
+            if not coluna.nullable:
+                raise ValueError('Cursor de paginação inválido')
+        elif isinstance(value, bool) or not isinstance(value, _CURSOR_TIPOS_JSON.get(python_type, (python_type,))):
+            raise ValueError('Cursor de paginação inválido')
+        elif python_type is datetime:
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                raise ValueError('Cursor de paginação inválido')
+        elif python_type is Decimal:
+            value = Decimal(str(value))
+        decoded.append(value)
+    return decoded
+
+
+def _count_cached(query) -> int:
+    compiled = query.order_by(None).statement.compile()
+    key = f"{compiled}|{sorted(compiled.params.items())!r}"
+    now = time.monotonic()
+    with _total_cache_lock:
+        cached = _total_cache.get(key)
+        if cached and now - cached[0] < _TOTAL_CACHE_TTL:
+            return cached[1]
+    total = query.order_by(None).count()
+    with _total_cache_lock:
+        if len(_total_cache) > 256:
+            _total_cache.clear()
+        _total_cache[key] = (now, total)
+    return total
+
+
+def paginate_keyset(query, order_by: List[Tuple[Any, str]], cursor: Optional[str] = None,
+                    per_page: int = 20, max_per_page: int = 100, include_total: bool = False):
+    """
+    Paginação por cursor (keyset) para listas grandes.
+
+    `order_by` é a chave de ordenação única, ex.: `[(Proposta.created_at, 'desc'), (Proposta.id, 'desc')]`.
+    Em vez de OFFSET, a página seguinte é buscada a partir da última chave
+    retornada, o que permite percorrer o índice da chave sem custo crescente.
+    O total só é calculado quando `include_total=True` e fica em cache por alguns segundos.
+    """
+    per_page = max(1, min(per_page, max_per_page))
+    columns = [column for column, _ in order_by]
+
+    total = _count_cached(query) if include_total else None
+
+    if cursor:
+        values = _decode_cursor(cursor, columns)
+        # (a, b) > (x, y)  =>  a > x OR (a = x AND b > y), respeitando a direção de cada coluna
+        conditions = []
+        for i, (column, direction) in enumerate(order_by):
+            comparison = column < values[i] if direction == 'desc' else column > values[i]
+            equals = [columns[j] == values[j] for j in range(i)]
+            conditions.append(and_(*equals, comparison))
+        query = query.filter(or_(*conditions))
+
+    query = query.order_by(*[
+        column.desc() if direction == 'desc' else column.asc()
+        for column, direction in order_by
+    ])
+
+    rows = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = _encode_cursor([getattr(last, column.key) for column in columns])
+
+    return KeysetPagination(rows, per_page, next_cursor, total)
+
+
+def resolve_fields(model) -> Optional[List[str]]:
+    """
+    Lê `fields=a,b,c` ou `view=summary` da query string.
+
+    Retorna a lista de colunas a carregar (sempre incluindo `id`) ou None para
+    o payload completo. `view=summary` usa `model.CAMPOS_RESUMO`; colunas em
+    `model.CAMPOS_OCULTOS` nunca podem ser pedidas.
+    """
+    fields_param = request.args.get('fields', '').strip()
+    view = request.args.get('view', '').strip().lower()
+
+    if fields_param:
+        requested = [f.strip() for f in fields_param.split(',') if f.strip()]
+    elif view == 'summary':
+        requested = list(getattr(model, 'CAMPOS_RESUMO', ()))
+    else:
+        return None
+
+    hidden = set(getattr(model, 'CAMPOS_OCULTOS', ()))
+    available = {attr.key for attr in inspect(model).column_attrs} - hidden
+    invalid = [f for f in requested if f not in available]
+    if invalid:
+        raise ValueError(f'Campos inválidos: {", ".join(invalid)}')
+
+    if 'id' not in requested:
+        requested.insert(0, 'id')
+    return list(dict.fromkeys(requested))
+
+
+def apply_projection(query, model, fields: List[str]):
+    """Carrega apenas as colunas pedidas e nenhum relacionamento"""
+    return query.options(load_only(*[getattr(model, f) for f in fields]), noload('*'))
+
+
+def serialize_fields(obj, fields: List[str]) -> Dict[str, Any]:
+    """Serializa apenas os campos pedidos, no mesmo formato de `to_json`"""
+    data = {}
+    for field in fields:
+        value = getattr(obj, field)
+        if isinstance(value, Decimal):
+            value = float(value)
+        elif isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        data[field] = value
+    return data
+
+
+def table_signature(*specs) -> tuple:
+    """
+    Assinatura barata do conteúdo de uma ou mais consultas, para ETags.
+    
+    Cada spec é `(model, *criterios)`; para cada uma são lidos `COUNT(*)` e
+    `MAX(updated_at)` das linhas que casam com os critérios, tudo em um único
+    SELECT. O COUNT detecta remoções; o MAX detecta inserções e alterações.
+    """
+    colunas = []
+    for model, *criterios in specs:
+        colunas.append(select(func.count()).select_from(model).where(*criterios).scalar_subquery())
+        colunas.append(select(func.max(model.updated_at)).where(*criterios).scalar_subquery())
+    return tuple(db.session.execute(select(*colunas)).one())
+
+
+def make_etag(*parts) -> str:
+    """ETag forte a partir das partes da assinatura e da representação pedida"""
+    raw = repr((request.path, request.query_string) + parts).encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()
+
+
+def conditional_response(signature: tuple, build_response):
+    """
+    Responde `304 Not Modified` quando `If-None-Match` casa com a assinatura.
+    
+    `build_response` só é chamado (carregando e serializando os dados) quando
+    o cliente não tem a versão atual. O ETag é anexado apenas a respostas 200.
+    """
+    etag = make_etag(*signature)
+    if etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.make_response(build_response())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag)
+    # O navegador pode guardar a resposta, mas deve revalidar a cada uso
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 def build_search_filters(model, search_term: str, search_fields: List[str]):
     """Constrói filtros de busca dinamicamente"""
     if not search_term: